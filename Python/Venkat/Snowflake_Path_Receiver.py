@@ -2,6 +2,9 @@
 import time
 from machine import Pin, PWM, UART
 import Subu
+from snowflake_hal import link
+from snowflake_hal.maneuver import Maneuver
+from snowflake_hal.route import RouteRunner
 
 # --- Hardware Abstraction Classes ---
 
@@ -74,6 +77,60 @@ led = LED()
 # Connect this board's RX pin (IO14) to the ESP32's TX pin (GPIO17).
 # Connect this board's TX pin (IO13) to the ESP32's RX pin (GPIO16).
 uart = UART(0, baudrate=115200, tx=Subu.IO1, rx=Subu.IO2)
+# The route arrives as link frames into a bounded queue (snowflake_hal/route.py);
+# it is driven from there at the robot's own pace and progress is reported back.
+link_tx = link.LinkEncoder(uart)
+link_rx = link.LinkDecoder()
+runner = RouteRunner(link_tx)
+moves = Maneuver(motor)
+
+# Route steps are run-length motion segments: F(n) drives n cells in one go,
+# T(angle) turns by a signed angle (+ right). The robot only stops between
+# segments, not between the cells of a straight run.
+CELL_MS = 1000      # time to drive one cell
+TURN_90_MS = 500    # adjust time for a 90-degree turn
+SETTLE_MS = 500     # pause after each segment
+
+def forward_move(cells):
+    return (0, 255, 0), "forward", CELL_MS * max(1, cells)   # Green for forward
+
+def turn_move(angle):
+    action = "turn_right" if angle > 0 else "turn_left"
+    return (0, 0, 255), action, TURN_90_MS * abs(angle) // 90  # Blue for turns
+
+STEP_MOVES = {
+    link.FORWARD: forward_move,
+    link.TURN: turn_move,
+}
+
+def start_step(op, arg):
+    color, action, ms = STEP_MOVES[op](arg)
+    moves.start()
+    moves.add(lambda: led.set_all(*color), 0).add(action, ms)
+    moves.add("stop", 0).add(lambda: led.set_all(255, 0, 0), SETTLE_MS)
+
+def on_begin(value):
+    moves.abort()
+    runner.on_begin(value)   # value carries the route id as well (route.py)
+    print(f"New route: {runner.total} steps")
+
+def on_stop(value):
+    print("Stop received")
+    moves.abort()
+    runner.abort()
+    led.set_all(255, 0, 0)
+
+def on_speed(value):
+    motor.set_speed(value / 100.0)
+
+def queue_step(op):
+    return lambda value: runner.on_step(op, value)
+
+link_rx.on(link.PATH_BEGIN, on_begin)
+link_rx.on(link.STOP, on_stop)
+link_rx.on(link.SPEED, on_speed)
+for op in STEP_MOVES:
+    link_rx.on(op, queue_step(op))
 
 # --- Main Program ---
 def main():
@@ -82,50 +139,34 @@ def main():
     time.sleep(1)
     led.off()
 
+    step_running = False
     while True:
-        if uart.any():
-            command_bytes = uart.readline()
-            if not command_bytes:
-                continue
-
-            command = command_bytes.decode('utf-8').strip()
-            print(f"Received: '{command}'")
-
-            # --- Command Processing ---
-            if command == 'F': # Forward
-                led.set_all(0, 255, 0) # Green for forward
-                motor.forward()
-                time.sleep(1) # Move forward for 1 second
-                motor.stop()
-                led.set_all(255, 0, 0)
-                time.sleep(0.5)
-            elif command == 'L': # Turn Left
-                led.set_all(0, 0, 255) # Blue for left
-                motor.turn_left()
-                time.sleep(0.5) # Adjust time for a 90-degree turn
-                motor.stop()
-                led.set_all(255, 0, 0)
-                time.sleep(0.5)
-            elif command == 'R': # Turn Right
-                led.set_all(0, 0, 255) # Blue for right
-                motor.turn_right()
-                time.sleep(0.5) # Adjust time for a 90-degree turn
-                motor.stop()
-                led.set_all(255, 0, 0)
-                time.sleep(0.5)
-            elif command == 'S': # Stop
-                led.set_all(255, 0, 0) 
-                motor.stop()
-                led.set_all(255, 0, 0)
-                time.sleep(0.5)
-            elif command.startswith('V'):
-                try:
-                    speed_percent = int(command[1:])
-                    speed_fraction = speed_percent / 100.0
-                    motor.set_speed(speed_fraction)
-                except (ValueError, IndexError):
-                    print("Invalid speed command received.")
-        
+        lost = link_rx.lost
+        link_rx.service(uart)
+        if runner.active and link_rx.lost != lost:
+            print("Frames lost, abandoning the route.")
+            moves.abort()
+            runner.fail()
+        # Heartbeat to the sender, and a route whose next steps never arrive is dropped
+        if runner.check():
+            print("No steps from the sender, abandoning the route.")
+            moves.abort()
+            led.set_all(255, 0, 0)
+
+        if moves.update():
+            time.sleep_ms(5)
+            continue
+        if step_running:
+            step_running = False
+            if not moves.aborted:  # a STOP or a new route cut it short
+                runner.step_done()
+
+        step = runner.next()
+        if step:
+            print(f"Step {runner.done + 1}/{runner.total}: {chr(step[0])}({step[1]})")
+            start_step(step[0], step[1])
+            step_running = True
+
         # A small delay to prevent the loop from running too fast
         time.sleep_ms(10)
 
@@ -1,10 +1,15 @@
 import network
-import socket
 import time
 from machine import UART
 import json
 
 import Cayo
+from snowflake_hal.web import WebServer
+from snowflake_hal.static import load_page
+from snowflake_hal.sse import EventStream
+from snowflake_hal import link
+from snowflake_hal.route import RouteSender, watch_sender, path_commands, motion_program, ROUTE_DONE, ROUTE_ABORTED, ROUTE_ERROR
+from snowflake_hal.planner import GridPlanner
 
 # --- Configuration ---
 WIFI_SSID = "Subu-Path-Control"
@@ -14,6 +19,9 @@ WIFI_PASSWORD = "password123"
 # ESP32's TX (IO9) to Subu's RX and ESP32's RX (IO10) to Subu's TX.
 uart = UART(1, baudrate=115200, tx=Cayo.IO9, rx=Cayo.IO10) 
 print("UART configured on tx=Cayo.IO9, rx=Cayo.IO10.")
+# The route goes over as link frames into the robot's command queue (snowflake_hal/route.py)
+link_tx = link.LinkEncoder(uart)
+link_rx = link.LinkDecoder()
 
 # --- HTML, CSS & JavaScript for Web Interface ---
 def get_web_page_html():
@@ -32,6 +40,7 @@ def get_web_page_html():
             .grid-cell.selected { background-color: #61dafb; }
             .grid-cell.start { background-color: #6eff7e; }
             .grid-cell.end { background-color: #ff6e6e; }
+            .grid-cell.wall { background-color: #111; }
             .controls, .info { margin: 20px; }
             button { background-color: #61dafb; color: #282c34; padding: 10px 20px; font-size: 16px; border: none; border-radius: 5px; cursor: pointer; }
             button:hover { background-color: #88eaff; }
@@ -44,19 +53,31 @@ def get_web_page_html():
             <label>Rows: <input type="number" id="rows" value="5" min="2"></label>
             <label>Cols: <input type="number" id="cols" value="5" min="2"></label>
             <button onclick="createGrid()">Create Grid</button>
+            <label>Click sets: <select id="tool">
+                <option value="path">Path</option>
+                <option value="start">Start</option>
+                <option value="goal">Goal</option>
+                <option value="wall">Wall</option>
+            </select></label>
         </div>
         <div id="grid" class="grid-container"></div>
         <div class="controls">
             <button onclick="runPath()">Run Path</button>
+            <button onclick="planPath()">Plan &amp; Run</button>
             <button onclick="resetPath()">Reset</button>
+            <button onclick="fetch('/stop', {method: 'POST'})">Stop</button>
         </div>
         <div class="info">
             <p>Path: <span id="path-display"></span></p>
+            <p>Progress: <progress id="progress-bar" value="0" max="1"></progress> <span id="progress">Idle</span></p>
         </div>
 
         <script>
             let path = [];
             let gridCreated = false;
+            let start = null;
+            let goal = null;
+            let walls = new Set();
 
             function createGrid() {
                 const rows = document.getElementById('rows').value;
@@ -65,6 +86,9 @@ def get_web_page_html():
                 grid.innerHTML = '';
                 grid.style.gridTemplateColumns = `repeat(${cols}, 40px)`;
                 path = [];
+                start = null;
+                goal = null;
+                walls = new Set();
                 updatePathDisplay();
 
                 for (let r = 0; r < rows; r++) {
@@ -83,6 +107,18 @@ def get_web_page_html():
             function selectCell(r, c) {
                 if (!gridCreated) return;
                 const cellId = `${r},${c}`;
+                const tool = document.getElementById('tool').value;
+                if (tool !== 'path') {
+                    // Start, goal and walls are for the planner on the board
+                    if (tool === 'start') start = {r, c};
+                    else if (tool === 'goal') goal = {r, c};
+                    else if (walls.has(cellId)) walls.delete(cellId);
+                    else walls.add(cellId);
+                    path = [];
+                    updatePathDisplay();
+                    updateGridSelection();
+                    return;
+                }
                 const pathIndex = path.findIndex(p => p.r === r && p.c === c);
 
                 if (pathIndex > -1) { // If cell is already in path, remove it and subsequent cells
@@ -106,11 +142,14 @@ def get_web_page_html():
             
             function updateGridSelection() {
                 document.querySelectorAll('.grid-cell').forEach(cell => {
-                    cell.classList.remove('selected', 'start', 'end');
+                    cell.classList.remove('selected', 'start', 'end', 'wall');
                     const r = parseInt(cell.dataset.row);
                     const c = parseInt(cell.dataset.col);
                     const pathIndex = path.findIndex(p => p.r === r && p.c === c);
-                    if(pathIndex > -1) {
+                    if (walls.has(`${r},${c}`)) cell.classList.add('wall');
+                    if (start && start.r === r && start.c === c) cell.classList.add('start');
+                    else if (goal && goal.r === r && goal.c === c) cell.classList.add('end');
+                    else if(pathIndex > -1) {
                         if (pathIndex === 0) cell.classList.add('start');
                         else if (pathIndex === path.length - 1) cell.classList.add('end');
                         else cell.classList.add('selected');
@@ -124,6 +163,9 @@ def get_web_page_html():
 
             function resetPath() {
                 path = [];
+                start = null;
+                goal = null;
+                walls = new Set();
                 updatePathDisplay();
                 updateGridSelection();
             }
@@ -141,6 +183,39 @@ def get_web_page_html():
                 }).catch(err => console.error(err));
             }
 
+            function planPath() {
+                if (!start || !goal) {
+                    alert("Please set a start and a goal cell.");
+                    return;
+                }
+                // Only the grid, the end points and the walls go over; the board finds the route
+                const body = {
+                    rows: parseInt(document.getElementById('rows').value),
+                    cols: parseInt(document.getElementById('cols').value),
+                    start: [start.r, start.c],
+                    goal: [goal.r, goal.c],
+                    blocked: [...walls].map(w => w.split(',').map(Number))
+                };
+                fetch('/plan', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(body)
+                }).then(res => res.ok ? res.json() : res.text().then(t => { throw new Error(t); }))
+                  .then(result => {
+                    path = result.cells.map(([r, c]) => ({r, c}));
+                    updatePathDisplay();
+                    updateGridSelection();
+                }).catch(err => alert(err.message));
+            }
+
+            // The robot reports every finished step; the server relays it here
+            new EventSource('/events').addEventListener('progress', (e) => {
+                const [done, total, status] = e.data.split(' ');
+                document.getElementById('progress-bar').max = Math.max(1, total);
+                document.getElementById('progress-bar').value = done;
+                document.getElementById('progress').innerText = `${done} / ${total} steps ${status}`;
+            });
+
             // Create a default grid on load
             window.onload = createGrid;
         </script>
@@ -148,47 +223,7 @@ def get_web_page_html():
     </html>
     """
 
-# --- Path to Commands Logic ---
-def calculate_commands(path):
-    """Converts a list of coordinates into a sequence of robot commands (F, L, R)."""
-    if not path or len(path) < 2:
-        return []
-
-    commands = []
-    # Initial orientation: 0=North, 1=East, 2=South, 3=West
-    orientation = 0 
-
-    for i in range(len(path) - 1):
-        current_pos = path[i]
-        next_pos = path[i+1]
-
-        dr = next_pos['r'] - current_pos['r']
-        dc = next_pos['c'] - current_pos['c']
-
-        target_orientation = -1
-        if dr == -1 and dc == 0: target_orientation = 0 # North
-        elif dr == 0 and dc == 1: target_orientation = 1 # East
-        elif dr == 1 and dc == 0: target_orientation = 2 # South
-        elif dr == 0 and dc == -1: target_orientation = 3 # West
-
-        if target_orientation == -1: continue # Skip diagonal/invalid moves
-
-        # Calculate turns needed
-        turn = (target_orientation - orientation + 4) % 4
-        if turn == 1: # Turn right
-            commands.append('R')
-        elif turn == 2: # Turn 180 (Right, Right)
-            commands.append('R')
-            commands.append('R')
-        elif turn == 3: # Turn left
-            commands.append('L')
-        
-        orientation = target_orientation
-        commands.append('F') # Move forward
-
-    return commands
-
-# --- WiFi & Web Server Setup ---
+# --- WiFi Access Point Setup ---
 ap = network.WLAN(network.AP_IF)
 ap.active(True)
 ap.config(essid=WIFI_SSID, password=WIFI_PASSWORD)
@@ -201,45 +236,68 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("------------------------------------")
 
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
+# --- Web Server ---
+app = WebServer()
+# Rendered/loaded once; served gzipped with an ETag when build_static.py was run
+PAGE = load_page("path.html", get_web_page_html)
+
+STATUS_TEXT = {None: "running", ROUTE_DONE: "done", ROUTE_ABORTED: "stopped", ROUTE_ERROR: "link error"}
 
-print("Web server is listening...")
+def on_route_update(done, total, status):
+    """Relays the robot's progress reports to the page."""
+    events.publish("progress", f"{done} {total} {STATUS_TEXT.get(status, status)}")
 
-# --- Main Server Loop ---
-while True:
+route = RouteSender(link_tx, on_route_update)
+link_rx.on(link.CREDIT, route.on_credit)
+link_rx.on(link.PROGRESS, route.on_progress)
+link_rx.on(link.STATUS, route.on_status)
+events = EventStream().attach(app, "/events")
+
+# A path on a big grid is ~14 bytes per cell, so allow more than the default 4 KB
+@app.route("/run", methods=("POST",), max_body=16384)
+def run_path(req):
     try:
-        conn, addr = s.accept()
-        request = conn.recv(1024)
-        request_str = request.decode('utf-8')
-
-        if 'POST /run' in request_str:
-            content_length_start = request_str.find('Content-Length: ') + 16
-            content_length_end = request_str.find('\r\n', content_length_start)
-            content_length = int(request_str[content_length_start:content_length_end])
-            
-            body_start = request_str.find('\r\n\r\n') + 4
-            path_data = json.loads(request_str[body_start:body_start+content_length])
-            
-            print(f"Received path data: {path_data}")
-            commands = calculate_commands(path_data)
-            print(f"Calculated commands: {commands}")
-
-            for cmd in commands:
-                uart.write(cmd + '\n')
-                print(f"Sent: {cmd}")
-                time.sleep(1.2) # Wait for the robot to complete the move
-            
-            conn.send('HTTP/1.1 200 OK\n\n')
-        else:
-            # Serve the web page
-            conn.send('HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
-            conn.sendall(get_web_page_html())
-        
-        conn.close()
-    except Exception as e:
-        if 'conn' in locals(): conn.close()
-        print(f'Error: {e}')
\ No newline at end of file
+        path_data = req.json()
+        commands = path_commands(path_data)
+    except (KeyError, TypeError, ValueError) as e:
+        return (400, "text/plain", f"Bad path: {e}")
+    print(f"Received path data: {path_data}")
+    # Straight runs become one F(n) and turn pairs one T(angle)
+    program = motion_program(commands)
+    print(f"Calculated commands: {commands} -> program: {program}")
+    # Steps are sent in batches as the robot's queue frees up
+    route.start(program)
+    return (200, "text/plain", "OK")
+
+# Walls are sent as [r, c] pairs; the planner caps the grid at 32x32
+@app.route("/plan", methods=("POST",), max_body=16384)
+def plan_path(req):
+    try:
+        data = req.json()
+        planner = GridPlanner(data["rows"], data["cols"])
+        for r, c in data["blocked"]:
+            planner.block(r, c)
+        result = planner.plan(tuple(data["start"]), tuple(data["goal"]))
+    except (KeyError, TypeError, ValueError) as e:
+        return (400, "text/plain", f"Bad plan request: {e}")
+    if result is None:
+        return (422, "text/plain", "No route from start to goal")
+    cells, commands = result
+    program = motion_program(commands)
+    print(f"Planned {len(cells)} cells ({planner.expanded} states expanded) -> program: {program}")
+    route.start(program)
+    return (200, "application/json", json.dumps({"cells": cells, "program": program}))
+
+@app.route("/stop", methods=("POST",))
+def stop_path(req):
+    route.stop()
+    return (200, "text/plain", "OK")
+
+@app.route("/")
+def index(req):
+    # Serve the web page
+    return PAGE(req)
+
+app.add_task(link.pump_link(uart, link_rx))
+app.add_task(watch_sender(route))   # resends a lost PATH_BEGIN, gives up on a silent robot
+app.run()
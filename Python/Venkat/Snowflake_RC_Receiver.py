@@ -2,6 +2,7 @@
 import time
 from machine import Pin, PWM, UART
 import Subu
+from snowflake_hal import link
 
 # --- Hardware Abstraction Classes ---
 
@@ -73,6 +74,41 @@ led = LED()
 # Connect this board's RX pin (IO14) to the ESP32's TX pin (GPIO17).
 # Connect this board's TX pin (IO13) to the ESP32's RX pin (GPIO16).
 uart = UART(0, baudrate=115200, tx=Subu.IO1, rx=Subu.IO2)
+# Commands arrive as 6-byte CRC-checked frames (see snowflake_hal/link.py)
+link_rx = link.LinkDecoder()
+
+# --- Command Processing ---
+# One handler per frame type; a corrupted frame never reaches them.
+def on_forward(value):
+    led.set_all(0, 255, 0) # Green for forward
+    motor.forward()
+
+def on_backward(value):
+    led.set_all(255, 100, 0) # Orange for backward
+    motor.backward()
+
+def on_left(value):
+    led.set_all(0, 0, 255) # Blue for left
+    motor.turn_left()
+
+def on_right(value):
+    led.set_all(0, 0, 255) # Blue for right
+    motor.turn_right()
+
+def on_stop(value):
+    led.set_all(255, 0, 0)
+    motor.stop()
+
+def on_speed(value):
+    # Speed arrives in percent (e.g. 50 for 'V50')
+    motor.set_speed(value / 100.0)
+
+link_rx.on(link.FORWARD, on_forward)
+link_rx.on(link.BACKWARD, on_backward)
+link_rx.on(link.LEFT, on_left)
+link_rx.on(link.RIGHT, on_right)
+link_rx.on(link.STOP, on_stop)
+link_rx.on(link.SPEED, on_speed)
 
 # --- Main Program ---
 def main():
@@ -82,38 +118,12 @@ def main():
     led.off()
 
     while True:
-        if uart.any():
-            command_bytes = uart.readline()
-            if not command_bytes:
-                continue
-
-            command = command_bytes.decode('utf-8').strip()
-            print(f"Received: '{command}'")
-
-            # --- Command Processing ---
-            if command == 'F':
-                led.set_all(0, 255, 0) # Green for forward
-                motor.forward()
-            elif command == 'B':
-                led.set_all(255, 100, 0) # Orange for backward
-                motor.backward()
-            elif command == 'L':
-                led.set_all(0, 0, 255) # Blue for left
-                motor.turn_left()
-            elif command == 'R':
-                led.set_all(0, 0, 255) # Blue for right
-                motor.turn_right()
-            elif command == 'S':
-                led.set_all(255, 0, 0) 
-                motor.stop()
-            elif command.startswith('V'):
-                try:
-                    # Extract speed value (e.g., from 'V50')
-                    speed_percent = int(command[1:])
-                    speed_fraction = speed_percent / 100.0
-                    motor.set_speed(speed_fraction)
-                except (ValueError, IndexError):
-                    print("Invalid speed command received.")
+        link_rx.read_from(uart)
+        while link_rx.poll():
+            print(f"Received: '{chr(link_rx.msg_type)}' {link_rx.value}")
+            handler = link_rx.handlers[link_rx.msg_type]
+            if handler:
+                handler(link_rx.value)
         
         # A small delay to prevent the loop from running too fast
         time.sleep_ms(10)
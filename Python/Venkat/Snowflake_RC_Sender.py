@@ -1,9 +1,12 @@
 # c:\venkat\thonny\wifi_controller_esp32.py
 import network
-import socket
 import time
 from machine import UART
 import Cayo
+from snowflake_hal.web import WebServer
+from snowflake_hal.static import load_page
+from snowflake_hal.websocket import CommandChannel
+from snowflake_hal.link import LinkEncoder
 
 # --- Configuration ---
 WIFI_SSID = "Subu-Car-Control"
@@ -14,6 +17,8 @@ WIFI_PASSWORD = "password123"
 # Ensure the GND pins of both boards are connected.
 uart = UART(1, baudrate=115200, tx=Cayo.IO9, rx=Cayo.IO10) 
 print("UART configured on tx=Cayo.IO9, rx=Cayo.IO10.")
+# Commands travel as 6-byte CRC-checked frames (see snowflake_hal/link.py)
+link_tx = LinkEncoder(uart)
 
 # --- HTML & JavaScript for Web Interface ---
 def get_web_page_html():
@@ -52,9 +57,26 @@ def get_web_page_html():
             <input type="range" min="20" max="100" value="50" id="speedSlider">
         </div>
         <script>
+            // Commands go over one WebSocket as [seq, seq, op, arg, arg] so they
+            // arrive in order; plain fetch() is only used while it is reconnecting.
+            let ws = null;
+            let seq = 0;
+            function connectSocket() {
+                ws = new WebSocket('ws://' + location.host + '/ws');
+                ws.binaryType = 'arraybuffer';
+                ws.onclose = () => { ws = null; setTimeout(connectSocket, 1000); };
+            }
+            connectSocket();
+
             // Send a command to the ESP32 server
             function sendCommand(cmd) {
-                fetch('/?cmd=' + cmd).catch(err => console.error(err));
+                if (ws && ws.readyState === WebSocket.OPEN) {
+                    seq = (seq + 1) & 0xFFFF;
+                    const arg = cmd.length > 1 ? parseInt(cmd.slice(1)) : 0xFFFF;
+                    ws.send(new Uint8Array([seq >> 8, seq & 255, cmd.charCodeAt(0), arg >> 8, arg & 255]));
+                } else {
+                    fetch('/?cmd=' + cmd).catch(err => console.error(err));
+                }
             }
 
             // Add event listeners for all buttons
@@ -95,37 +117,30 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("-----------------------------")
 
-# --- Web Server Setup ---
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
-
-print("Web server is listening...")
+# --- Web Server ---
+app = WebServer()
+# Rendered/loaded once; served gzipped with an ETag when build_static.py was run
+PAGE = load_page("rc.html", get_web_page_html)
 
-# --- Main Server Loop ---
-while True:
+def send_to_robot(command):
+    """Forwards one text command (e.g. 'F', 'V50') to the robot as a link frame."""
     try:
-        conn, addr = s.accept()
-        request = conn.recv(1024)
-        
-        # Find the command in the HTTP GET request
-        request_str = request.decode('utf-8')
-        cmd_start = request_str.find('/?cmd=')
-        if cmd_start != -1:
-            cmd_end = request_str.find(' ', cmd_start)
-            command = request_str[cmd_start + 6:cmd_end]
-            print(f'Received command: {command}')
-            # Send the command over UART to the Subu board
-            uart.write(command + '\n')
+        link_tx.send_command(command)
+    except ValueError:
+        print(f"Ignored bad command: {command}")
+        return
+    print(f"Sent command: {command}")
+
+# Buttons use the WebSocket channel; /?cmd= stays for older pages and scripts
+channel = CommandChannel(send_to_robot).attach(app, "/ws")
+
+@app.route("/")
+def index(req):
+    command = req.query.get("cmd")
+    if command:
+        send_to_robot(command)
+        return (200, "text/plain", "OK") # Acknowledge command
+    # Serve the main HTML page
+    return PAGE(req)
 
-        # Serve the web page
-        conn.send('HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
-        conn.sendall(get_web_page_html())
-        conn.close()
-        
-    except OSError as e:
-        if 'conn' in locals():
-            conn.close()
-        print(f'Connection error: {e}')
+app.run()
@@ -2,6 +2,7 @@ import time
 from machine import Pin, PWM, UART # type: ignore
 import Subu # type: ignore 
 import random
+from snowflake_hal.maneuver import Maneuver
 
 # --- Configuration Constants ---
 FORWARD_SPEED = 0.3 # Reduced speed as requested
@@ -130,90 +131,81 @@ def scan_for_obstacle():
 def start_patrol():
     """Main function to perform a continuous surveillance patrol."""
     print("--- Starting 3x3 Grid Security Patrol ---")
-    TURN_90_DURATION = 0.55  # Calibrated time for a 90-degree turn
-    MOVE_CELL_DURATION = 1.5 # Time to move one cell
+    TURN_90_DURATION_MS = 550  # Calibrated time for a 90-degree turn
+    MOVE_CELL_DURATION_MS = 1500 # Time to move one cell
+    DECIDE_PAUSE_MS = 500 # Pause to show decision state
 
     # --- Robot State ---
-    robot_row = 0
-    robot_col = 0
-    robot_orientation = EAST  # Initially facing East
-    
-    # New variables to track robot status
-    # 'IDLE', 'MOVING', 'TURNING_R', 'TURNING_L'
-    robot_action = 'IDLE'
-    action_start_time = 0
-    action_duration = 0
+    pose = {"row": 0, "col": 0, "orientation": EAST}  # Initially facing East
+
+    # Moves and turns run as a Maneuver; the loop keeps scanning while they do
+    patrol = Maneuver(motor)
+
+    def start_moving():
+        led.set_all(0, 255, 0) # Green for moving
+        motor.forward()
+
+    def start_turning_right():
+        motor.turn_right()
+        pose["orientation"] = (pose["orientation"] + 1) % 4
+
+    def action_done(name):
+        motor.stop()
+        print(f"Action '{name}' complete.")
+        # Update position only if it was a move action
+        if name == 'MOVING':
+            orientation = pose["orientation"]
+            if orientation == NORTH: pose["row"] -= 1
+            elif orientation == EAST: pose["col"] += 1
+            elif orientation == SOUTH: pose["row"] += 1
+            elif orientation == WEST: pose["col"] -= 1
+            pose["row"] = max(0, min(pose["row"], GRID_ROWS - 1))
+            pose["col"] = max(0, min(pose["col"], GRID_COLS - 1))
+
+    def queue_turn_right():
+        patrol.add(start_turning_right, TURN_90_DURATION_MS, name='TURNING_R')
+        patrol.add(lambda: action_done('TURNING_R'), 0)
 
     while True:
         # Always scan for obstacles and send data
         obstacle_found = scan_for_obstacle()
 
         # If an obstacle is found while moving, stop and react
-        if obstacle_found and robot_action == 'MOVING':
-            motor.stop()
-            robot_action = 'IDLE'
+        if obstacle_found and patrol.step_name == 'MOVING':
+            patrol.abort()
             print("Obstacle detected while moving! Stopping and turning.")
-            time.sleep(0.5) # Pause
-            
-            # Start a non-blocking turn
             print("Starting a non-blocking turn right.")
-            motor.turn_right()
-            robot_action = 'TURNING_R'
-            action_start_time = time.ticks_ms()
-            action_duration = TURN_90_DURATION * 1000
-            robot_orientation = (robot_orientation + 1) % 4
-            continue
-
-        # --- Action Handler: Check if current action is complete ---
-        if robot_action != 'IDLE':
-            if time.ticks_diff(time.ticks_ms(), action_start_time) > action_duration:
-                motor.stop()
-                print(f"Action '{robot_action}' complete.")
-                
-                # Update position only if it was a move action
-                if robot_action == 'MOVING':
-                    if robot_orientation == NORTH: robot_row -= 1
-                    elif robot_orientation == EAST: robot_col += 1
-                    elif robot_orientation == SOUTH: robot_row += 1
-                    elif robot_orientation == WEST: robot_col -= 1
-                    robot_row = max(0, min(robot_row, GRID_ROWS - 1))
-                    robot_col = max(0, min(robot_col, GRID_COLS - 1))
-                
-                robot_action = 'IDLE' # Ready for a new decision
-
-        # --- Decision Maker: Only make a new decision if the robot is idle ---
-        if robot_action == 'IDLE':
-            pos_msg = f"Position: ({robot_row}, {robot_col}), Facing: {['N','E','S','W'][robot_orientation]}\n"
+            patrol.start().wait(500) # Pause
+            queue_turn_right()
+
+        # --- Action Handler: advance the current maneuver, if any ---
+        elif not patrol.update():
+            # --- Decision Maker: Only make a new decision if the robot is idle ---
+            row, col, orientation = pose["row"], pose["col"], pose["orientation"]
+            pos_msg = f"Position: ({row}, {col}), Facing: {['N','E','S','W'][orientation]}\n"
             print(f"\n{pos_msg.strip()}")
             uart.write(pos_msg)
             uart.write("STATUS:Deciding next move...\n")
             led.set_all(0, 0, 255) # Blue while deciding
-            time.sleep(0.5) # Pause to show decision state
+            patrol.start().wait(DECIDE_PAUSE_MS)
 
             # Check for grid boundaries
             boundary_ahead = False
-            if robot_orientation == NORTH and robot_row == 0: boundary_ahead = True
-            elif robot_orientation == EAST and robot_col == GRID_COLS - 1: boundary_ahead = True
-            elif robot_orientation == SOUTH and robot_row == GRID_ROWS - 1: boundary_ahead = True
-            elif robot_orientation == WEST and robot_col == 0: boundary_ahead = True # type: ignore
+            if orientation == NORTH and row == 0: boundary_ahead = True
+            elif orientation == EAST and col == GRID_COLS - 1: boundary_ahead = True
+            elif orientation == SOUTH and row == GRID_ROWS - 1: boundary_ahead = True
+            elif orientation == WEST and col == 0: boundary_ahead = True # type: ignore
 
             if boundary_ahead:
                 print("Boundary detected. Turning right.")
                 uart.write("STATUS:Boundary Detected\n")
-                motor.turn_right()
-                robot_action = 'TURNING_R'
-                action_start_time = time.ticks_ms()
-                action_duration = TURN_90_DURATION * 1000
-                robot_orientation = (robot_orientation + 1) % 4
+                queue_turn_right()
             else:
                 # Path is clear, start moving forward
                 print("Path clear. Moving forward one cell.")
                 uart.write("STATUS:Path is Clear\n")
-                led.set_all(0, 255, 0) # Green for moving
-                motor.forward()
-                robot_action = 'MOVING'
-                action_start_time = time.ticks_ms()
-                action_duration = MOVE_CELL_DURATION * 1000
+                patrol.add(start_moving, MOVE_CELL_DURATION_MS, name='MOVING')
+                patrol.add(lambda: action_done('MOVING'), 0)
 
         time.sleep_ms(50) 
 
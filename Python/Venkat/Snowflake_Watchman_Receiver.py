@@ -1,6 +1,8 @@
 import time
 from machine import Pin, PWM, UART, time_pulse_us
 import Subu
+from snowflake_hal.filters import RangeFilter, BurstMedian
+from snowflake_hal import link
 import urandom
 
 # --- Hardware Abstraction Classes ---
@@ -80,7 +82,24 @@ motor = Motor(
 )
 led = LED(num_leds=48)
 ultrasonic = Ultrasonic(trigger_pin=Subu.IO9, echo_pin=Subu.IO10)
+# Obstacle checks use a fresh median of 3 back-to-back pings: patrol readings are
+# seconds apart, and RangeFilter's spike rejection would hide a new obstacle for
+# several cycles. RangeFilter only smooths the distance shown in manual mode.
+obstacle_range = BurstMedian(ultrasonic.get_distance_cm)
+range_filter = RangeFilter()
 uart = UART(0, baudrate=115200, tx=Subu.IO1, rx=Subu.IO2)
+# Both directions use 6-byte CRC-checked frames (see snowflake_hal/link.py)
+link_tx = link.LinkEncoder(uart)
+link_rx = link.LinkDecoder()
+
+# Manual commands: frame type -> (motor action, LED colour)
+MANUAL_COMMANDS = {
+    link.FORWARD: (motor.forward, (0, 255, 0)),
+    link.BACKWARD: (motor.backward, (255, 100, 0)),
+    link.LEFT: (motor.turn_left, (0, 0, 255)),
+    link.RIGHT: (motor.turn_right, (0, 0, 255)),
+    link.STOP: (motor.stop, (255, 0, 0)),
+}
 
 print("Subu Watchman Receiver: Patrolling...")
 led.set_all(0, 0, 255)  # Blue light on startup
@@ -93,17 +112,16 @@ last_command_time = time.ticks_ms()
 while True:
     try:
         # --- Check for Manual Commands ---
-        if uart.any():
-            command = uart.readline().decode('utf-8').strip()
-            print(f"Received command: {command}")
+        link_rx.read_from(uart)
+        while link_rx.poll():
+            print(f"Received command: {chr(link_rx.msg_type)}")
             manual_override = True
             last_command_time = time.ticks_ms()
 
-            if command == 'F': motor.forward(); led.set_all(0, 255, 0)
-            elif command == 'B': motor.backward(); led.set_all(255, 100, 0)
-            elif command == 'L': motor.turn_left(); led.set_all(0, 0, 255)
-            elif command == 'R': motor.turn_right(); led.set_all(0, 0, 255)
-            elif command == 'S': motor.stop(); led.set_all(255, 0, 0)
+            entry = MANUAL_COMMANDS.get(link_rx.msg_type)
+            if entry:
+                action, color = entry
+                action(); led.set_all(*color)
         
         # If no manual command received for 2 seconds, return to auto mode
         if manual_override and time.ticks_diff(time.ticks_ms(), last_command_time) > 2000:
@@ -113,9 +131,9 @@ while True:
 
         # --- Automatic Patrol Mode ---
         if not manual_override:
-            distance = ultrasonic.get_distance_cm()
+            distance = obstacle_range.update()
             if distance != -1:
-                uart.write(f"{distance:.1f}\n") # Send distance to sender/web
+                link_tx.send_distance(distance) # Send distance to sender/web
 
             # --- Obstacle Avoidance ---
             if 0 < distance < OBSTACLE_THRESHOLD_CM:
@@ -140,8 +158,8 @@ while True:
                 time.sleep(0.5)
         else:
             # In manual mode, just send distance periodically
-            distance = ultrasonic.get_distance_cm()
-            if distance != -1: uart.write(f"{distance:.1f}\n")
+            distance = range_filter.update(ultrasonic.get_distance_cm())
+            if distance != -1: link_tx.send_distance(distance)
             time.sleep_ms(100)
 
     except Exception as e:
@@ -1,9 +1,12 @@
 import network
-import socket
-import select
 import time
 from machine import UART
 import Cayo
+from snowflake_hal.web import WebServer
+from snowflake_hal.static import load_page
+from snowflake_hal.websocket import CommandChannel
+from snowflake_hal.sse import EventStream
+from snowflake_hal import link
 
 latest_distance = "-1.0" # Global variable to store the latest distance
 
@@ -16,6 +19,9 @@ WIFI_PASSWORD = "password123"
 # and ESP32's RX (Cayo.IO10) to Subu's TX (IO1).
 uart = UART(1, baudrate=115200, tx=Cayo.IO9, rx=Cayo.IO10, timeout=10) 
 print("UART configured on tx=Cayo.IO9, rx=Cayo.IO10.")
+# Both directions use 6-byte CRC-checked frames (see snowflake_hal/link.py)
+link_tx = link.LinkEncoder(uart)
+link_rx = link.LinkDecoder()
 
 # --- HTML, CSS & JavaScript for Web Interface ---
 def get_web_page_html():
@@ -135,8 +141,26 @@ def get_web_page_html():
             }
 
             // --- Manual Control Functions ---
+            // Commands go over one WebSocket as [seq, seq, op, arg, arg] so they
+            // arrive in order; plain fetch() is only used while it is reconnecting.
+            let ws = null;
+            let seq = 0;
+            function connectSocket() {
+                ws = new WebSocket('ws://' + location.host + '/ws');
+                ws.binaryType = 'arraybuffer';
+                ws.onclose = () => { ws = null; setTimeout(connectSocket, 1000); };
+            }
+            connectSocket();
+
+            // Send a command to the ESP32 server
             function sendCommand(cmd) {
-                fetch('/?cmd=' + cmd).catch(err => console.error('Error:', err));
+                if (ws && ws.readyState === WebSocket.OPEN) {
+                    seq = (seq + 1) & 0xFFFF;
+                    const arg = cmd.length > 1 ? parseInt(cmd.slice(1)) : 0xFFFF;
+                    ws.send(new Uint8Array([seq >> 8, seq & 255, cmd.charCodeAt(0), arg >> 8, arg & 255]));
+                } else {
+                    fetch('/?cmd=' + cmd).catch(err => console.error(err));
+                }
             }
 
             const control_buttons = {
@@ -157,16 +181,14 @@ def get_web_page_html():
             document.getElementById('stop').addEventListener('click', () => sendCommand('S'));
             // --- End Manual Control ---
 
-            // Fetch and update the distance display continuously
-            setInterval(function() {
-                fetch('/distance')
-                    .then(response => response.text())
-                    .then(data => {
-                        obstacleDist = parseFloat(data);
-                        document.getElementById('dist_val').innerText = (obstacleDist >= 0) ? obstacleDist.toFixed(1) : "N/A";
-                    })
-                    .catch(error => console.error('Error fetching distance:', error));
-            }, 200);
+            // Distance (and status/position) updates are pushed by the server
+            function onTelemetry(data) {
+                obstacleDist = parseFloat(data);
+                document.getElementById('dist_val').innerText = (obstacleDist >= 0) ? obstacleDist.toFixed(1) : "N/A";
+            }
+            const events = new EventSource('/events');
+            events.addEventListener('distance', (e) => onTelemetry(e.data));
+            events.addEventListener('status', (e) => console.log('Robot:', e.data));
 
             window.addEventListener('resize', resizeCanvas);
             resizeCanvas();
@@ -189,47 +211,46 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("-----------------------------")
 
-# --- Web Server Setup ---
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
+# --- Web Server ---
+app = WebServer()
+# Rendered/loaded once; served gzipped with an ETag when build_static.py was run
+PAGE = load_page("watchman.html", get_web_page_html)
+
+def on_distance(value):
+    """Pushes the receiver's distance (mm, -1 = no echo) to the open pages."""
+    global latest_distance
+    latest_distance = "-1.0" if value < 0 else f"{value / 10:.1f}"
+    events.publish("distance", latest_distance)
 
-print("Web server is listening...")
+link_rx.on(link.DISTANCE, on_distance)
 
-# --- Main Server Loop ---
-while True:
+@app.route("/distance")
+def distance(req):
+    return (200, "text/plain", latest_distance)
+
+def send_to_robot(command):
+    """Forwards one text command (e.g. 'F', 'V50') to the robot as a link frame."""
     try:
-        # Check for incoming UART data first (non-blocking)
-        if uart.any():
-            line = uart.readline()
-            if line:
-                latest_distance = line.decode('utf-8').strip()
-
-        # Wait for a web connection, with a short timeout
-        r, _, _ = select.select([s], [], [], 0.05)
-
-        if r:
-            conn, addr = s.accept()
-            request = conn.recv(1024).decode('utf-8')
-
-            if 'GET /distance' in request:
-                conn.send('HTTP/1.1 200 OK\nContent-Type: text/plain\n\n')
-                conn.send(latest_distance)
-            elif 'GET /?cmd=' in request:
-                # Handle robot control commands
-                cmd_start = request.find('/?cmd=') + 6
-                cmd_end = request.find(' ', cmd_start)
-                command = request[cmd_start:cmd_end]
-                uart.write(command + '\n') # Send command to receiver
-                print(f"Sent command: {command}")
-                conn.send('HTTP/1.1 200 OK\n\n') # Acknowledge command
-            else:
-                conn.send('HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
-                conn.sendall(get_web_page_html())
-            
-            conn.close()
-    except Exception as e:
-        print(f'An error occurred: {e}')
-        time.sleep(1)
\ No newline at end of file
+        link_tx.send_command(command)
+    except ValueError:
+        print(f"Ignored bad command: {command}")
+        return
+    print(f"Sent command: {command}")
+
+# Buttons use the WebSocket channel; /?cmd= stays for older pages and scripts
+channel = CommandChannel(send_to_robot).attach(app, "/ws")
+# Telemetry stream; several UART lines in one 100 ms tick collapse into the newest
+events = EventStream(min_interval_ms=100).attach(app, "/events")
+
+@app.route("/")
+def index(req):
+    command = req.query.get("cmd")
+    if command:
+        send_to_robot(command)
+        return (200, "text/plain", "OK") # Acknowledge command
+    # Serve the main HTML page
+    return PAGE(req)
+
+# The link pump runs as its own task, next to the connection handlers
+app.add_task(link.pump_link(uart, link_rx))
+app.run()
@@ -1,6 +1,7 @@
 import time
 from machine import Pin, PWM, UART, time_pulse_us
 import Subu
+from snowflake_hal.filters import RangeFilter, OutlierFilter, MedianFilter
 
 # --- Hardware Abstraction Classes ---
 class Ultrasonic:
@@ -87,6 +88,8 @@ led = LED()
 
 # IMPORTANT: Connect the ultrasonic sensor to these pins on the receiver board
 ultrasonic = Ultrasonic(trigger_pin=Subu.IO9, echo_pin=Subu.IO10)
+# Drops spikes, takes a median of 3 and bridges short dropouts with the last good value
+range_filter = RangeFilter((OutlierFilter(max_jump=40), MedianFilter(3)), hold_ms=300)
 
 # Configure UART to send commands to the other ESP32.
 # Connect this board's TX pin (IO1) to the web server ESP32's RX pin (Cayo.IO10).
@@ -113,9 +116,10 @@ def move_to_distance(target_distance_cm):
     MAX_SPEED = 0.8  # Maximum speed
     TOLERANCE = 1.0  # How close is "close enough" (in cm)
 
+    range_filter.reset()
     while True:
-        current_distance = ultrasonic.get_distance_cm()
-        if current_distance < 0: # Invalid reading
+        current_distance = range_filter.update(ultrasonic.get_distance_cm())
+        if current_distance < 0: # No good reading for range_filter.hold_ms
             print("Invalid sensor reading, stopping.")
             motor.stop()
             led.set_all(255, 0, 0) # Red for error
@@ -1,10 +1,12 @@
 # c:\venkat\thonny\wifi_controller_esp32.py
 import network
-import socket
-import select
 import time
 from machine import UART
 import Cayo
+from snowflake_hal.web import WebServer, pump_uart
+from snowflake_hal.static import load_page
+from snowflake_hal.websocket import CommandChannel
+from snowflake_hal.sse import EventStream
 
 latest_distance = "-1.0" # Global variable to store the latest distance
 
@@ -101,9 +103,26 @@ def get_web_page_html():
                 evt.currentTarget.className += " active";
             }
 
+            // Commands go over one WebSocket as [seq, seq, op, arg, arg] so they
+            // arrive in order; plain fetch() is only used while it is reconnecting.
+            let ws = null;
+            let seq = 0;
+            function connectSocket() {
+                ws = new WebSocket('ws://' + location.host + '/ws');
+                ws.binaryType = 'arraybuffer';
+                ws.onclose = () => { ws = null; setTimeout(connectSocket, 1000); };
+            }
+            connectSocket();
+
             // Send a command to the ESP32 server
             function sendCommand(cmd) {
-                fetch('/?cmd=' + cmd).catch(err => console.error(err));
+                if (ws && ws.readyState === WebSocket.OPEN) {
+                    seq = (seq + 1) & 0xFFFF;
+                    const arg = cmd.length > 1 ? parseInt(cmd.slice(1)) : 0xFFFF;
+                    ws.send(new Uint8Array([seq >> 8, seq & 255, cmd.charCodeAt(0), arg >> 8, arg & 255]));
+                } else {
+                    fetch('/?cmd=' + cmd).catch(err => console.error(err));
+                }
             }
 
             function autoMove() {
@@ -136,15 +155,13 @@ def get_web_page_html():
                 sendCommand('V' + e.target.value);
             });
 
-            // Fetch and update the distance display continuously
-            setInterval(function() {
-                fetch('/distance')
-                    .then(response => response.text())
-                    .then(data => {
-                        document.getElementById('distance').innerText = data;
-                    })
-                    .catch(error => console.error('Error fetching distance:', error));
-            }, 1000);
+            // Distance (and status/position) updates are pushed by the server
+            function onTelemetry(data) {
+                document.getElementById('distance').innerText = data;
+            }
+            const events = new EventSource('/events');
+            events.addEventListener('distance', (e) => onTelemetry(e.data));
+            events.addEventListener('status', (e) => console.log('Robot:', e.data));
         </script>
     </body>
     </html>
@@ -163,56 +180,42 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("-----------------------------")
 
-# --- Web Server Setup ---
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
-
-print("Web server is listening...")
-
-# Create a list of readable streams
-readable_streams = [s]
-
-# --- Main Server Loop ---
-while True:
-    try:
-        # Check for incoming UART data first (non-blocking)
-        if uart.any():
-            line = uart.readline()
-            if line:
-                latest_distance = line.decode('utf-8').strip()
-                print(f"UART updated distance: {latest_distance}")
-
-        # Wait for a connection on the socket, with a short timeout
-        readable, _, _ = select.select(readable_streams, [], [], 0.1)
-
-        if s in readable:
-            conn, addr = s.accept()
-            request = conn.recv(1024)
-            request_str = request.decode('utf-8')
-
-            # Check for different request paths
-            if 'GET /distance' in request_str:
-                # Handle the request for sensor data
-                conn.send('HTTP/1.1 200 OK\nContent-Type: text/plain\n\n')
-                conn.send(latest_distance)
-            elif 'GET /?cmd=' in request_str:
-                # Handle robot control commands
-                cmd_start = request_str.find('/?cmd=') + 6
-                cmd_end = request_str.find(' ', cmd_start)
-                command = request_str[cmd_start:cmd_end]
-                print(f'Received command: {command}')
-                uart.write(command + '\n')
-                # Respond to the command request
-                conn.send('HTTP/1.1 200 OK\n\n')
-            else:
-                # Serve the main HTML page
-                conn.send('HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
-                conn.sendall(get_web_page_html())
-            
-            conn.close()
-    except Exception as e:
-        print(f'An error occurred: {e}')
-        time.sleep(1)
+# --- Web Server ---
+app = WebServer()
+# Rendered/loaded once; served gzipped with an ETag when build_static.py was run
+PAGE = load_page("measure.html", get_web_page_html)
+
+def on_uart_line(line):
+    """Pushes the receiver's report to the open pages and keeps the latest distance."""
+    global latest_distance
+    update = events.publish_line(line)
+    if update and update[0] == "distance":
+        latest_distance = update[1]
+    print(f"UART updated distance: {latest_distance}")
+
+@app.route("/distance")
+def distance(req):
+    return (200, "text/plain", latest_distance)
+
+def send_to_robot(command):
+    """Forwards one text command (e.g. 'F', 'V50') to the robot over UART."""
+    uart.write(command + '\n')
+    print(f"Sent command: {command}")
+
+# Buttons use the WebSocket channel; /?cmd= stays for older pages and scripts
+channel = CommandChannel(send_to_robot).attach(app, "/ws")
+# Telemetry stream; several UART lines in one 100 ms tick collapse into the newest
+events = EventStream(min_interval_ms=100).attach(app, "/events")
+
+@app.route("/")
+def index(req):
+    command = req.query.get("cmd")
+    if command:
+        send_to_robot(command)
+        return (200, "text/plain", "OK") # Acknowledge command
+    # Serve the main HTML page
+    return PAGE(req)
+
+# The UART pump runs as its own task, next to the connection handlers
+app.add_task(pump_uart(uart, on_uart_line))
+app.run()
@@ -1,135 +1,10 @@
 import time
-from machine import Pin, PWM,time_pulse_us # type: ignore
 import Subu # type: ignore
-
-# --- Icon Definitions ---
-ARROW_FORWARD = [0b00011000, 0b00111100, 0b01111110, 0b00011000, 0b00011000, 0b00011000]
-ARROW_BACKWARD = [0b00011000, 0b00011000, 0b00011000, 0b01111110, 0b00111100, 0b00011000]
-ARROW_LEFT = [0b00011000, 0b00111000, 0b11111111, 0b11111111, 0b00111000, 0b00011000]
-ARROW_RIGHT = [0b00011000, 0b00011100, 0b11111111, 0b11111111, 0b00011100, 0b00011000]
-ICON_STOP = [0b00111100, 0b01100010, 0b10010001, 0b10001001, 0b01000110, 0b00111100]
-
-class Motor:
-    def __init__(self, a1_pin, a2_pin, b1_pin, b2_pin, speed, Turn, led_ctrl=None):
-        """Initializes the motor driver pins using PWM for speed control."""
-        # Initialize pins as PWM objects
-        self.motor_a1 = PWM(Pin(a1_pin))
-        self.motor_a2 = PWM(Pin(a2_pin))
-        self.motor_b1 = PWM(Pin(b1_pin))
-        self.motor_b2 = PWM(Pin(b2_pin))
-        self.led_ctrl = led_ctrl
-
-        # Set a common frequency for all motor PWM pins
-        freq = 1000
-        self.motor_a1.freq(freq)
-        self.motor_a2.freq(freq)
-        self.motor_b1.freq(freq)
-        self.motor_b2.freq(freq)
-
-        # Set the speed (duty cycle)
-        self.set_speed(speed, Turn)
-
-        self.stop()
-
-    def set_speed(self, speed, Turn):
-        """Sets motor speed. speed is a value between 0.0 and 1.0."""
-        speed = max(0.0, min(1.0, speed)) # Clamp speed between 0 and 1
-        self.duty_cycle = int(speed * 65535)
-        
-        # Set a separate, max-speed duty cycle for turning
-        self.turn_duty_cycle = int(Turn * 65535)
-
-    def forward(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_FORWARD, (0, 255, 0))
-        self.motor_a1.duty_u16(self.duty_cycle)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(self.duty_cycle)
-        self.motor_b2.duty_u16(0)
-
-    def backward(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_BACKWARD, (255, 0, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(self.duty_cycle)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(self.duty_cycle)
-
-    def turn_left(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_LEFT, (255, 255, 0))
-        self.motor_a1.duty_u16(self.turn_duty_cycle)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(self.turn_duty_cycle)
-
-    def turn_right(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_RIGHT, (255, 255, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(self.turn_duty_cycle)
-        self.motor_b1.duty_u16(self.turn_duty_cycle)
-        self.motor_b2.duty_u16(0)
-
-    def stop(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ICON_STOP, (255, 0, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(0)
-
-class IRSensor:
-    def __init__(self, left_pin, right_pin):
-        """Initializes the IR sensor pins."""
-        self.left_ir_pin = Pin(left_pin, Pin.IN)
-        self.right_ir_pin = Pin(right_pin, Pin.IN)
-
-    def read_line(self):
-        """
-        Reads the state of the left and right IR sensors.
-        Returns a tuple (left_value, right_value).
-        Typically, 0 means a black line is detected, and 1 means a white surface.
-        """
-        return (self.left_ir_pin.value(), self.right_ir_pin.value())
-    
-    
-class Ultrasonic:
-    """Measures distance using an HC-SR04 ultrasonic sensor."""
-    def __init__(self, trigger_pin, echo_pin):
-        self.trigger = Pin(trigger_pin, Pin.OUT)
-        self.echo = Pin(echo_pin, Pin.IN)
-
-    def get_distance_cm(self):
-        self.trigger.value(0); time.sleep_us(2)
-        self.trigger.value(1); time.sleep_us(10)
-        self.trigger.value(0)
-        try:
-            pulse_duration = time_pulse_us(self.echo, 1, 30000) # 30ms timeout
-            return (pulse_duration * 0.0343) / 2
-        except OSError:
-            return -1
-
-
-class LED:
-    def __init__(self, num_leds):
-        """Initializes the LED strip."""
-        self.NUM_LEDS = num_leds
-
-    def set_all(self, r, g, b):
-        """Sets all LEDs to the same color."""
-        for i in range(1, self.NUM_LEDS + 1):
-            Subu.setSingleLED(i, (r, g, b))
-
-    def off(self):
-        """Turns all LEDs off."""
-        self.set_all(0, 0, 0)
-
-    def display_icon(self, icon_data, color):
-        """Displays a 6-row bitmap on the Subu LED matrix."""
-        self.off()
-        idx = 1
-        for row in icon_data:
-            for bit in range(8):
-                if (row >> (7 - bit)) & 1:
-                    if idx <= self.NUM_LEDS:
-                        Subu.setSingleLED(idx, color)
-                idx += 1
+from snowflake_hal.motor import Motor
+from snowflake_hal.ir import IRSensor
+from snowflake_hal.ranger import Ranger
+from snowflake_hal.led import LED
+from snowflake_hal.scheduler import Scheduler
 
 # --- Hardware Initialization ---
 
@@ -150,68 +25,80 @@ Trig = Subu.IO2
 Echo = Subu.IO3
 
 OBSTACLE_DISTANCE_CM = 20
+CONTROL_PERIOD_MS = 5   # 200 Hz sense/decide loop
 
-led = LED(num_leds)
-motor = Motor(In1, In2, In3, In4, speed, Turn, led)
+led = LED(num_leds, Subu)
+motor = Motor(In1, In2, In3, In4, speed, Turn, led, swap_turns=True)
 ir_sensor = IRSensor(left_pin, right_pin)
 
 led.off()
-ultrasonic = Ultrasonic(Trig, Echo)
+ultrasonic = Ranger(Trig, Echo)  # pings in the background, never blocks the loop
    
 print("Line Following Robot - Starting...")
 
-# --- Main Program Loop ---
+# --- Control Tasks ---
+state = {"distance": -1, "left": 0, "right": 0, "action": "Stop"}
+
+def sense():
+    ultrasonic.update()
+    state["distance"] = ultrasonic.get_distance_cm()
+    state["left"], state["right"] = ir_sensor.read_line() # type: ignore
+
+def decide():
+    distance = state["distance"]
+    left_val, right_val = state["left"], state["right"]
+
+    if distance != -1 and distance > OBSTACLE_DISTANCE_CM:
+        # --- Line Following Logic ---
+
+        # Case 1: Both sensors on white surface -> Move forward
+        if left_val == 0 and right_val == 0:
+            state["action"] = "Forward"
+            motor.forward()
+
+        # Case 2: Right sensor on black line -> Turn left (held until the sensors change)
+        elif left_val == 0 and right_val == 1:
+            state["action"] = "Turn Left"
+            motor.turn_left()
+
+        # Case 3: Left sensor on black line -> Turn right
+        elif left_val == 1 and right_val == 0:
+            state["action"] = "Turn Right"
+            motor.turn_right()
+
+        # Case 4: Both sensors on black line (e.g., intersection or end) -> Stop
+        else:
+            state["action"] = "Line end or intersection. Stopping."
+            motor.stop()
+    else:
+        state["action"] = "No obstacle detected. Stopping."
+        motor.stop()
+
+def telemetry():
+    distance = state["distance"]
+    if distance != -1:
+        print(f"Distance: {distance:.1f} cm")
+    else:
+        print("Distance: Timeout")
+    print(f"Sensor values: Left={state['left']}, Right={state['right']} -> {state['action']}")
+
+scheduler = Scheduler()
+scheduler.add("sense", sense, CONTROL_PERIOD_MS, priority=3)
+scheduler.add("decide", decide, CONTROL_PERIOD_MS, priority=2)
+scheduler.add("telemetry", telemetry, 200)
+scheduler.add("timing", scheduler.report, 5000, delay_ms=5000)
+
+# --- Main Program ---
 try:
     
     for i in range(1, led.NUM_LEDS + 1):
-        Subu.setSingleLED(i, (0, 0, 255))  # Blue
+        led.set_pixel(i, (0, 0, 255))  # Blue
+        led.show()
         time.sleep_ms(50)
     time.sleep_ms(500)
     led.off()
 
-    while True:
-        distance = ultrasonic.get_distance_cm()
-        # Print the measured distance
-        if distance != -1:
-            print(f"Distance: {distance:.1f} cm")
-        else:
-            print("Distance: Timeout")
-
-        if distance != -1 and distance > OBSTACLE_DISTANCE_CM:
-        
-            left_val, right_val = ir_sensor.read_line() # type: ignore
-            
-            print(f"Sensor values: Left={left_val}, Right={right_val}")
-
-            # --- Line Following Logic ---
-
-            # Case 1: Both sensors on white surface -> Move forward
-            if left_val == 0 and right_val == 0:
-                print("Forward") # Green # type: ignore
-                motor.forward()
-
-            # Case 2: Right sensor on black line -> Turn right
-            elif left_val == 0 and right_val == 1:
-                print("Turn Left") # Yellow # type: ignore
-                motor.turn_left()
-                time.sleep_ms(50)
-            
-            # Case 3: Left sensor on black line -> Turn left
-            elif left_val == 1 and right_val == 0:
-                print("Turn Right") # Yellow # type: ignore
-                motor.turn_right()
-                time.sleep_ms(50)
-
-            # Case 4: Both sensors on black line (e.g., intersection or end) -> Stop
-            elif left_val == 1 and right_val == 1:
-                print("Line end or intersection. Stopping.")
-                motor.stop()
-        else:
-            print("No obstacle detected. Stopping.")
-            led.off() # type: ignore
-            motor.stop()
-
-        time.sleep_ms(10)
+    scheduler.run()
 
 except KeyboardInterrupt:
     print("Program stopped by user.")
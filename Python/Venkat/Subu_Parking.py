@@ -1,117 +1,9 @@
 import time
-from machine import Pin, PWM # type: ignore
 import Subu # type: ignore
-
-# --- Icon Definitions ---
-ARROW_FORWARD = [0b00011000, 0b00111100, 0b01111110, 0b00011000, 0b00011000, 0b00011000]
-ARROW_BACKWARD = [0b00011000, 0b00011000, 0b00011000, 0b01111110, 0b00111100, 0b00011000]
-ARROW_LEFT = [0b00011000, 0b00111000, 0b11111111, 0b11111111, 0b00111000, 0b00011000]
-ARROW_RIGHT = [0b00011000, 0b00011100, 0b11111111, 0b11111111, 0b00011100, 0b00011000]
-ICON_STOP = [0b00111100, 0b01100010, 0b10010001, 0b10001001, 0b01000110, 0b00111100]
-
-class Motor:
-    def __init__(self, a1_pin, a2_pin, b1_pin, b2_pin, speed, Turn, led_ctrl=None):
-        """Initializes the motor driver pins using PWM for speed control."""
-        # Initialize pins as PWM objects
-        self.motor_a1 = PWM(Pin(a1_pin))
-        self.motor_a2 = PWM(Pin(a2_pin))
-        self.motor_b1 = PWM(Pin(b1_pin))
-        self.motor_b2 = PWM(Pin(b2_pin))
-        self.led_ctrl = led_ctrl
-
-        # Set a common frequency for all motor PWM pins
-        freq = 1000
-        self.motor_a1.freq(freq)
-        self.motor_a2.freq(freq)
-        self.motor_b1.freq(freq)
-        self.motor_b2.freq(freq)
-
-        # Set the speed (duty cycle)
-        self.set_speed(speed, Turn)
-
-        self.stop()
-
-    def set_speed(self, speed, Turn):
-        """Sets motor speed. speed is a value between 0.0 and 1.0."""
-        speed = max(0.0, min(1.0, speed)) # Clamp speed between 0 and 1
-        self.duty_cycle = int(speed * 65535)
-        
-        # Set a separate, max-speed duty cycle for turning
-        self.turn_duty_cycle = int(Turn * 65535)
-
-    def forward(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_FORWARD, (0, 255, 0))
-        self.motor_a1.duty_u16(self.duty_cycle)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(self.duty_cycle)
-        self.motor_b2.duty_u16(0)
-
-    def backward(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_BACKWARD, (255, 0, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(self.duty_cycle)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(self.duty_cycle)
-
-    def turn_left(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_LEFT, (255, 255, 0))
-        self.motor_a1.duty_u16(self.turn_duty_cycle)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(self.turn_duty_cycle)
-
-    def turn_right(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ARROW_RIGHT, (255, 255, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(self.turn_duty_cycle)
-        self.motor_b1.duty_u16(self.turn_duty_cycle)
-        self.motor_b2.duty_u16(0)
-
-    def stop(self):
-        if self.led_ctrl: self.led_ctrl.display_icon(ICON_STOP, (255, 0, 0))
-        self.motor_a1.duty_u16(0)
-        self.motor_a2.duty_u16(0)
-        self.motor_b1.duty_u16(0)
-        self.motor_b2.duty_u16(0)
-
-class IRSensor:
-    def __init__(self, left_pin, right_pin):
-        """Initializes the IR sensor pins."""
-        self.left_ir_pin = Pin(left_pin, Pin.IN)
-        self.right_ir_pin = Pin(right_pin, Pin.IN)
-
-    def read_line(self):
-        """
-        Reads the state of the left and right IR sensors.
-        Returns a tuple (left_value, right_value).
-        Typically, 0 means a black line is detected, and 1 means a white surface.
-        """
-        return (self.left_ir_pin.value(), self.right_ir_pin.value())
-
-class LED:
-    def __init__(self, num_leds):
-        """Initializes the LED strip."""
-        self.NUM_LEDS = num_leds
-
-    def set_all(self, r, g, b):
-        """Sets all LEDs to the same color."""
-        for i in range(1, self.NUM_LEDS + 1):
-            Subu.setSingleLED(i, (r, g, b))
-
-    def off(self):
-        """Turns all LEDs off."""
-        self.set_all(0, 0, 0)
-
-    def display_icon(self, icon_data, color):
-        """Displays a 6-row bitmap on the Subu LED matrix."""
-        self.off()
-        idx = 1
-        for row in icon_data:
-            for bit in range(8):
-                if (row >> (7 - bit)) & 1:
-                    if idx <= self.NUM_LEDS:
-                        Subu.setSingleLED(idx, color)
-                idx += 1
+from snowflake_hal.motor import Motor
+from snowflake_hal.ir import IRSensor
+from snowflake_hal.led import LED
+from snowflake_hal.maneuver import Maneuver
 
 # --- Hardware Initialization ---
 
@@ -129,20 +21,68 @@ right_pin = Subu.IO4
 num_leds = 48
 
 
-led = LED(num_leds)
-motor = Motor(In1, In2, In3, In4, speed, Turn, led)
+led = LED(num_leds, Subu)
+motor = Motor(In1, In2, In3, In4, speed, Turn, led, swap_turns=True)
+parking = Maneuver(motor)
 ir_sensor = IRSensor(left_pin, right_pin)
 
 led.off()
    
 print("Line Following Robot - Starting...")
 
+# --- Parking Sequence ---
+# Runs as a Maneuver, so the IR sensors keep being read while the robot moves.
+parking_state = {"count": 0, "parked": False}
+
+def say(msg):
+    return lambda: print(msg)
+
+def check_intersection():
+    l, r = ir_sensor.read_line()
+    if l == 1 and r == 1:
+        parking_state["count"] += 1
+
+def finish_parking():
+    if parking_state["count"] == 3:
+        l, r = ir_sensor.read_line()
+        if l == 1 and r == 1:
+            # Step 5: Parked
+            print("PARKED!")
+            motor.stop()
+            parking_state["parked"] = True
+            # if you want the car to move on when the way is free, clear "parked" here instead
+        else:
+            parking.wait(1000)
+
+def start_parking():
+    parking_state["count"] = 0
+    print("Initial intersection detected. Starting parking sequence.")
+    parking.start()
+    parking.add("stop", 1000)
+
+    # Step 1: Move forward to find the next intersection
+    parking.add(say("Step 1: Moving forward to find the next intersection..."), 0)
+    parking.add("forward", 750).add("stop", 1000).add(check_intersection, 0)
+
+    # Step 2: Turn Right and find the next intersection
+    parking.add(say("Step 2: Turning right..."), 0)
+    parking.add("turn_right", 200).add("stop", 1000).add(check_intersection, 0)
+
+    # Step 3: Turn Left (1st time) and find the next intersection
+    parking.add(say("Step 3: Turning left (1/2)..."), 0)
+    parking.add("turn_left", 400).add("stop", 1000).add(check_intersection, 0) # Adjust for a 90-degree turn
+
+    parking.add(say("Step 4: Final turn right."), 0)
+    parking.add("turn_right", 200) # Adjust for a 90-degree turn
+    parking.add(finish_parking, 0)
+
 # --- Main Program Loop ---
 
 try:
     
     for i in range(1, led.NUM_LEDS + 1):
-        Subu.setSingleLED(i, (0, 0, 255))  # Blue
+        led.set_pixel(i, (0, 0, 255))  # Blue
+        led.show()
         time.sleep_ms(50)
     time.sleep_ms(1000)
     led.off()
@@ -150,83 +90,37 @@ try:
     while True:
         # Read sensor values. Assuming 0 = Black Line, 1 = White Surface
         left_val, right_val = ir_sensor.read_line()
+        maneuvering = parking.update()
 
-        print(f"Sensor values: Left={left_val}, Right={right_val}")
+        if parking_state["parked"]:
+            motor.stop()
 
-        # --- Line Following Logic ---
+        elif maneuvering:
+            pass # Parking sequence in progress, keep sensing
 
-        # Case 1: Both sensors on white surface -> Move forward
-        if left_val == 0 and right_val == 0:
-            print("Forward")  # Green
-            motor.forward()
+        else:
+            print(f"Sensor values: Left={left_val}, Right={right_val}")
 
-        # Case 2: Left sensor on black line -> Turn left
-        elif left_val == 1 and right_val == 0:
-            print("Turn Left") # Yellow
-            motor.turn_left()
+            # --- Line Following Logic ---
 
-        # Case 3: Right sensor on black line -> Turn right
-        elif left_val == 0 and right_val == 1:
-            print("Turn Right")  # Yellow
-            motor.turn_right()
+            # Case 1: Both sensors on white surface -> Move forward
+            if left_val == 0 and right_val == 0:
+                print("Forward")  # Green
+                motor.forward()
 
-        # Case 4: Both sensors on black line -> Initiate Sequential Parking Maneuver
-        elif left_val == 1 and right_val == 1:
-            count = 0
-            print("Initial intersection detected. Starting parking sequence.")
-            motor.stop()# Cyan to indicate parking mode
-            time.sleep_ms(1000)
+            # Case 2: Left sensor on black line -> Turn left
+            elif left_val == 1 and right_val == 0:
+                print("Turn Left") # Yellow
+                motor.turn_left()
 
-            # --- Parking Sequence Start ---
+            # Case 3: Right sensor on black line -> Turn right
+            elif left_val == 0 and right_val == 1:
+                print("Turn Right")  # Yellow
+                motor.turn_right()
 
-            # Step 1: Move forward to find the next intersection
-            print("Step 1: Moving forward to find the next intersection...")
-            motor.forward()
-            time.sleep_ms(750)
-            motor.stop()
-            time.sleep_ms(1000)
-            l, r = ir_sensor.read_line()
-            if l == 1 and r == 1:
-                count += 1
-
-            # Step 2: Turn Right and find the next intersection
-            print("Step 2: Turning right...")
-            motor.turn_right()
-            time.sleep_ms(200) 
-            motor.stop()
-            time.sleep_ms(1000)
-            l, r = ir_sensor.read_line()
-            if l == 1 and r == 1:
-                count += 1
-
-            # Step 3: Turn Left (1st time) and find the next intersection
-            print("Step 3: Turning left (1/2)...")
-            motor.turn_left()
-            time.sleep_ms(400)
-            motor.stop()
-            time.sleep_ms(1000) # Adjust for a 90-degree turn
-            l, r = ir_sensor.read_line()
-            if l == 1 and r == 1:
-                count += 1
-
-            print("Step 4: Final turn right.")
-            motor.turn_right()
-            time.sleep_ms(200) # Adjust for a 90-degree turn
-            
-            if count == 3:
-                # Step 5: Parked
-                print("PARKED!") # Solid Red to indicate parked
-                l, r = ir_sensor.read_line()
-                while l == 1 and r == 1:
-                    motor.stop()
-                    
-                    # if you want to continue the car then un comment below 2 line to car will move when the car way is free 
-                    #l, r = ir_sensor.read_line()
-                    #print(f"Sensor values: Left={left_val}, Right={right_val}")
-                    
-                    
-                time.sleep(1)
-                
+            # Case 4: Both sensors on black line -> Initiate Sequential Parking Maneuver
+            elif left_val == 1 and right_val == 1:
+                start_parking()
             
         time.sleep_ms(20)
 
@@ -234,4 +128,3 @@ except KeyboardInterrupt:
     print("Program stopped by user.")
     # Cleanly stop motors and turn off LEDs
     led.off()
-    motor.stop()
\ No newline at end of file
@@ -1,6 +1,8 @@
 import time
 from machine import Pin, PWM # type: ignore
 import Snowflake # type: ignore
+from snowflake_hal.maze import FloodMaze, save_maze, load_maze
+from snowflake_hal.route import path_commands, motion_program
 
 # --- Configuration Constants ---
 
@@ -19,15 +21,15 @@ TURN_90_DURATION_MS = 450     # Time for a 90-degree pivot turn
 # Sensor Thresholds
 WALL_AHEAD_DISTANCE_CM = 15.0 # Ultrasonic threshold for a wall in front
 
+# Map saved after exploring, so the next run on the same course can skip it
+MAZE_CACHE_FILE = "maze_map.bin"
+
 # Timeouts
 ULTRASONIC_TIMEOUT_US = 50000 # Timeout for ultrasonic sensor readings
 
 # --- Robot Orientation ---
 NORTH, EAST, SOUTH, WEST = 0, 1, 2, 3
 
-# --- Maze Cell States ---
-UNVISITED, VISITED, DEAD_END, EXIT = 0, 1, 2, 3
-
 # --- Hardware Abstraction Classes ---
 
 class Motor:
@@ -118,27 +120,26 @@ led = LED(num_leds=9)
 robot_pos = {'row': 0, 'col': 0}
 robot_orientation = NORTH
 
-maze_grid = [[UNVISITED for _ in range(MAZE_COLS)] for _ in range(MAZE_ROWS)]
-EXIT_POS = {'row': MAZE_ROWS - 1, 'col': MAZE_COLS - 1}
-maze_grid[robot_pos['row']][robot_pos['col']] = VISITED
-maze_grid[EXIT_POS['row']][EXIT_POS['col']] = EXIT
+START_POS = (0, 0)
+EXIT_POS = (MAZE_ROWS - 1, MAZE_COLS - 1)
 
-path_stack = []
+# Wall map (4 bits per cell) and flood-fill distances, see snowflake_hal/maze.py
+maze = FloodMaze(MAZE_ROWS, MAZE_COLS)
 
 # --- High-Level Robot Actions ---
 
-def move_one_cell():
-    """Moves the robot forward one cell and updates its internal position."""
+def move_cells(n=1):
+    """Drives n cells straight without stopping in between and updates the position."""
     motor.forward()
     led.set_all(0, 255, 0) # Green
-    time.sleep_ms(MOVE_FORWARD_DURATION_MS)
+    time.sleep_ms(MOVE_FORWARD_DURATION_MS * n)
     motor.stop()
     time.sleep_ms(100) # Pause for stability
 
-    if robot_orientation == NORTH: robot_pos['row'] -= 1
-    elif robot_orientation == EAST: robot_pos['col'] += 1
-    elif robot_orientation == SOUTH: robot_pos['row'] += 1
-    elif robot_orientation == WEST: robot_pos['col'] -= 1
+    if robot_orientation == NORTH: robot_pos['row'] -= n
+    elif robot_orientation == EAST: robot_pos['col'] += n
+    elif robot_orientation == SOUTH: robot_pos['row'] += n
+    elif robot_orientation == WEST: robot_pos['col'] -= n
 
 def turn_robot_left():
     """Turns the robot 90 degrees left and updates its orientation."""
@@ -170,22 +171,17 @@ def turn_robot_180():
     time.sleep_ms(100) # Pause for stability
     robot_orientation = (robot_orientation + 2) % 4
 
+def turn_to(heading):
+    """Turns the shortest way to face the absolute direction heading."""
+    turn = (heading - robot_orientation) % 4
+    if turn == 1: turn_robot_right()
+    elif turn == 2: turn_robot_180()
+    elif turn == 3: turn_robot_left()
+
 # --- Maze Logic Helper Functions ---
 
-def get_coords_in_direction(direction):
-    """Calculates coordinates of the cell in the given absolute direction."""
-    r, c = robot_pos['row'], robot_pos['col']
-    if direction == NORTH: r -= 1
-    elif direction == EAST: c += 1
-    elif direction == SOUTH: r += 1
-    elif direction == WEST: c -= 1
-    return r, c
-
-def is_valid_and_unexplored(row, col):
-    """Checks if a cell is within bounds and is not a dead end or already visited."""
-    if not (0 <= row < MAZE_ROWS and 0 <= col < MAZE_COLS):
-        return False
-    return maze_grid[row][col] in [UNVISITED, EXIT]
+def current_cell():
+    return robot_pos['row'], robot_pos['col']
 
 def sense_walls():
     """Returns a dictionary of booleans indicating physical wall presence."""
@@ -197,83 +193,113 @@ def sense_walls():
         'right': wall_right
     }
 
+def map_walls():
+    """Senses the walls around the current cell and adds them to the maze map."""
+    walls = sense_walls()
+    new = maze.sense(robot_pos['row'], robot_pos['col'], robot_orientation,
+                     walls['front'], walls['left'], walls['right'])
+    if new:
+        print(f"New walls at {current_cell()} towards {new}")
+
+def walls_match_map():
+    """Senses the walls around the current cell; False if they contradict the map."""
+    walls = sense_walls()
+    if maze.conflicts(robot_pos['row'], robot_pos['col'], robot_orientation,
+                      walls['front'], walls['left'], walls['right']):
+        print(f"Walls at {current_cell()} do not match the map: {walls}")
+        return False
+    return True
+
+def halt(message):
+    print(message)
+    led.set_all(255, 0, 0)
+    motor.stop()
+    while True: time.sleep_ms(1000) # Halt program
+
+def explore(target):
+    """Drives to target one cell at a time, always towards the lowest flood-fill distance.
+
+    Unknown walls count as open, so the robot heads for the target as
+    straight as the map allows; every sensed wall only re-floods the cells
+    it affects. Returns False if the target turns out to be unreachable."""
+    maze.flood(target)
+    while current_cell() != target:
+        map_walls()
+        heading = maze.next_heading(robot_pos['row'], robot_pos['col'], robot_orientation)
+        if heading is None:
+            return False
+        print(f"At {current_cell()} facing {robot_orientation}, {maze.dist[robot_pos['row'] * MAZE_COLS + robot_pos['col']]} cells to go -> heading {heading}")
+        turn_to(heading)
+        move_cells(1)
+        time.sleep_ms(50) # Brief pause between decision cycles
+    map_walls()
+    return True
+
+def fast_run(goal):
+    """Drives the shortest known route to goal, each straight stretch in one go.
+
+    The walls are checked against the map at every stop. Returns False,
+    wherever the robot is, when the route is missing or the map is wrong."""
+    cells = maze.route(current_cell(), goal, robot_orientation)
+    if cells is None:
+        return False
+    path = [{'r': r, 'c': c} for r, c in cells]
+    program = motion_program(path_commands(path, robot_orientation))
+    print(f"Fast run: {len(cells) - 1} cells as {program}")
+    for step in program:
+        if not walls_match_map():
+            return False
+        arg = int(step[1:])
+        if step[0] == 'F': move_cells(arg)
+        elif arg == 90: turn_robot_right()
+        elif arg == -90: turn_robot_left()
+        else: turn_robot_180()
+    return True
+
+def explore_maze(t0):
+    """Exploration run: to the exit, then back to the start. The way back
+    floods towards the start, so it tries corridors the first leg skipped."""
+    if not explore(EXIT_POS):
+        halt("FATAL ERROR: Maze is unsolvable or robot is trapped!")
+    print(f"Exit found after {time.ticks_diff(time.ticks_ms(), t0)} ms")
+    led.set_all(0, 255, 255)
+    if not explore(START_POS):
+        halt("FATAL ERROR: Lost the way back to the start!")
+    best = maze.flood(EXIT_POS)[START_POS[0] * MAZE_COLS + START_POS[1]]
+    known = maze.route(START_POS, EXIT_POS)
+    print(f"Explored in {time.ticks_diff(time.ticks_ms(), t0)} ms, "
+          f"route {len(known) - 1} cells ({'optimal' if len(known) - 1 == best else 'best known'})")
+    save_maze(MAZE_CACHE_FILE, maze, EXIT_POS)
+
 # --- Main Program ---
 
 def main():
-    print("Advanced Maze Solver v3 - Starting...")
+    global maze
+    print("Flood-Fill Maze Solver v3 - Starting...")
     led.set_all(255, 0, 255); time.sleep_ms(1000); led.off()
-
-    while robot_pos != EXIT_POS:
-        print(f"At ({robot_pos['row']},{robot_pos['col']}) facing {robot_orientation}. Path stack size: {len(path_stack)}")
-        maze_grid[robot_pos['row']][robot_pos['col']] = VISITED
-
-        # 1. Sense physical walls
-        walls = sense_walls()
-
-        # 2. Check for available paths (not physically blocked AND not a dead end/visited)
-        # Get absolute directions relative to robot's orientation
-        dir_left = (robot_orientation - 1 + 4) % 4
-        dir_front = robot_orientation
-        dir_right = (robot_orientation + 1) % 4
-
-        # Get coordinates for each potential path
-        left_coords = get_coords_in_direction(dir_left)
-        front_coords = get_coords_in_direction(dir_front)
-        right_coords = get_coords_in_direction(dir_right)
-
-        # Check if paths are viable (no wall AND leads to an explorable cell)
-        can_go_left = not walls['left'] and is_valid_and_unexplored(*left_coords)
-        can_go_front = not walls['front'] and is_valid_and_unexplored(*front_coords)
-        can_go_right = not walls['right'] and is_valid_and_unexplored(*right_coords)
-
-        # 3. Decision Logic (Prioritized: Left -> Front -> Right -> Backtrack)
-        if can_go_left:
-            print("Decision: Path open on Left. Turning left.")
-            path_stack.append(robot_pos.copy()) # Save current position for backtracking
-            turn_robot_left()
-            move_one_cell()
-        elif can_go_front:
-            print("Decision: Path open in Front. Moving forward.")
-            path_stack.append(robot_pos.copy())
-            move_one_cell()
-        elif can_go_right:
-            print("Decision: Path open on Right. Turning right.")
-            path_stack.append(robot_pos.copy())
-            turn_robot_right()
-            move_one_cell()
-        else:
-            # Dead End: No viable paths forward, must backtrack.
-            print("Decision: Dead end reached. Backtracking...")
-            maze_grid[robot_pos['row']][robot_pos['col']] = DEAD_END
-
-            if not path_stack:
-                print("FATAL ERROR: Maze is unsolvable or robot is trapped!")
-                led.set_all(255, 0, 0)
-                motor.stop()
-                while True: time.sleep_ms(1000) # Halt program
-
-            # Pop the previous cell's coordinates from the stack
-            previous_pos = path_stack.pop()
-
-            # Figure out which direction leads back to the previous cell
-            # This is a robust way to re-orient the robot correctly.
-            if previous_pos['row'] < robot_pos['row']: target_orientation = NORTH
-            elif previous_pos['row'] > robot_pos['row']: target_orientation = SOUTH
-            elif previous_pos['col'] < robot_pos['col']: target_orientation = WEST
-            else: target_orientation = EAST
-
-            # Turn to face the previous cell
-            while robot_orientation != target_orientation:
-                turn_robot_right() # Turn right until facing the correct way
-
-            # Move back to the previous cell
-            print(f"Moving back to ({previous_pos['row']},{previous_pos['col']})")
-            move_one_cell()
-
-        time.sleep_ms(50) # Brief pause between decision cycles
+    t0 = time.ticks_ms()
+
+    # A map saved by an earlier run on this course skips the exploration
+    cached = load_maze(MAZE_CACHE_FILE, MAZE_ROWS, MAZE_COLS)
+    if cached is not None and cached[1] == EXIT_POS:
+        maze = cached[0]
+        print(f"Loaded maze map from {MAZE_CACHE_FILE}")
+    else:
+        explore_maze(t0)
+
+    # Fast run along the shortest route over mapped corridors. If a sensed
+    # wall contradicts the map the course has changed: forget the map and
+    # explore again from wherever the robot stopped.
+    t1 = time.ticks_ms()
+    while not fast_run(EXIT_POS):
+        print("Map does not match the maze - exploring again")
+        led.set_all(255, 0, 255)
+        maze = FloodMaze(MAZE_ROWS, MAZE_COLS)
+        explore_maze(time.ticks_ms())
+        t1 = time.ticks_ms()
 
     # Maze Solved!
-    print(f"SUCCESS: Reached exit at ({robot_pos['row']},{robot_pos['col']})")
+    print(f"SUCCESS: Reached exit at {current_cell()} in {time.ticks_diff(time.ticks_ms(), t1)} ms")
     led.set_all(0, 255, 255) # Cyan for success
     motor.stop()
     while True: time.sleep_ms(1000)
@@ -1,6 +1,7 @@
 import time
 from machine import Pin, PWM, UART, time_pulse_us # type: ignore
 import Snowflake # type: ignore
+from snowflake_hal.filters import RangeFilter, BurstMedian
 import urandom # type: ignore
 
 # --- Hardware Abstraction Classes ---
@@ -80,6 +81,11 @@ motor = Motor(
 )
 led = LED(num_leds=9)
 ultrasonic = Ultrasonic(trigger_pin=Snowflake.IO9, echo_pin=Snowflake.IO10)
+# Obstacle checks use a fresh median of 3 back-to-back pings: patrol readings are
+# seconds apart, and RangeFilter's spike rejection would hide a new obstacle for
+# several cycles. RangeFilter only smooths the distance shown in manual mode.
+obstacle_range = BurstMedian(ultrasonic.get_distance_cm)
+range_filter = RangeFilter()
 uart = UART(0, baudrate=115200, tx=Snowflake.IO1, rx=Snowflake.IO2)
 
 print("Snowflake Watchman Receiver: Patrolling...")
@@ -113,7 +119,7 @@ while True:
 
         # --- Automatic Patrol Mode ---
         if not manual_override:
-            distance = ultrasonic.get_distance_cm()
+            distance = obstacle_range.update()
             if distance != -1:
                 uart.write(f"{distance:.1f}\n") # Send distance to sender/web
 
@@ -140,7 +146,7 @@ while True:
                 time.sleep(0.5)
         else:
             # In manual mode, just send distance periodically
-            distance = ultrasonic.get_distance_cm()
+            distance = range_filter.update(ultrasonic.get_distance_cm())
             if distance != -1: uart.write(f"{distance:.1f}\n")
             time.sleep_ms(100)
 
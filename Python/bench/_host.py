@@ -0,0 +1,23 @@
+# Puts the host fakes and the snowflake_hal package on sys.path.
+# Every bench script imports this first.
+import os
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+for p in (os.path.join(_here, "..", "host"), os.path.join(_here, "..")):
+    p = os.path.normpath(p)
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+# The machine fake also adds MicroPython's time.ticks_* / sleep_ms to CPython,
+# which most of snowflake_hal uses
+import machine # type: ignore
+
+
+def timeit(fn, n):
+    """Runs fn() n times and returns the mean time per call in microseconds."""
+    import time
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / n
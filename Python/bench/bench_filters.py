@@ -0,0 +1,57 @@
+# Filter quality and cost on a noisy range trace with spikes and dropouts.
+# Run: python3 Python/bench/bench_filters.py
+import _host
+from _host import timeit
+import random
+from snowflake_hal.filters import MedianFilter, EMAFilter, OutlierFilter, RangeFilter
+
+N = 2000
+
+
+def trace(n=400, seed=1):
+    """Target walking from 60 cm to 20 cm with noise, 5% spikes and 5% dropouts."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        true = 60 - 40 * i / n
+        r = rnd.random()
+        if r < 0.05:
+            out.append((true, -1))
+        elif r < 0.10:
+            out.append((true, rnd.uniform(150, 400)))
+        else:
+            out.append((true, true + rnd.gauss(0, 1.5)))
+    return out
+
+
+def score(name, f):
+    err = 0.0
+    invalid = 0
+    for true, x in trace():
+        y = f.update(x)
+        if y < 0:
+            invalid += 1
+        else:
+            err += abs(y - true)
+    n = len(trace())
+    print("  %-22s mean |err| %6.2f cm  invalid outputs %3d" % (name, err / max(1, n - invalid), invalid))
+
+
+def main():
+    print("filter output vs. true distance")
+    raw = type("Raw", (), {"update": lambda self, x: x})()
+    score("raw", raw)
+    score("median(5)", MedianFilter(5))
+    score("ema(0.4)", EMAFilter(0.4))
+    score("outlier+median(3)", RangeFilter((OutlierFilter(), MedianFilter(3)), hold_ms=10 ** 6))
+    score("outlier+median(5)+ema", RangeFilter((OutlierFilter(), MedianFilter(5), EMAFilter(0.5)), hold_ms=10 ** 6))
+
+    print("cost per sample")
+    samples = [x for _, x in trace()]
+    for name, f in (("median(5)", MedianFilter(5)), ("ema", EMAFilter()), ("default RangeFilter", RangeFilter())):
+        it = iter(samples * (N // len(samples) + 1))
+        print("  %-22s %6.2f us" % (name, timeit(lambda: f.update(next(it)), N)))
+
+
+if __name__ == "__main__":
+    main()
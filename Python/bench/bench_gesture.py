@@ -0,0 +1,164 @@
+# Gesture messages from Cam.py over 60 s of simulated hand poses at 104 Hz:
+# the original sender (one sample thresholded every 500 ms, always sent),
+# the batch-mean sender it became with the FIFO (every 100 ms, always sent)
+# and snowflake_hal.gesture (every sample filtered, sent on change only).
+# The hand holds a pose for 1..4 s, ramps between poses in 150 ms, shakes
+# (noise plus an 8 Hz tremor) and now and then bumps the board for 30 ms;
+# some poses sit right at the 0.6 g threshold.
+# "spurious" counts gesture changes the receiver saw that the hand did not
+# make; "react" is the time from the start of a pose change until the
+# receiver has the new gesture for good.
+# Run: python3 Python/bench/bench_gesture.py
+import math
+import random
+
+import _host
+from snowflake_hal.gesture import GestureEngine, STOP, FORWARD, BACKWARD, LEFT, RIGHT
+from snowflake_hal.imu import ACCEL_SCALE
+from snowflake_hal.msgpack import Packer
+
+ODR_HZ = 104
+SECONDS = 60
+RAMP_MS = 150
+WS_HEADER = 6           # client frame: 2 byte header + mask key
+
+# Pose -> (ax, ay) in g
+POSES = {STOP: (0.0, 0.0), FORWARD: (0.0, -0.85), BACKWARD: (0.0, 0.85), LEFT: (0.85, 0.0), RIGHT: (-0.85, 0.0)}
+
+
+def make_script(rnd):
+    """List of (start_ms, gesture, (ax, ay)) with mostly clear poses and some borderline ones."""
+    script = []
+    t = 0
+    g = STOP
+    while t < SECONDS * 1000:
+        x, y = POSES[g]
+        if g != STOP and rnd.random() < 0.25:
+            x, y = x * 0.62 / 0.85, y * 0.62 / 0.85   # barely tilted
+        script.append((t, g, (x, y)))
+        t += rnd.randrange(1000, 4000)
+        g = rnd.choice([p for p in POSES if p != g])
+    return script
+
+
+def make_samples(script, rnd):
+    """Raw int16 (ax, ay) per sample, the way imu.raw() returns them."""
+    samples = []
+    bump_until = -1
+    bump = (0.0, 0.0)
+    k = 0
+    for n in range(SECONDS * ODR_HZ):
+        t = n * 1000 // ODR_HZ
+        while k + 1 < len(script) and script[k + 1][0] <= t:
+            k += 1
+        x, y = script[k][2]
+        if k and t - script[k][0] < RAMP_MS:
+            px, py = script[k - 1][2]
+            f = (t - script[k][0]) / RAMP_MS
+            x, y = px + (x - px) * f, py + (y - py) * f
+        tremor = 0.05 * math.sin(2 * math.pi * 8 * t / 1000)
+        x += rnd.gauss(0, 0.06) + tremor
+        y += rnd.gauss(0, 0.06) - tremor
+        if t >= bump_until and rnd.random() < 0.002:
+            bump_until = t + 30
+            bump = (rnd.uniform(-0.9, 0.9), rnd.uniform(-0.9, 0.9))
+        if t < bump_until:
+            x += bump[0]
+            y += bump[1]
+        samples.append((int(x / ACCEL_SCALE), int(y / ACCEL_SCALE)))
+    return samples
+
+
+def threshold(ax, ay):
+    """The original detect_gesture, on values in g."""
+    if ay > 0.6: return BACKWARD
+    if ay < -0.6: return FORWARD
+    if ax > 0.6: return LEFT
+    if ax < -0.6: return RIGHT
+    return STOP
+
+
+def run_old(samples, period_ms, mean):
+    """Returns the list of (ms, gesture) sent; one message every period_ms."""
+    sent = []
+    step = period_ms * ODR_HZ // 1000
+    for end in range(step, len(samples) + 1, step):
+        t = end * 1000 // ODR_HZ
+        if mean:
+            batch = samples[end - step:end]
+            ax = sum(s[0] for s in batch) * ACCEL_SCALE / step
+            ay = sum(s[1] for s in batch) * ACCEL_SCALE / step
+        else:
+            ax, ay = samples[end - 1][0] * ACCEL_SCALE, samples[end - 1][1] * ACCEL_SCALE
+        sent.append((t, threshold(ax, ay)))
+    return sent
+
+
+def run_engine(samples, period_ms):
+    engine = GestureEngine(ODR_HZ, ACCEL_SCALE)
+    sent = []
+    step = period_ms * ODR_HZ // 1000
+    for end in range(step, len(samples) + 1, step):
+        t = end * 1000 // ODR_HZ
+        changed = None
+        for ax, ay in samples[end - step:end]:
+            g = engine.update(ax, ay)
+            if g is not None:
+                changed = g
+        if changed is not None:
+            sent.append((t, changed))
+    return sent
+
+
+def score(script, sent):
+    """(spurious changes, mean reaction ms, missed pose changes) as the receiver saw them."""
+    changes = []
+    current = None
+    for t, g in sent:
+        if g != current:
+            changes.append((t, g))
+            current = g
+    spurious = 0
+    react = []
+    missed = 0
+    for k, (start, g, _) in enumerate(script):
+        end = script[k + 1][0] if k + 1 < len(script) else SECONDS * 1000
+        inside = [(t, h) for t, h in changes if start <= t < end]
+        if k == 0:
+            continue
+        # The last change in the pose's window settles it; everything else is noise
+        if inside and inside[-1][1] == g:
+            react.append(inside[-1][0] - start)
+            spurious += len(inside) - 1
+        else:
+            missed += 1
+            spurious += len(inside)
+    return spurious, sum(react) / max(1, len(react)), missed
+
+
+def main():
+    packer = Packer(use_single_float=True)
+    size = len(packer.pack({"mode": "Board", "program": {"loop": {"0": {"MExBo": {"gesture": "backward"}}}}}))
+    rnd = random.Random(4)
+    print("%-22s %8s %8s %9s %8s %8s" % ("sender", "msgs", "bytes", "spurious", "react", "missed"))
+    totals = {}
+    runs = 5
+    changes = 0
+    for _ in range(runs):
+        script = make_script(rnd)
+        samples = make_samples(script, rnd)
+        changes += len(script) - 1
+        for name, sent in (("old 1 sample / 500 ms", run_old(samples, 500, False)),
+                           ("batch mean / 100 ms", run_old(samples, 100, True)),
+                           ("engine, on change", run_engine(samples, 40))):
+            spurious, react, missed = score(script, sent)
+            t = totals.setdefault(name, [0, 0, 0, 0, 0])
+            for i, v in enumerate((len(sent), len(sent) * (size + WS_HEADER), spurious, react, missed)):
+                t[i] += v
+    for name, t in totals.items():
+        print("%-22s %8d %8d %9d %6.0fms %8d" % (name, *(v / runs for v in t)))
+    print("per %d s run, averaged over %d runs; %d pose changes per run" % (SECONDS, runs, changes // runs))
+
+
+if __name__ == "__main__":
+    main()
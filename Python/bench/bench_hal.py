@@ -0,0 +1,62 @@
+# Compares the old per-script Motor/Ultrasonic copies with snowflake_hal on the host.
+# Run: python3 Python/bench/bench_hal.py
+import _host
+from _host import timeit
+import machine # type: ignore
+from machine import Pin, PWM, time_pulse_us # type: ignore
+import time
+import Subu # type: ignore
+from snowflake_hal.motor import Motor
+from snowflake_hal.ultrasonic import Ultrasonic
+from snowflake_hal.ir import IRSensor
+
+N = 20000
+
+
+class LegacyMotor:
+    """Motor class as copy-pasted in Subo_Follow.py (without the LED part)."""
+    def __init__(self, a1_pin, a2_pin, b1_pin, b2_pin, speed, Turn):
+        self.motor_a1 = PWM(Pin(a1_pin))
+        self.motor_a2 = PWM(Pin(a2_pin))
+        self.motor_b1 = PWM(Pin(b1_pin))
+        self.motor_b2 = PWM(Pin(b2_pin))
+        self.set_speed(speed, Turn)
+
+    def set_speed(self, speed, Turn):
+        self.duty_cycle = int(max(0.0, min(1.0, speed)) * 65535)
+        self.turn_duty_cycle = int(max(0.0, min(1.0, Turn)) * 65535)
+
+    def forward(self):
+        self.motor_a1.duty_u16(self.duty_cycle); self.motor_a2.duty_u16(0)
+        self.motor_b1.duty_u16(self.duty_cycle); self.motor_b2.duty_u16(0)
+
+
+def calls_per(fn, n=1000):
+    machine.call_count = 0
+    for _ in range(n):
+        fn()
+    return machine.call_count / n
+
+
+def main():
+    legacy = LegacyMotor(Subu.IO18, Subu.IO19, Subu.IO20, Subu.IO21, 0.4, 0.4)
+    motor = Motor(Subu.IO18, Subu.IO19, Subu.IO20, Subu.IO21, 0.4, 0.4)
+    print("motor.forward() repeated (line-follower hot path)")
+    print("  legacy : %5.2f us  %4.1f PWM writes/call" % (timeit(legacy.forward, N), calls_per(legacy.forward)))
+    print("  hal    : %5.2f us  %4.1f PWM writes/call" % (timeit(motor.forward, N), calls_per(motor.forward)))
+
+    machine.set_pulse_us(Subu.IO3, 1166)  # ~20 cm
+    sonar = Ultrasonic(Subu.IO2, Subu.IO3)
+    d = sonar.get_distance_cm()
+    assert abs(d - 20.0) < 0.1, d
+    machine.set_pulse_us(Subu.IO3, -2)
+    assert sonar.get_distance_cm() == -1
+
+    ir = IRSensor(Subu.IO1, Subu.IO4)
+    machine.set_level(Subu.IO4, 1)
+    assert ir.read() == (0, 1)
+    print("ultrasonic / IR fakes OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# IMU readout for Cam.py: polling the output registers once per sample
+# versus draining the LSM6DSO FIFO in batches (snowflake_hal.imu), over 10 s
+# of simulated motion at 104 Hz. Counts I2C transactions and network
+# messages, and times the read + msgpack work on this machine.
+# Run: python3 Python/bench/bench_imu.py
+import _host
+import math
+import struct
+import time
+
+import machine # type: ignore
+from snowflake_hal.imu import LSM6DSO, WHO_AM_I, FIFO_STATUS1, FIFO_DATA_OUT_TAG, TAG_ACCEL, TAG_GYRO
+from snowflake_hal.msgpack import Packer
+
+ADDR = 0x6A
+ODR_HZ = 104
+SECONDS = 10
+BATCH_MS = 100
+OUTX_L_G = 0x22
+
+
+class FakeLSM6DSO:
+    """Registers and a FIFO fed by advance(); motion is a slow tilt plus a twist."""
+
+    def __init__(self):
+        self.regs = bytearray(128)
+        self.fifo = bytearray()
+        self.t = 0
+        self.n = 0
+
+    def advance(self, ms):
+        self.t += ms
+        while self.n * 1000 < self.t * ODR_HZ:
+            phase = 2 * math.pi * self.n / ODR_HZ
+            accel = [int(8000 * math.sin(phase)), int(8000 * math.cos(phase)), 16000]
+            gyro = [int(3000 * math.cos(phase * 3)), 0, -100]
+            self.fifo += bytes((TAG_GYRO << 3,)) + struct.pack("<3h", *gyro)
+            self.fifo += bytes((TAG_ACCEL << 3,)) + struct.pack("<3h", *accel)
+            self.fifo = self.fifo[-3 * 1024:]
+            self.regs[OUTX_L_G:OUTX_L_G + 12] = struct.pack("<6h", *(gyro + accel))
+            self.n += 1
+
+    def read(self, reg, n):
+        if reg == WHO_AM_I:
+            return b"\x6c"
+        if reg == FIFO_STATUS1:
+            words = len(self.fifo) // 7
+            return bytes((words & 0xFF, words >> 8))
+        if reg == FIFO_DATA_OUT_TAG:
+            data = self.fifo[:n]
+            self.fifo = self.fifo[n:]
+            return data
+        return self.regs[reg:reg + n]
+
+    def write(self, reg, data):
+        self.regs[reg:reg + len(data)] = data
+        if reg == 0x0A and data[0] == 0:
+            self.fifo = bytearray()
+
+
+def run_polling(packer):
+    """One register read and one message per sample (the old imu_thread, at the new rate)."""
+    dev = FakeLSM6DSO()
+    machine.add_i2c_device(ADDR, dev)
+    i2c = machine.I2C(0)
+    sent = wire = 0
+    work = 0.0
+    for _ in range(SECONDS * ODR_HZ):
+        dev.advance(1000 / ODR_HZ)
+        t0 = time.perf_counter()
+        d = i2c.readfrom_mem(ADDR, OUTX_L_G, 12)
+        gx, gy, gz, ax, ay, az = struct.unpack("<6h", d)
+        msg = packer.pack({"mode": "IMU_RAW", "data": {"ax": ax * 0.000061, "ay": ay * 0.000061}})
+        work += time.perf_counter() - t0
+        sent += 1
+        wire += len(msg) + 6   # plus a masked WebSocket header
+    return i2c.transactions, sent, wire, work, SECONDS * ODR_HZ
+
+
+def run_fifo(packer):
+    dev = FakeLSM6DSO()
+    machine.add_i2c_device(ADDR, dev)
+    i2c = machine.I2C(0)
+    imu = LSM6DSO(i2c, ADDR, odr_hz=ODR_HZ, max_samples=32)
+    i2c.transactions = 0
+    sent = wire = samples = 0
+    work = 0.0
+    for _ in range(SECONDS * 1000 // BATCH_MS):
+        dev.advance(BATCH_MS)
+        t0 = time.perf_counter()
+        n = imu.read()
+        if n:
+            ax, ay = imu.sample(n - 1)[:2]
+            msg = packer.pack({"mode": "IMU_RAW", "data": {"ax": ax, "ay": ay}, "odr": ODR_HZ, "n": n,
+                               "accel_scale": 0.000061, "gyro_scale": 0.00875, "samples": imu.batch(n)})
+            sent += 1
+            wire += len(msg) + 8
+            samples += n
+        work += time.perf_counter() - t0
+    return i2c.transactions, sent, wire, work, samples
+
+
+def main():
+    packer = Packer(use_single_float=True)
+    print("%d s of motion at %d Hz" % (SECONDS, ODR_HZ))
+    print("%-8s %8s %9s %9s %9s %10s" % ("readout", "samples", "I2C txns", "messages", "wire B", "work ms"))
+    for name, fn in (("polling", run_polling), ("FIFO", run_fifo)):
+        txns, sent, wire, work, samples = fn(packer)
+        print("%-8s %8d %9d %9d %9d %10.1f" % (name, samples, txns, sent, wire, work * 1000))
+
+
+if __name__ == "__main__":
+    main()
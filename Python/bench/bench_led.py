@@ -0,0 +1,94 @@
+# Driver calls and time per frame for the LED matrix: the per-script LED class
+# versus snowflake_hal.LED on the board API and on a NeoPixel buffer.
+# Run: python3 Python/bench/bench_led.py
+import _host
+from _host import timeit
+from machine import Pin # type: ignore
+import neopixel # type: ignore
+import Subu # type: ignore
+from snowflake_hal.led import LED
+from snowflake_hal import icons
+
+N = 2000
+NUM_LEDS = 48
+
+# Raw row bitmaps, as the old scripts define them
+ROWS_FORWARD = [0b00011000, 0b00111100, 0b01111110, 0b00011000, 0b00011000, 0b00011000]
+ROWS_LEFT = [0b00011000, 0b00111000, 0b11111111, 0b11111111, 0b00111000, 0b00011000]
+ROWS_RIGHT = [0b00011000, 0b00011100, 0b11111111, 0b11111111, 0b00011100, 0b00011000]
+
+
+class LegacyLED:
+    """LED class as copy-pasted in Subo_Follow.py / Subo_Catch_me.py."""
+    def __init__(self, num_leds):
+        self.NUM_LEDS = num_leds
+
+    def set_all(self, r, g, b):
+        for i in range(1, self.NUM_LEDS + 1):
+            Subu.setSingleLED(i, (r, g, b))
+
+    def off(self):
+        self.set_all(0, 0, 0)
+
+    def display_icon(self, icon_data, color):
+        self.off()
+        idx = 1
+        for row in icon_data:
+            for bit in range(8):
+                if (row >> (7 - bit)) & 1:
+                    if idx <= self.NUM_LEDS:
+                        Subu.setSingleLED(idx, color)
+                idx += 1
+
+
+def measure(name, led, np=None, forward=icons.ARROW_FORWARD, left=icons.ARROW_LEFT, right=icons.ARROW_RIGHT):
+    turn = [0]
+
+    def alternate():
+        turn[0] ^= 1
+        if turn[0]:
+            led.display_icon(left, icons.YELLOW)
+        else:
+            led.display_icon(right, icons.YELLOW)
+
+    cases = (
+        ("same icon", lambda: led.display_icon(forward, icons.GREEN)),
+        ("left/right", alternate),
+        ("set_all", lambda: led.set_all(0, 0, 255)),
+    )
+    for case, fn in cases:
+        fn()  # first frame, then measure the steady state
+        Subu.reset()
+        if np is not None:
+            np.writes = 0
+        fn()
+        calls = Subu.led_calls + (np.writes if np is not None else 0)
+        print("  %-12s %-12s %4d driver calls  %8.1f us/frame" % (name, case, calls, timeit(fn, N)))
+
+
+def main():
+    print("LED frame cost (%d LEDs)" % NUM_LEDS)
+    measure("legacy", LegacyLED(NUM_LEDS), None, ROWS_FORWARD, ROWS_LEFT, ROWS_RIGHT)
+    measure("hal/board", LED(NUM_LEDS, Subu))
+    np = neopixel.NeoPixel(Pin(14), NUM_LEDS)
+    measure("hal/neopixel", LED(NUM_LEDS, np=np), np)
+
+    # Both backends must end up showing the same picture
+    Subu.reset()
+    a = LED(NUM_LEDS, Subu)
+    b = LED(NUM_LEDS, np=np)
+    for icon in (icons.ICON_STOP, icons.ARROW_LEFT, icons.ARROW_LEFT, icons.ARROW_RIGHT):
+        a.display_icon(icon, icons.RED)
+        b.display_icon(icon, icons.RED)
+        for i in range(1, NUM_LEDS + 1):
+            assert Subu.leds[i] == a.get_pixel(i) == np[i - 1], i
+
+    # Drawing cost alone: bit-decoding the rows versus the precompiled mask
+    frame = LED(NUM_LEDS, Subu)
+    print("icon drawing (frame only, no flush)")
+    print("  rows decoded per call : %6.1f us" % timeit(lambda: frame.draw_icon(ROWS_LEFT, icons.YELLOW), N))
+    print("  precompiled mask      : %6.1f us" % timeit(lambda: frame.draw_icon(icons.ARROW_LEFT, icons.YELLOW), N))
+
+
+if __name__ == "__main__":
+    main()
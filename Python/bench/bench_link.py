@@ -0,0 +1,94 @@
+# Text lines versus link frames on the sender <-> receiver UART:
+# bytes per command, decode cost, and what line noise does to each.
+# Run: python3 Python/bench/bench_link.py
+import _host
+from _host import timeit
+import random
+from machine import UART # type: ignore
+from snowflake_hal import link
+
+COMMANDS = ["F", "S", "L", "S", "B", "S", "R", "S", "V50"] * 20
+FLIPS = 20  # single-bit errors injected into each stream
+
+
+def text_stream():
+    return "".join(c + "\n" for c in COMMANDS).encode()
+
+
+def frame_stream():
+    u = UART(1)
+    tx = link.LinkEncoder(u)
+    for c in COMMANDS:
+        tx.send_command(c)
+    return bytes(u.tx)
+
+
+def decode_text(data):
+    """What the receivers did: readline, decode, strip, if-chain."""
+    out = []
+    for raw in data.split(b"\n")[:-1]:
+        try:
+            command = raw.decode('utf-8').strip()
+        except UnicodeError:
+            continue
+        if command == 'F': out.append('F')
+        elif command == 'B': out.append('B')
+        elif command == 'L': out.append('L')
+        elif command == 'R': out.append('R')
+        elif command == 'S': out.append('S')
+        elif command.startswith('V'):
+            try:
+                out.append('V' + str(int(command[1:])))
+            except ValueError:
+                pass
+        else:
+            out.append('?' + command)
+    return out
+
+
+def decode_frames(data):
+    rx = link.LinkDecoder(size=1024 * 4)
+    rx.feed(data)
+    out = []
+    while rx.poll():
+        out.append(chr(rx.msg_type) + (str(rx.value) if rx.msg_type == link.SPEED else ""))
+    return out, rx
+
+
+def corrupt(data, seed=3):
+    rnd = random.Random(seed)
+    d = bytearray(data)
+    for _ in range(FLIPS):
+        d[rnd.randrange(len(d))] ^= 1 << rnd.randrange(8)
+    return bytes(d)
+
+
+def wrong(decoded):
+    """Decoded commands that were never sent (the dangerous case)."""
+    sent = COMMANDS
+    bad = 0
+    valid = set(sent)
+    for c in decoded:
+        if c not in valid:
+            bad += 1
+    # dropped commands are safe(ish); changed ones are not
+    return bad
+
+
+def main():
+    text = text_stream()
+    frames = frame_stream()
+    print("%d commands: text %d bytes, frames %d bytes" % (len(COMMANDS), len(text), len(frames)))
+    print("decode all commands (us):  text %.0f  frames %.0f" % (
+        timeit(lambda: decode_text(text), 50), timeit(lambda: decode_frames(frames), 50)))
+
+    print("with %d random bit flips:" % FLIPS)
+    t = decode_text(corrupt(text))
+    print("  text    decoded %3d  garbled %2d" % (len(t), wrong(t)))
+    f, rx = decode_frames(corrupt(frames))
+    print("  frames  decoded %3d  garbled %2d  (crc errors %d, seq gaps %d)" % (
+        len(f), wrong(f), rx.crc_errors, rx.lost))
+
+
+if __name__ == "__main__":
+    main()
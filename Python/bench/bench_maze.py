@@ -0,0 +1,159 @@
+# Maze solving time: the old left-hand DFS with backtracking versus flood fill
+# (snowflake_hal.maze), simulated on random mazes with a few loops.
+# Drive times use Snowflake_MazeSolver_v3's constants; the flood-fill robot
+# explores to the exit, explores back to the start, then does a fast run
+# with every straight stretch driven in one go.
+# Run: python3 Python/bench/bench_maze.py
+import random
+
+import _host
+from snowflake_hal.maze import FloodMaze, DR, DC
+from snowflake_hal.route import path_commands, motion_program
+
+CELL_MS = 1000              # MOVE_FORWARD_DURATION_MS
+TURN_90_MS = 450            # TURN_90_DURATION_MS
+PAUSE_MS = 100              # stability pause after every move or turn
+MOVE_MS = CELL_MS + PAUSE_MS
+CYCLE_MS = 50               # pause between decisions while exploring
+MAZES = 20
+
+
+def make_maze(rows, cols, rnd, loops):
+    """Random spanning-tree maze plus `loops` extra openings; returns a set of open edges."""
+    opened = set()
+    seen = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        r, c = stack[-1]
+        options = [(r + DR[d], c + DC[d]) for d in range(4)
+                   if 0 <= r + DR[d] < rows and 0 <= c + DC[d] < cols and (r + DR[d], c + DC[d]) not in seen]
+        if not options:
+            stack.pop()
+            continue
+        n = rnd.choice(options)
+        opened.add(frozenset(((r, c), n)))
+        seen.add(n)
+        stack.append(n)
+    while loops:
+        r, c, d = rnd.randrange(rows), rnd.randrange(cols), rnd.randrange(4)
+        n = (r + DR[d], c + DC[d])
+        if 0 <= n[0] < rows and 0 <= n[1] < cols and frozenset(((r, c), n)) not in opened:
+            opened.add(frozenset(((r, c), n)))
+            loops -= 1
+    return opened
+
+
+class World:
+    def __init__(self, rows, cols, opened):
+        self.rows = rows
+        self.cols = cols
+        self.opened = opened
+        self.ms = 0
+
+    def wall(self, r, c, d):
+        return frozenset(((r, c), (r + DR[d], c + DC[d]))) not in self.opened
+
+    def turn(self, quarter_turns):
+        """The old robot turns 90 degrees at a time; turn_robot_180 is one longer turn."""
+        if quarter_turns:
+            self.ms += TURN_90_MS * quarter_turns + PAUSE_MS * (1 if quarter_turns == 2 else quarter_turns)
+
+
+def run_dfs(world, exit_pos):
+    """The previous solver: left, front, right, else backtrack over path_stack.
+
+    Returns None when it gives up: it never looks behind itself, so a
+    corridor behind the start cell is never tried."""
+    pos = (0, 0)
+    heading = 0
+    state = {pos: 1}
+    stack = []
+    while pos != exit_pos:
+        world.ms += CYCLE_MS
+        r, c = pos
+        moved = False
+        for turn in (3, 0, 1):
+            d = (heading + turn) % 4
+            n = (r + DR[d], c + DC[d])
+            if not world.wall(r, c, d) and state.get(n, 0) == 0:
+                stack.append(pos)
+                world.turn(1 if turn else 0)
+                heading = d
+                pos = n
+                state[n] = 1
+                world.ms += MOVE_MS
+                moved = True
+                break
+        if moved:
+            continue
+        state[pos] = 2
+        if not stack:
+            return None
+        prev = stack.pop()
+        d = [d for d in range(4) if (r + DR[d], c + DC[d]) == prev][0]
+        for _ in range((d - heading) % 4):  # the old code turned right until it faced back
+            world.turn(1)
+        heading = d
+        pos = prev
+        world.ms += MOVE_MS
+    return world.ms
+
+
+def explore(world, maze, pos, heading, target):
+    maze.flood(target)
+    while True:
+        r, c = pos
+        maze.sense(r, c, heading, world.wall(r, c, heading), world.wall(r, c, (heading + 3) % 4),
+                   world.wall(r, c, (heading + 1) % 4))
+        if pos == target:
+            return pos, heading
+        d = maze.next_heading(r, c, heading)
+        turn = (d - heading) % 4
+        world.turn(turn if turn < 3 else 1)
+        heading = d
+        pos = (r + DR[d], c + DC[d])
+        world.ms += MOVE_MS + CYCLE_MS
+
+
+def run_flood(world, exit_pos):
+    maze = FloodMaze(world.rows, world.cols)
+    pos, heading = explore(world, maze, (0, 0), 0, exit_pos)
+    first = world.ms
+    pos, heading = explore(world, maze, pos, heading, (0, 0))
+    explored = world.ms
+    cells = maze.route(pos, exit_pos, heading)
+    program = motion_program(path_commands([{'r': r, 'c': c} for r, c in cells], heading))
+    fast = 0
+    for step in program:
+        arg = int(step[1:])
+        fast += (CELL_MS * arg if step[0] == 'F' else TURN_90_MS * abs(arg) // 90) + PAUSE_MS
+    return first, explored, fast, maze.updates
+
+
+def main():
+    rnd = random.Random(2)
+    print("%-7s %8s %6s %10s %10s %8s %8s" % ("maze", "DFS s", "stuck", "flood 1st", "explored", "fast s", "repairs"))
+    for rows, cols in ((6, 8), (8, 8), (12, 12), (16, 16)):
+        totals = [0] * 4
+        dfs_total = 0
+        stuck = 0
+        for _ in range(MAZES):
+            opened = make_maze(rows, cols, rnd, loops=rows * cols // 10)
+            exit_pos = (rows - 1, cols - 1)
+            dfs = run_dfs(World(rows, cols, opened), exit_pos)
+            first, explored, fast, updates = run_flood(World(rows, cols, opened), exit_pos)
+            if dfs is None:
+                stuck += 1
+                continue
+            # Averages only over the mazes both solvers finish
+            dfs_total += dfs
+            for i, v in enumerate((first, explored, fast, updates)):
+                totals[i] += v
+        n = max(1, MAZES - stuck)
+        print("%-7s %8.1f %6d %10.1f %10.1f %8.1f %8d" % (
+            "%dx%d" % (rows, cols), dfs_total / n / 1000, stuck, totals[0] / n / 1000,
+            totals[1] / n / 1000, totals[2] / n / 1000, totals[3] // n))
+
+
+if __name__ == "__main__":
+    main()
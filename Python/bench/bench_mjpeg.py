@@ -0,0 +1,306 @@
+# MJPEG streaming with several viewers: Cam.py's old camera_server (one
+# client at a time, three blocking sends per frame, capture as fast as the
+# camera goes) versus snowflake_hal.mjpeg.MJPEGServer, both fed by the fake
+# camera in host/camera.py. Three viewers read as fast as they can and a
+# fourth reads at ~50 kB/s; send buffers are shrunk to 4 kB so a slow
+# reader pushes back the way it does over Wi-Fi.
+# The last run adds dashboards polling /snapshot.jpg next to two viewers:
+# stills come out of the same FrameSlot as the stream, so the capture rate
+# should stay at max_fps instead of adding one capture per poll.
+# Then 20 connections that never send a request: past max_connections the
+# server closes new ones at once, and the idle ones are dropped after
+# REQUEST_TIMEOUT_MS so a viewer gets in again. Last, one of max_clients
+# viewers stops reading without closing (a phone put in the background):
+# it is dropped after SEND_TIMEOUT_MS and a new viewer takes its slot.
+# Run: python3 Python/bench/bench_mjpeg.py
+import _host
+import json
+import socket
+import threading
+import time
+from urllib.request import urlopen
+
+import camera # type: ignore
+from snowflake_hal.mjpeg import MJPEGServer, MAX_CLIENTS, REQUEST_TIMEOUT_MS, SEND_TIMEOUT_MS
+
+SECONDS = 3
+FAST_VIEWERS = 3
+SNDBUF = 4096
+MAX_FPS = 15
+SOI = b"\xff\xd8\xff\xfe"
+
+
+def legacy_server(port, stop):
+    """camera_server() from Cam.py, with a stop flag instead of camera_running."""
+    s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(("127.0.0.1", port))
+    s.listen(1)
+    s.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            c, a = s.accept()
+        except socket.timeout:
+            continue
+        c.settimeout(None)
+        c.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNDBUF)
+        req = c.recv(1024)
+        if b"/stream" in req:
+            c.send(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=frame\r\n\r\n")
+            while not stop.is_set():
+                f = camera.capture()
+                if not f or isinstance(f, int): continue
+                try:
+                    c.send(b"--frame\r\nContent-Type: image/jpeg\r\n\r\n")
+                    c.send(f); c.send(b"\r\n")
+                except OSError: break
+        c.close()
+    s.close()
+
+
+class SmallBufferServer(MJPEGServer):
+    def _add_client(self, sock, addr):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNDBUF)
+        return super()._add_client(sock, addr)
+
+
+def new_server(port, stop):
+    SmallBufferServer(camera, port=port, max_fps=MAX_FPS).run(lambda: not stop.is_set(), "127.0.0.1")
+
+
+class Viewer(threading.Thread):
+    """Reads /stream and checks every JPEG that arrives is whole."""
+
+    def __init__(self, port, stop, chunk=65536, pause=0.0, stall_after=None):
+        super().__init__(daemon=True)
+        self.port = port
+        self.stop = stop
+        self.chunk = chunk
+        self.pause = pause
+        self.stall_after = stall_after      # seconds until it stops reading but stays connected
+        self.frames = []
+        self.bytes = 0
+        self.broken = 0
+        self.error = ""
+
+    def run(self):
+        try:
+            self.watch()
+        except OSError as e:
+            self.error = e.strerror or str(e)
+
+    def watch(self):
+        s = socket.create_connection(("127.0.0.1", self.port))
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SNDBUF)
+        s.settimeout(0.2)
+        s.send(b"GET /stream HTTP/1.1\r\nHost: cam\r\n\r\n")
+        buf = b""
+        t0 = time.time()
+        while not self.stop.is_set():
+            if self.stall_after is not None and time.time() - t0 > self.stall_after:
+                self.stop.wait()
+                break
+            try:
+                data = s.recv(self.chunk)
+            except socket.timeout:
+                continue
+            if not data:
+                if not self.stop.is_set():
+                    self.error = "closed"
+                break
+            self.bytes += len(data)
+            buf += data
+            while True:
+                start = buf.find(SOI)
+                end = buf.find(b"\xff\xd9", start)
+                if start < 0 or end < 0:
+                    break
+                n = camera.frame_number(buf[start:end + 2])
+                if n < 0 or not buf[:start].endswith(b"\r\n\r\n"):
+                    self.broken += 1
+                else:
+                    self.frames.append(n)
+                buf = buf[end + 2:]
+            if self.pause:
+                time.sleep(self.pause)
+        s.close()
+
+
+class Poller(threading.Thread):
+    """Fetches /snapshot.jpg every `period` seconds."""
+
+    def __init__(self, port, stop, period=0.1):
+        super().__init__(daemon=True)
+        self.port = port
+        self.stop = stop
+        self.period = period
+        self.frames = []
+        self.ms = []
+        self.broken = 0
+
+    def run(self):
+        while not self.stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with urlopen("http://127.0.0.1:%d/snapshot.jpg" % self.port) as r:
+                    jpeg = r.read()
+                    ok = r.headers["Content-Type"] == "image/jpeg" and int(r.headers["Content-Length"]) == len(jpeg)
+            except OSError:
+                self.broken += 1
+                continue
+            self.ms.append((time.perf_counter() - t0) * 1000)
+            n = camera.frame_number(jpeg)
+            if n < 0 or not ok:
+                self.broken += 1
+            else:
+                self.frames.append(n)
+            time.sleep(self.period)
+
+
+def run_snapshots(pollers=4, viewers=2):
+    camera.init(0)
+    camera.captures = 0
+    port = 18092
+    stop = threading.Event()
+    t = threading.Thread(target=new_server, args=(port, stop), daemon=True)
+    t.start()
+    time.sleep(0.2)
+    watching = [Viewer(port, stop) for _ in range(viewers)]
+    polling = [Poller(port, stop) for _ in range(pollers)]
+    for v in watching + polling:
+        v.start()
+    time.sleep(SECONDS)
+    stats = json.loads(urlopen("http://127.0.0.1:%d/stats" % port).read())
+    stop.set()
+    for v in watching + polling:
+        v.join()
+    t.join()
+    shots = sum(len(p.frames) for p in polling)
+    streamed = max([len(v.frames) for v in watching] or [0])
+    ms = [m for p in polling for m in p.ms]
+    print("MJPEGServer, %d viewers + %d snapshot pollers at 10 Hz: %d captures (%.0f/s)" % (
+        viewers, pollers, camera.captures, camera.captures / SECONDS))
+    print("  viewers %s frames each, %d snapshots (%d distinct frames, %d broken), %.1f ms per snapshot" % (
+        "/".join(str(len(v.frames)) for v in watching), shots,
+        len(set(n for p in polling for n in p.frames)), sum(p.broken for p in polling), sum(ms) / len(ms)))
+    print("  a capture per request would have been %d captures; slot buffers reallocated %d times" % (
+        streamed + shots, stats["reallocs"]))
+
+
+def closed_by_server(s, wait):
+    s.settimeout(wait)
+    try:
+        return s.recv(1) == b""
+    except socket.timeout:
+        return False
+    except ConnectionResetError:    # closed with our request still unread
+        return True
+
+
+def run_idle(idle=20):
+    camera.init(0)
+    port = 18093
+    stop = threading.Event()
+    t = threading.Thread(target=new_server, args=(port, stop), daemon=True)
+    t.start()
+    time.sleep(0.2)
+    held = []
+    for _ in range(idle):
+        # Spaced out so the short listen backlog doesn't make the kernel retry SYNs for a second
+        held.append(socket.create_connection(("127.0.0.1", port)))
+        time.sleep(0.01)
+    time.sleep(0.2)
+    refused = sum(closed_by_server(s, 0.01) for s in held)
+    early = socket.create_connection(("127.0.0.1", port))
+    early.send(b"GET /stream HTTP/1.1\r\nHost: cam\r\n\r\n")
+    early_refused = closed_by_server(early, 0.5)
+    early.close()
+    time.sleep(REQUEST_TIMEOUT_MS / 1000)
+    expired = sum(closed_by_server(s, 0.01) for s in held) - refused
+    late = Viewer(port, stop)
+    late.start()
+    time.sleep(1)
+    stats = json.loads(urlopen("http://127.0.0.1:%d/stats" % port).read())
+    stop.set()
+    late.join()
+    t.join()
+    for s in held:
+        s.close()
+    print("%d idle connections: %d closed at once, %d more after %d ms (server: %d refused, %d timed out)" % (
+        idle, refused, expired, REQUEST_TIMEOUT_MS, stats["refused"], stats["timeouts"]))
+    print("  viewer while they were held: %s; viewer afterwards: %d frames" % (
+        "refused" if early_refused else "served", len(late.frames)))
+
+
+def run_stalled():
+    camera.init(0)
+    port = 18094
+    stop = threading.Event()
+    t = threading.Thread(target=new_server, args=(port, stop), daemon=True)
+    t.start()
+    time.sleep(0.2)
+    viewers = [Viewer(port, stop) for _ in range(MAX_CLIENTS - 1)]
+    stalled = Viewer(port, stop, stall_after=0.5)
+    for v in viewers + [stalled]:
+        v.start()
+    time.sleep(1)
+    blocked = Viewer(port, stop)
+    blocked.run()               # all slots taken: 503, then closed
+    time.sleep(SEND_TIMEOUT_MS / 1000)
+    late = Viewer(port, stop)
+    late.start()
+    time.sleep(1)
+    stats = json.loads(urlopen("http://127.0.0.1:%d/stats" % port).read())
+    stop.set()
+    for v in viewers + [stalled, late]:
+        v.join()
+    t.join()
+    print("%d viewers, one stops reading after 0.5 s: dropped after %d ms (stalled %d)" % (
+        MAX_CLIENTS, SEND_TIMEOUT_MS, stats["stalled"]))
+    print("  new viewer while it held its slot: %d frames; afterwards: %d frames in 1 s" % (
+        len(blocked.frames), len(late.frames)))
+
+
+def run(name, server):
+    camera.init(0)
+    camera.captures = 0
+    port = 18090 if server is legacy_server else 18091
+    stop = threading.Event()
+    t = threading.Thread(target=server, args=(port, stop), daemon=True)
+    t.start()
+    time.sleep(0.2)
+    viewers = [Viewer(port, stop) for _ in range(FAST_VIEWERS)]
+    viewers.append(Viewer(port, stop, chunk=1024, pause=0.02))
+    for v in viewers:
+        v.start()
+        time.sleep(0.05)
+    time.sleep(SECONDS)
+    if server is new_server:
+        stats = json.loads(urlopen("http://127.0.0.1:%d/stats" % port).read())
+    stop.set()
+    for v in viewers:
+        v.join()
+    t.join()
+    print("%s: %d captures (%.0f/s)" % (name, camera.captures, camera.captures / SECONDS))
+    for i, v in enumerate(viewers):
+        kind = "slow" if i == FAST_VIEWERS else "fast"
+        print("  viewer %d %-4s %5d frames %5.1f fps %9d bytes %3d broken  %s" % (
+            i, kind, len(v.frames), len(v.frames) / SECONDS, v.bytes, v.broken, v.error))
+    if server is new_server:
+        print("  /stats: %d captured, slot buffers reallocated %d times" % (stats["captured"], stats["reallocs"]))
+        for c in stats["clients"]:
+            print("    %(addr)-16s %(frames)4d frames %(dropped)4d dropped %(fps)5.1f fps %(bytes)8d bytes" % c)
+
+
+def main():
+    camera.frame_size = 8000
+    camera.capture_ms = 10       # an OV2640 at QVGA manages roughly this
+    run("old camera_server", legacy_server)
+    run("MJPEGServer max_fps=%d" % MAX_FPS, new_server)
+    run_snapshots()
+    run_idle()
+    run_stalled()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# snowflake_hal.msgpack: round-trip checks against the reference msgpack
+# package, then encode/decode timing against the codec that used to be
+# embedded in thonny/Cam.py (copied below as legacy_pack / legacy_unpack).
+# CPython grows a bytes object in place for `out += ...` when nothing else
+# refers to it, which hides the old encoder's quadratic copying here; the
+# "old peak" / "new peak" columns show the memory each pack needed at once,
+# which is what costs time and fragments the heap on MicroPython.
+# The new decoder reads through a memoryview without copying the message;
+# on CPython that makes string-heavy decoding slower than slicing bytes,
+# so "new unpack" is not the number that matters for the board.
+# Needs: pip install msgpack
+# Run: python3 Python/bench/bench_msgpack.py
+import math
+import struct
+import time
+import tracemalloc
+
+import msgpack as reference
+
+import _host
+from snowflake_hal.msgpack import Packer, Unpacker, packb, unpackb
+
+
+def legacy_pack(obj):
+    if obj is None: return b"\xc0"
+    if obj is True: return b"\xc3"
+    if obj is False: return b"\xc2"
+    if isinstance(obj, int):
+        if obj >= 0:
+            if obj <= 0x7f: return bytes([obj])
+            if obj <= 0xff: return b"\xcc"+bytes([obj])
+            if obj <= 0xffff: return b"\xcd"+obj.to_bytes(2,"big")
+            return b"\xce"+obj.to_bytes(4,"big")
+        else:
+            if obj >= -32: return bytes([0xe0+(obj+32)])
+            if obj >= -128: return b"\xd0"+(obj & 0xff).to_bytes(1,"big")
+            return b"\xd1"+(obj & 0xffff).to_bytes(2,"big")
+    if isinstance(obj, str):
+        b = obj.encode(); l=len(b)
+        if l<32: return bytes([0xa0|l])+b
+        return b"\xd9"+bytes([l])+b
+    if isinstance(obj, bytes):
+        l=len(obj)
+        return b"\xc4"+bytes([l])+obj
+    if isinstance(obj, list):
+        l=len(obj); out=b""
+        for x in obj: out+=legacy_pack(x)
+        if l<16: return bytes([0x90|l])+out
+        return b"\xdc"+l.to_bytes(2,"big")+out
+    if isinstance(obj, dict):
+        l=len(obj); out=b""
+        for k,v in obj.items(): out+=legacy_pack(k)+legacy_pack(v)
+        if l<16: return bytes([0x80|l])+out
+        return b"\xde"+l.to_bytes(2,"big")+out
+    return b""
+
+
+def legacy_unpack(buf):
+    i=0
+    def R(n):
+        nonlocal i; d=buf[i:i+n]; i+=n; return d
+    def O():
+        nonlocal i
+        c=buf[i]; i+=1
+        if c<=0x7f: return c
+        if 0xe0<=c<=0xff: return c-0x100
+        if 0xa0<=c<=0xbf: l=c&0x1f; return R(l).decode()
+        if 0x80<=c<=0x8f: l=c&0xf; return {O():O() for _ in range(l)}
+        if 0x90<=c<=0x9f: l=c&0xf; return [O() for _ in range(l)]
+        if c==0xc0: return None
+        if c==0xc3: return True
+        if c==0xc2: return False
+        if c==0xcc: return R(1)[0]
+        if c==0xcd: return int.from_bytes(R(2),"big")
+        if c==0xd0: return int.from_bytes(R(1),"big",signed=True)
+        if c==0xd1: return int.from_bytes(R(2),"big",signed=True)
+        if c==0xd9: l=R(1)[0]; return R(l).decode()
+        if c==0xc4: l=R(1)[0]; return R(l)
+        if c==0xdc: l=int.from_bytes(R(2),"big"); return [O() for _ in range(l)]
+        if c==0xde: l=int.from_bytes(R(2),"big"); return {O():O() for _ in range(l)}
+        return None
+    return O()
+
+
+INT_EDGES = [0, 1, 0x7F, 0x80, 0xFF, 0x100, 0xFFFF, 0x10000, 0xFFFFFFFF, 0x100000000, 2 ** 64 - 1,
+             -1, -32, -33, -128, -129, -32768, -32769, -2 ** 31, -2 ** 31 - 1, -2 ** 63]
+LENGTHS = [0, 1, 15, 16, 31, 32, 255, 256, 65535, 65536]
+
+CASES = [None, True, False, 0.0, -1.5, 1e300, math.pi, "", "ü€", {"": []}, [[], {}], (1, 2)]
+CASES += INT_EDGES
+CASES += ["x" * n for n in LENGTHS]
+CASES += [bytes(range(256)) * (n // 256) + bytes(n % 256) for n in LENGTHS]
+CASES += [list(range(n)) for n in LENGTHS]
+CASES += [{"k%d" % i: i for i in range(n)} for n in LENGTHS]
+CASES += [{"mode": "IMU_RAW", "data": {"ax": 0.123, "ay": -0.98}}]
+
+MESSAGES = {
+    "gesture": {"mode": "Board", "program": {"loop": {"0": {"MExBo": {"gesture": "forward"}}}}},
+    "ints x100": list(range(-50, 50)),
+    "strs x1000": ["cell%d" % i for i in range(1000)],
+    "map x5000": {"k%d" % i: i * 7 for i in range(5000)},
+}
+
+
+def same(a, b):
+    """Equality where tuples come back as lists."""
+    if isinstance(a, tuple):
+        a = list(a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    return type(a) is type(b) and a == b
+
+
+def check():
+    packer = Packer(size=16)     # small on purpose: growth is exercised too
+    for obj in CASES:
+        ours = bytes(packer.pack(obj))
+        ref = reference.packb(obj, use_bin_type=True)
+        assert ours == ref, ("encoding differs", repr(obj)[:60])
+        assert same(obj, reference.unpackb(ours, raw=False, strict_map_key=False)), repr(obj)[:60]
+        assert same(obj, unpackb(ref)), repr(obj)[:60]
+    # float32, as sent by the board
+    data = packb({"ax": 0.1}, use_single_float=True)
+    assert data == reference.packb({"ax": 0.1}, use_single_float=True)
+    assert unpackb(data)["ax"] == struct.unpack(">f", struct.pack(">f", 0.1))[0]
+    # Unpacking straight from a bytearray and from the packer's own memoryview
+    assert unpackb(bytearray(ref)) == unpackb(packer.pack(obj))
+    # Two messages back to back in one buffer
+    u = Unpacker(packb(1) + packb("two"))
+    assert (u.unpack(), u.unpack()) == (1, "two")
+    for bad in (b"\xa5ab", b"\xdc\x00\x02\x01", b"\xc1"):
+        try:
+            unpackb(bad)
+        except ValueError:
+            continue
+        raise AssertionError("accepted %r" % bad)
+    print("round trips OK: %d cases against msgpack %s" % (len(CASES), reference.version))
+    print("old codec packed floats as %r" % legacy_pack(0.123))
+
+
+def timeit(fn, min_time=0.2):
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        t = time.perf_counter() - t0
+        if t > min_time:
+            return t * 1e6 / n
+
+
+def allocated(fn):
+    """Peak bytes allocated while running fn() once."""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    check()
+    packer = Packer()
+    print("%-12s %7s %10s %10s %10s %10s %10s %10s" % (
+        "message", "bytes", "old pack", "new pack", "old peak", "new peak", "old unpack", "new unpack"))
+    for name, msg in MESSAGES.items():
+        data = bytes(packer.pack(msg))   # also grows the packer's buffer to size once
+        t_old_p = timeit(lambda: legacy_pack(msg))
+        t_new_p = timeit(lambda: packer.pack(msg))
+        a_old = allocated(lambda: legacy_pack(msg))
+        a_new = allocated(lambda: packer.pack(msg))
+        t_old_u = timeit(lambda: legacy_unpack(data))
+        t_new_u = timeit(lambda: unpackb(data))
+        print("%-12s %7d %8.0fus %8.0fus %10d %10d %8.0fus %8.0fus" % (
+            name, len(data), t_old_p, t_new_p, a_old, a_new, t_old_u, t_new_u))
+
+
+if __name__ == "__main__":
+    main()
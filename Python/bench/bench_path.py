@@ -0,0 +1,50 @@
+# Path execution time: one F per cell (with a stop after each) versus
+# run-length motion programs. Times use the receiver's timing constants.
+# Run: python3 Python/bench/bench_path.py
+import _host
+from snowflake_hal.route import path_commands, motion_program
+
+# Snowflake_Path_Receiver timings (ms)
+CELL_MS = 1000
+TURN_90_MS = 500
+SETTLE_MS = 500
+
+
+def per_cell_ms(commands):
+    """Old receiver: every F/L/R is its own move followed by a 0.5 s stop."""
+    return sum((CELL_MS if c == 'F' else TURN_90_MS) + SETTLE_MS for c in commands)
+
+
+def program_ms(program):
+    total = 0
+    for step in program:
+        arg = int(step[1:])
+        total += (CELL_MS * arg if step[0] == 'F' else TURN_90_MS * abs(arg) // 90) + SETTLE_MS
+    return total
+
+
+def cells(points):
+    return [{'r': r, 'c': c} for r, c in points]
+
+
+PATHS = {
+    "corridor 1x20": cells([(0, c) for c in range(20)]),
+    "L-shape 10+10": cells([(r, 0) for r in range(10, -1, -1)] + [(0, c) for c in range(1, 11)]),
+    "snake 5x8": cells([(r, c if r % 2 == 0 else 7 - c) for r in range(4, -1, -1) for c in range(8)]),
+    "staircase 10": cells([(10 - i // 2 - i % 2, i // 2) for i in range(20)]),
+    "U-turn 6+6": cells([(r, 0) for r in range(6, -1, -1)] + [(r, 0) for r in range(1, 7)]),
+}
+
+
+def main():
+    print("%-16s %6s %6s %9s %9s %7s" % ("path", "steps", "prog", "old s", "new s", "saved"))
+    for name, path in PATHS.items():
+        commands = path_commands(path)
+        program = motion_program(commands)
+        old = per_cell_ms(commands) / 1000
+        new = program_ms(program) / 1000
+        print("%-16s %6d %6d %9.1f %9.1f %6.0f%%" % (name, len(commands), len(program), old, new, 100 * (1 - new / old)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# On-board route planning: GridPlanner (turn-aware A*) planning time versus
+# grid size, and how long the robot takes to drive its route compared with a
+# plain BFS shortest path. Grids have ~20% random walls, start in one corner
+# and goal in the opposite one. Drive times use the Path receiver's constants.
+# Run: python3 Python/bench/bench_planner.py
+import random
+import time
+
+import _host
+from snowflake_hal.planner import GridPlanner, bfs
+from snowflake_hal.route import path_commands, motion_program
+
+CELL_MS = 1000
+TURN_90_MS = 500
+SETTLE_MS = 500
+RUNS = 20
+
+
+def program_ms(program):
+    total = 0
+    for step in program:
+        arg = int(step[1:])
+        total += (CELL_MS * arg if step[0] == 'F' else TURN_90_MS * abs(arg) // 90) + SETTLE_MS
+    return total
+
+
+def random_grid(n, rnd):
+    while True:
+        blocked = {(rnd.randrange(n), rnd.randrange(n)) for _ in range(n * n // 5)}
+        blocked -= {(n - 1, 0), (0, n - 1)}
+        if bfs(n, n, blocked, (n - 1, 0), (0, n - 1)):
+            return blocked
+
+
+def main():
+    rnd = random.Random(1)
+    print("%-6s %9s %9s %9s %8s %8s %7s" % ("grid", "A* ms", "BFS ms", "expanded", "BFS s", "A* s", "saved"))
+    for n in (8, 16, 24, 32):
+        t_plan = t_bfs = expanded = drive_bfs = drive_plan = 0
+        for _ in range(RUNS):
+            blocked = random_grid(n, rnd)
+            start, goal = (n - 1, 0), (0, n - 1)
+            planner = GridPlanner(n, n)
+            for r, c in blocked:
+                planner.block(r, c)
+
+            t0 = time.perf_counter()
+            cells, commands = planner.plan(start, goal)
+            t1 = time.perf_counter()
+            path = bfs(n, n, blocked, start, goal)
+            t2 = time.perf_counter()
+
+            t_plan += t1 - t0
+            t_bfs += t2 - t1
+            expanded += planner.expanded
+            drive_plan += program_ms(motion_program(commands))
+            drive_bfs += program_ms(motion_program(path_commands([{'r': r, 'c': c} for r, c in path])))
+        print("%-6s %9.2f %9.2f %9d %8.1f %8.1f %6.0f%%" % (
+            "%dx%d" % (n, n), 1000 * t_plan / RUNS, 1000 * t_bfs / RUNS, expanded // RUNS,
+            drive_bfs / RUNS / 1000, drive_plan / RUNS / 1000, 100 * (1 - drive_plan / drive_bfs)))
+
+
+if __name__ == "__main__":
+    main()
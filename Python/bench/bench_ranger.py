@@ -0,0 +1,68 @@
+# Control-loop rate with a blocking ultrasonic read versus the IRQ-driven Ranger.
+# Each loop pass reads the IR pair, like the line followers do.
+# Run: python3 Python/bench/bench_ranger.py
+import _host
+import time
+import Subu # type: ignore
+from hcsr04 import FakeSonar # type: ignore
+from snowflake_hal.ultrasonic import Ultrasonic
+from snowflake_hal.ir import IRSensor
+from snowflake_hal.ranger import Ranger, RangerScheduler
+
+RUN_S = 1.0
+DISTANCE_CM = 80.0
+
+
+def run(name, read_distance, update=None):
+    ir = IRSensor(Subu.IO1, Subu.IO4)
+    loops = 0
+    last = None
+    t_end = time.perf_counter() + RUN_S
+    while time.perf_counter() < t_end:
+        if update:
+            update()
+        last = read_distance()
+        ir.read()
+        loops += 1
+        time.sleep(0)  # let the fake sensor's timer threads run
+    print("  %-9s %7d loops/s  last distance %.1f cm" % (name, loops / RUN_S, last))
+
+
+def main():
+    print("control loop rate, target at %.0f cm" % DISTANCE_CM)
+    sonar = FakeSonar(Subu.IO2, Subu.IO3, DISTANCE_CM)
+    blocking = Ultrasonic(Subu.IO2, Subu.IO3)
+    run("blocking", blocking.get_distance_cm)
+
+    ranger = Ranger(Subu.IO2, Subu.IO3, interval_ms=30)
+    sonar.pings = 0
+    run("ranger", ranger.distance_cm, ranger.update)
+    time.sleep(0.05)
+    print("  ranger: %d pings, %d readings, %d timeouts, age %d ms"
+          % (sonar.pings, ranger.readings, ranger.timeouts, ranger.age_ms()))
+
+    sonar.set_distance(None)
+    time.sleep(0.1)
+    ranger.update()
+    time.sleep(0.04)
+    ranger.update()
+    assert ranger.distance_cm() == -1, ranger.distance_cm()
+
+    print("three sensors, front pinged twice per round, 10 ms gap")
+    FakeSonar(Subu.IO5, Subu.IO6, 40.0)
+    FakeSonar(Subu.IO7, Subu.IO8, 25.0)
+    sched = RangerScheduler(gap_ms=10, window_ms=500)
+    sched.add("front", Subu.IO2, Subu.IO3)
+    sched.add("left", Subu.IO5, Subu.IO6)
+    sched.add("right", Subu.IO7, Subu.IO8)
+    sched.set_order(("front", "left", "front", "right"))
+    sonar.set_distance(DISTANCE_CM)
+    run("scheduler", lambda: sched.distance_cm("front"), sched.update)
+    print("  aggregate %.1f Hz" % sched.refresh_hz)
+    for name in ("front", "left", "right"):
+        print("  %-5s %6.1f cm  ~%.1f Hz  age %d ms"
+              % (name, sched.distance_cm(name), sched.sensor_hz(name), sched.age_ms(name)))
+
+
+if __name__ == "__main__":
+    main()
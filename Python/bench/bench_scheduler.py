@@ -0,0 +1,48 @@
+# Achieved loop rate: sleep_ms pacing versus the deadline-based Scheduler.
+# The "work" stands in for sensing/deciding and costs about 1.5 ms per pass.
+# Run: python3 Python/bench/bench_scheduler.py
+import _host
+import time
+from snowflake_hal.scheduler import Scheduler
+
+RUN_MS = 2000
+WORK_US = 1500
+
+
+def work():
+    t_end = time.perf_counter() + WORK_US / 1000000
+    while time.perf_counter() < t_end:
+        pass
+
+
+def sleep_paced():
+    loops = 0
+    t_end = time.ticks_ms() + RUN_MS
+    while time.ticks_diff(t_end, time.ticks_ms()) > 0:
+        work()
+        time.sleep_ms(5)
+        loops += 1
+    return loops * 1000 / RUN_MS
+
+
+def main():
+    print("target 200 Hz, %.1f ms of work per pass" % (WORK_US / 1000))
+    print("  sleep_ms(5) pacing : %6.1f Hz" % sleep_paced())
+
+    sched = Scheduler()
+    sched.add("control", work, 5, priority=2)
+    sched.add("telemetry", lambda: None, 200)
+    sched.run(RUN_MS)
+    control = sched.get("control")
+    print("  Scheduler          : %6.1f Hz" % (control.runs * 1000 / RUN_MS))
+    sched.report()
+
+    print("overloaded: 6 ms of work in a 5 ms slot")
+    sched = Scheduler()
+    sched.add("control", lambda: time.sleep(0.006), 5)
+    sched.run(500)
+    sched.report()
+
+
+if __name__ == "__main__":
+    main()
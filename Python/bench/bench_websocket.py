@@ -0,0 +1,103 @@
+# WebSocketClient (snowflake_hal.websocket) against the WebServer endpoint:
+# checks frames of every length class both ways, fragmentation and pings,
+# then times masking (old per-byte loop vs the chunked XOR used on CPython;
+# the board uses a viper loop, which cannot run here) and echo round trips
+# for message sizes the old Cam.py client could not send (>125 bytes).
+# Run: python3 Python/bench/bench_websocket.py
+import _host
+import asyncio
+import os
+import threading
+import time
+
+from snowflake_hal.web import WebServer
+from snowflake_hal import websocket
+
+PORT = 8771
+
+
+def legacy_mask(payload, key):
+    data = bytearray(payload)
+    for i in range(len(data)):
+        data[i] ^= key[i & 3]
+    return data
+
+
+def serve(ready):
+    app = WebServer()
+
+    @app.websocket("/")
+    async def echo(ws):
+        try:
+            while True:
+                opcode, payload = await ws.recv()
+                if payload == b"ping":
+                    # A ping in the middle of a fragmented message
+                    await ws.send(b"1", websocket.OP_PING)
+                    ws.writer.write(b"\x02\x03abc\x89\x01p\x80\x02de")
+                    await ws.writer.drain()
+                    continue
+                await ws.send(payload, opcode)
+        except (websocket.WebSocketClosed, OSError, EOFError):
+            pass
+
+    async def main():
+        await asyncio.start_server(app._handle, "127.0.0.1", PORT)
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def check(ws):
+    for n in (0, 1, 125, 126, 127, 1000, 4096):
+        data = os.urandom(n)
+        ws.send(data)
+        opcode, payload = ws.recv()
+        assert opcode == websocket.OP_BINARY and payload == data, n
+    ws.send("text ü")
+    assert ws.recv()[1] == "text ü".encode()
+    ws.max_frame = 100
+    data = os.urandom(1000)
+    ws.send(data)                        # ten fragments, reassembled by the server
+    assert ws.recv()[1] == data
+    ws.max_frame = None
+    ws.send(b"ping")
+    assert ws.recv()[1] == b"abcde"       # pong sent, fragments reassembled
+    for n in range(64):
+        data, key = os.urandom(n), os.urandom(4)
+        assert websocket._mask(data, key) == legacy_mask(data, key)
+    print("frames OK: lengths 0..4096, text, fragments both ways, ping/pong")
+
+
+def timeit(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / n
+
+
+def main():
+    ready = threading.Event()
+    threading.Thread(target=serve, args=(ready,), daemon=True).start()
+    ready.wait()
+    ws = websocket.connect("ws://127.0.0.1:%d/" % PORT)
+    check(ws)
+
+    key = os.urandom(4)
+    print("%6s %12s %12s %12s" % ("bytes", "old mask", "new mask", "round trip"))
+    for n in (16, 125, 1024, 4096):
+        data = os.urandom(n)
+        t_old = timeit(lambda: legacy_mask(data, key), 200)
+        t_new = timeit(lambda: websocket._mask(data, key), 200)
+
+        def echo():
+            ws.send(data)
+            ws.recv()
+        t_rt = timeit(echo, 200)
+        print("%6d %10.1fus %10.1fus %10.1fus" % (n, t_old, t_new, t_rt))
+    ws.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Command latency under parallel clients: the old blocking accept/recv loop
+# versus snowflake_hal.web.WebServer. Page loaders hammer "/", one slow client
+# holds an idle socket open, and a "driver" measures how long /?cmd=S takes.
+# Run: python3 Python/bench/load_http.py
+import _host
+import socket
+import threading
+import time
+import asyncio
+from machine import UART # type: ignore
+from snowflake_hal.web import WebServer
+
+PAGE = ("<html>" + "x" * 4000 + "</html>")
+PAGE_LOADERS = 4
+COMMANDS = 40
+SLOW_CLIENT_S = 0.5
+
+
+def legacy_server(port, uart, stop):
+    """The accept/recv/sendall loop from Snowflake_RC_Sender.py."""
+    s = socket.socket()
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(("127.0.0.1", port))
+    s.listen(1)
+    s.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            conn, addr = s.accept()
+        except socket.timeout:
+            continue
+        try:
+            conn.settimeout(None)
+            request_str = conn.recv(1024).decode('utf-8')
+            cmd_start = request_str.find('/?cmd=')
+            if cmd_start != -1:
+                cmd_end = request_str.find(' ', cmd_start)
+                uart.write(request_str[cmd_start + 6:cmd_end] + '\n')
+            conn.send(b'HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
+            conn.sendall(PAGE.encode())
+        except OSError:
+            pass
+        conn.close()
+    s.close()
+
+
+def async_server(port, uart, stop):
+    app = WebServer()
+
+    @app.route("/")
+    def index(req):
+        command = req.query.get("cmd")
+        if command:
+            uart.write(command + '\n')
+            return (200, "text/plain", "OK")
+        return PAGE
+
+    async def main():
+        # Idle keep-alive handlers get cancelled at shutdown; that is expected.
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: None)
+        server = await asyncio.start_server(app._handle, "127.0.0.1", port, backlog=16)
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        server.close()
+
+    asyncio.run(main())
+
+
+def http_get(port, path, sock=None):
+    """One GET; reuses sock when given (keep-alive). Returns the socket or None."""
+    own = sock is None
+    if own:
+        sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(("GET %s HTTP/1.1\r\nHost: x\r\n%s\r\n" % (path, "Connection: close\r\n" if own else "")).encode())
+    data = b""
+    while True:
+        chunk = sock.recv(8192)
+        if not chunk:
+            break
+        data += chunk
+        head, sep, body = data.partition(b"\r\n\r\n")
+        if not sep:
+            head, sep, body = data.partition(b"\n\n")
+        if sep:
+            length = None
+            for line in head.split(b"\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            if length is not None and len(body) >= length:
+                break
+    if own:
+        sock.close()
+        return None
+    return sock
+
+
+def page_loader(port, stop):
+    while not stop.is_set():
+        try:
+            http_get(port, "/")
+        except OSError:
+            pass
+
+
+def slow_client(port, stop):
+    while not stop.is_set():
+        try:
+            s = socket.create_connection(("127.0.0.1", port))
+            time.sleep(SLOW_CLIENT_S)  # browsers pre-open idle sockets like this
+            s.sendall(b"GET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+            s.recv(65536)
+            s.close()
+        except OSError:
+            pass
+
+
+def measure(name, server_fn, port, keep_alive=False):
+    uart = UART(1)
+    stop = threading.Event()
+    threading.Thread(target=server_fn, args=(port, uart, stop), daemon=True).start()
+    time.sleep(0.3)
+    clients = [threading.Thread(target=page_loader, args=(port, stop), daemon=True) for _ in range(PAGE_LOADERS)]
+    clients.append(threading.Thread(target=slow_client, args=(port, stop), daemon=True))
+    for t in clients:
+        t.start()
+    time.sleep(0.2)
+
+    lat = []
+    sock = socket.create_connection(("127.0.0.1", port)) if keep_alive else None
+    for _ in range(COMMANDS):
+        t0 = time.perf_counter()
+        sock = http_get(port, "/?cmd=S", sock)
+        lat.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.01)
+    if sock:
+        sock.close()
+    stop.set()
+    time.sleep(0.4)
+    lat.sort()
+    print("  %-22s median %7.1f ms  p90 %7.1f ms  max %7.1f ms  (%d commands reached UART)"
+          % (name, lat[len(lat) // 2], lat[int(len(lat) * 0.9)], lat[-1], uart.tx.count(b"S\n")))
+
+
+def main():
+    print("/?cmd=S latency with %d page loaders and one slow client" % PAGE_LOADERS)
+    measure("legacy blocking loop", legacy_server, 8071)
+    measure("WebServer", async_server, 8072)
+    measure("WebServer keep-alive", async_server, 8073, keep_alive=True)
+
+
+if __name__ == "__main__":
+    main()
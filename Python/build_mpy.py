@@ -0,0 +1,32 @@
+# Precompiles snowflake_hal to .mpy so the board skips parsing it at import time.
+# Needs mpy-cross matching the board firmware: pip install mpy-cross
+# Run: python3 Python/build_mpy.py   -> Python/build/snowflake_hal/*.mpy
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = "snowflake_hal"
+
+
+def main():
+    src = os.path.join(HERE, PACKAGE)
+    out = os.path.join(HERE, "build", PACKAGE)
+    os.makedirs(out, exist_ok=True)
+    for name in sorted(os.listdir(src)):
+        if name.endswith(".txt"):
+            # Data files such as icons.txt are copied as they are
+            with open(os.path.join(src, name)) as f, open(os.path.join(out, name), "w") as g:
+                g.write(f.read())
+            continue
+        if not name.endswith(".py"):
+            continue
+        target = os.path.join(out, name[:-3] + ".mpy")
+        cmd = ["mpy-cross", "-o", target, os.path.join(src, name)]
+        print(" ".join(cmd))
+        if subprocess.call(cmd) != 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
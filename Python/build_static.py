@@ -0,0 +1,59 @@
+# Pre-renders the sender web pages and gzips them for snowflake_hal.static.
+# The HTML is taken from get_web_page_html() in each script without running
+# the script (no Wi-Fi or UART needed on the PC).
+# Run: python3 Python/build_static.py
+#   -> Python/build/www/<page>.gz   upload the www folder to the board, or
+#   -> Python/build/www_pages.py    upload/freeze it into the firmware instead
+import ast
+import gzip
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+# page name -> script that holds its get_web_page_html()
+PAGES = {
+    "rc.html": "Python/Venkat/Snowflake_RC_Sender.py",
+    "path.html": "Python/Venkat/Snowflake_Path_sender.py",
+    "measure.html": "Python/Venkat/Snowflake_measure_Sender.py",
+    "watchman.html": "Python/Venkat/Snowflake_Watchman_Sender.py",
+    "wifi.html": "thonny/Snowflake_WiFi_Sender.py",
+}
+
+
+def extract_html(path, func="get_web_page_html"):
+    """Returns the string literal returned by func in the script at path."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == func:
+            for stmt in node.body:
+                if isinstance(stmt, ast.Return):
+                    return ast.literal_eval(stmt.value)
+    raise ValueError("%s: no literal return in %s()" % (path, func))
+
+
+def main():
+    out = os.path.join(HERE, "build", "www")
+    os.makedirs(out, exist_ok=True)
+    pages = {}
+    for name, script in PAGES.items():
+        html = extract_html(os.path.join(ROOT, script)).encode("utf-8")
+        # mtime=0 keeps the output (and so the ETag) identical between builds
+        data = gzip.compress(html, compresslevel=9, mtime=0)
+        with open(os.path.join(out, name + ".gz"), "wb") as f:
+            f.write(data)
+        pages[name] = data
+        print("%-14s %6d -> %5d bytes  (%s)" % (name, len(html), len(data), script))
+
+    with open(os.path.join(HERE, "build", "www_pages.py"), "w") as f:
+        f.write("# Generated by build_static.py - do not edit.\n")
+        f.write("PAGES = {\n")
+        for name, data in pages.items():
+            f.write("    %r: %r,\n" % (name, data))
+        f.write("}\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
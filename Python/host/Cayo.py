@@ -0,0 +1,23 @@
+# Host-side stand-in for the Cayo (ESP32 bridge) board module.
+
+IO1 = 1
+IO2 = 2
+IO3 = 3
+IO4 = 4
+IO5 = 5
+IO6 = 6
+IO7 = 7
+IO8 = 8
+IO9 = 9
+IO10 = 10
+IO11 = 11
+IO12 = 12
+IO13 = 13
+IO14 = 14
+IO15 = 15
+IO16 = 16
+IO17 = 17
+IO18 = 18
+IO19 = 19
+IO20 = 20
+IO21 = 21
@@ -0,0 +1,50 @@
+# Host-side stand-in for the Snowflake board module.
+# IOn constants map to plain integers; LED writes are recorded in `leds` and
+# counted in `led_calls` so benchmarks can compare driver traffic.
+
+NUM_LEDS = 48
+
+IO1 = 1
+IO2 = 2
+IO3 = 3
+IO4 = 4
+IO5 = 5
+IO6 = 6
+IO7 = 7
+IO8 = 8
+IO9 = 9
+IO10 = 10
+IO11 = 11
+IO12 = 12
+IO13 = 13
+IO14 = 14
+IO15 = 15
+IO16 = 16
+IO17 = 17
+IO18 = 18
+IO19 = 19
+IO20 = 20
+IO21 = 21
+
+leds = [(0, 0, 0)] * (NUM_LEDS + 1)  # index 0 unused, LEDs are 1-based
+led_calls = 0
+
+
+def setSingleLED(index, color):
+    global led_calls
+    led_calls += 1
+    leds[index] = tuple(color)
+
+
+def setAllLED(color):
+    global led_calls
+    led_calls += 1
+    for i in range(1, NUM_LEDS + 1):
+        leds[i] = tuple(color)
+
+
+def reset():
+    global led_calls
+    led_calls = 0
+    for i in range(NUM_LEDS + 1):
+        leds[i] = (0, 0, 0)
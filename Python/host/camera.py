@@ -0,0 +1,69 @@
+# Host-side stand-in for the ESP32-CAM `camera` module.
+# capture() returns a small but well-formed JPEG blob (SOI, a comment
+# segment holding the frame number, filler, EOI) so stream and snapshot
+# code can be run and checked on Linux. frame_size and capture_ms can be
+# changed to mimic bigger frames or a slower sensor.
+import struct
+import time
+
+FRAME_96X96 = 0
+FRAME_QQVGA = 1
+FRAME_QCIF = 2
+FRAME_HQVGA = 3
+FRAME_240X240 = 4
+FRAME_QVGA = 5
+FRAME_CIF = 6
+FRAME_VGA = 8
+FRAME_SVGA = 9
+
+JPEG = 4
+
+frame_size = 8000       # bytes per JPEG
+capture_ms = 0          # time one capture() takes
+captures = 0
+_ready = False
+_framesize = FRAME_QVGA
+
+
+def init(*args, **kw):
+    global _ready
+    _ready = True
+    return True
+
+
+def deinit():
+    global _ready
+    _ready = False
+
+
+def framesize(size=None):
+    global _framesize
+    if size is None:
+        return _framesize
+    _framesize = size
+
+
+def quality(q=None):
+    return 12
+
+
+def capture():
+    """A JPEG of frame_size bytes whose comment segment says which frame it is."""
+    global captures
+    if not _ready:
+        return False
+    if capture_ms:
+        time.sleep(capture_ms / 1000)
+    captures += 1
+    comment = b"frame %d" % captures
+    head = b"\xff\xd8\xff\xfe" + struct.pack(">H", len(comment) + 2) + comment
+    filler = max(0, frame_size - len(head) - 2)
+    return head + b"\x00" * filler + b"\xff\xd9"
+
+
+def frame_number(jpeg):
+    """The number capture() wrote into jpeg, or -1 if it is not one of ours."""
+    if jpeg[:4] != b"\xff\xd8\xff\xfe" or jpeg[-2:] != b"\xff\xd9":
+        return -1
+    n = struct.unpack(">H", jpeg[4:6])[0]
+    return int(bytes(jpeg[6:4 + n]).split()[1])
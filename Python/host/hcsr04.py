@@ -0,0 +1,36 @@
+# Fake HC-SR04 for the host: watches the trigger pin and, after each trigger
+# pulse, raises and drops the echo pin from a timer thread so interrupt-driven
+# code sees real edges. Blocking code using time_pulse_us() gets the same
+# pulse width through machine.set_pulse_us().
+import threading
+import machine # type: ignore
+
+ECHO_DELAY_S = 0.00045  # the module waits ~450 us before raising echo
+CM_PER_US = 0.0343 / 2
+
+
+class FakeSonar:
+    def __init__(self, trigger_pin, echo_pin, distance_cm=50.0):
+        self.trigger_pin = trigger_pin
+        self.echo_pin = echo_pin
+        self.pings = 0
+        self.set_distance(distance_cm)
+        machine.watch(trigger_pin, self._on_trigger)
+
+    def set_distance(self, cm):
+        """Sets the simulated target distance; None = nothing in range (no echo)."""
+        self.distance_cm = cm
+        machine.set_pulse_us(self.echo_pin, -2 if cm is None else int(cm / CM_PER_US))
+
+    def _on_trigger(self, value):
+        if value:
+            return
+        self.pings += 1
+        if self.distance_cm is None:
+            return
+        width_s = self.distance_cm / CM_PER_US / 1000000
+        threading.Timer(ECHO_DELAY_S, self._echo, (1,)).start()
+        threading.Timer(ECHO_DELAY_S + width_s, self._echo, (0,)).start()
+
+    def _echo(self, level):
+        machine.set_level(self.echo_pin, level)
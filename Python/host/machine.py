@@ -0,0 +1,210 @@
+# Host-side stand-in for MicroPython's `machine` module.
+# Put Python/host on sys.path (see bench/) to run snowflake_hal code on Linux.
+# Pins keep their level in a shared table so a test can drive inputs with
+# set_level() and read back what the code wrote to outputs.
+import time
+
+# --- MicroPython time extensions missing from CPython ---
+if not hasattr(time, "ticks_ms"):
+    _t0 = time.perf_counter()
+
+    def _ticks_us():
+        return int((time.perf_counter() - _t0) * 1000000)
+
+    time.ticks_us = _ticks_us
+    time.ticks_ms = lambda: _ticks_us() // 1000
+    time.ticks_diff = lambda a, b: a - b
+    time.ticks_add = lambda a, b: a + b
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+
+_levels = {}
+_irq = {}
+_pulse_us = {}
+_watch = {}
+_i2c_devices = {}
+call_count = 0
+
+
+def set_level(pin_id, value):
+    """Sets an input pin's level and fires any matching IRQ handler."""
+    old = _levels.get(pin_id, 0)
+    _levels[pin_id] = value
+    handler, trigger, pin = _irq.get(pin_id, (None, 0, None))
+    if handler and old != value:
+        if (value and trigger & Pin.IRQ_RISING) or (not value and trigger & Pin.IRQ_FALLING):
+            handler(pin)
+
+
+def set_pulse_us(pin_id, us):
+    """Sets the pulse width time_pulse_us() reports for pin_id (negative = timeout)."""
+    _pulse_us[pin_id] = us
+
+
+def watch(pin_id, callback):
+    """Calls callback(value) whenever code writes pin_id (used by fake sensors)."""
+    _watch[pin_id] = callback
+
+
+def add_i2c_device(addr, device):
+    """Attaches a fake I2C device; it needs read(reg, n) -> bytes and write(reg, data)."""
+    _i2c_devices[addr] = device
+
+
+def reset():
+    global call_count
+    _levels.clear(); _irq.clear(); _pulse_us.clear(); _watch.clear(); _i2c_devices.clear()
+    call_count = 0
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 1
+    IRQ_RISING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        if value is not None:
+            _levels[id] = value
+
+    def value(self, v=None):
+        global call_count
+        call_count += 1
+        if v is None:
+            return _levels.get(self.id, 0)
+        _levels[self.id] = 1 if v else 0
+        cb = _watch.get(self.id)
+        if cb:
+            cb(_levels[self.id])
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        _irq[self.id] = (handler, trigger, self)
+
+    def __repr__(self):
+        return "Pin(%r)" % (self.id,)
+
+
+class PWM:
+    def __init__(self, pin, freq=0, duty_u16=0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty_u16
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        global call_count
+        call_count += 1
+        if d is None:
+            return self._duty
+        self._duty = d
+
+    def deinit(self):
+        pass
+
+
+def time_pulse_us(pin, pulse_level, timeout_us=1000000):
+    """Blocks for the configured pulse width (or the timeout), like the real call."""
+    global call_count
+    call_count += 1
+    us = _pulse_us.get(pin.id, -2)
+    time.sleep((us if 0 <= us <= timeout_us else timeout_us) / 1000000)
+    return us if us <= timeout_us else -1
+
+
+class UART:
+    """Loopback-free UART: tx collects written bytes, feed() queues rx bytes."""
+    def __init__(self, id, baudrate=115200, tx=None, rx=None, **kw):
+        self.id = id
+        self.baudrate = baudrate
+        self.tx = bytearray()
+        self.rx = bytearray()
+
+    def feed(self, data):
+        self.rx.extend(data)
+
+    def any(self):
+        return len(self.rx)
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.tx.extend(data)
+        return len(data)
+
+    def read(self, n=None):
+        if not self.rx:
+            return None
+        n = len(self.rx) if n is None else min(n, len(self.rx))
+        out = bytes(self.rx[:n])
+        del self.rx[:n]
+        return out
+
+    def readinto(self, buf, n=None):
+        n = len(buf) if n is None else n
+        n = min(n, len(self.rx))
+        if not n:
+            return None
+        buf[:n] = self.rx[:n]
+        del self.rx[:n]
+        return n
+
+    def readline(self):
+        i = self.rx.find(b"\n")
+        if i < 0:
+            return self.read()
+        return self.read(i + 1)
+
+
+class I2C:
+    """Register-level I2C talking to devices attached with add_i2c_device()."""
+    def __init__(self, id, scl=None, sda=None, freq=400000):
+        self.id = id
+        self.freq = freq
+        self.transactions = 0
+        self.bytes_read = 0
+
+    def _device(self, addr):
+        if addr not in _i2c_devices:
+            raise OSError(19)  # ENODEV, like a missing ACK
+        self.transactions += 1
+        return _i2c_devices[addr]
+
+    def readfrom_mem(self, addr, reg, n):
+        data = bytes(self._device(addr).read(reg, n))
+        self.bytes_read += n
+        return data
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        buf[:] = self._device(addr).read(reg, len(buf))
+        self.bytes_read += len(buf)
+
+    def writeto_mem(self, addr, reg, data):
+        self._device(addr).write(reg, bytes(data))
+
+    def scan(self):
+        return sorted(_i2c_devices)
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
@@ -0,0 +1,31 @@
+# Host-side stand-in for MicroPython's `neopixel` module.
+
+
+class NeoPixel:
+    ORDER = (1, 0, 2, 3)  # GRB, like the firmware default
+
+    def __init__(self, pin, n, bpp=3, timing=1):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.writes = 0
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, v):
+        o = i * self.bpp
+        for j in range(self.bpp):
+            self.buf[o + self.ORDER[j]] = v[j]
+
+    def __getitem__(self, i):
+        o = i * self.bpp
+        return tuple(self.buf[o + self.ORDER[j]] for j in range(self.bpp))
+
+    def fill(self, v):
+        for i in range(self.n):
+            self[i] = v
+
+    def write(self):
+        self.writes += 1
@@ -0,0 +1,30 @@
+# Host-side stand-in for MicroPython's `network` module (Wi-Fi is a no-op).
+
+STA_IF = 0
+AP_IF = 1
+
+
+class WLAN:
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._config = {}
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+
+    def config(self, *args, **kw):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kw)
+
+    def connect(self, ssid=None, password=None):
+        self._config["essid"] = ssid
+
+    def isconnected(self):
+        return self._active
+
+    def ifconfig(self):
+        return ("127.0.0.1", "255.0.0.0", "127.0.0.1", "127.0.0.1")
@@ -0,0 +1,5 @@
+# Shared hardware layer for the Subu / Snowflake / Cayo robots.
+# Copy this folder (or the .mpy files built by build_mpy.py) to the board
+# and import the classes from their modules instead of redefining them per
+# script, e.g. `from snowflake_hal.motor import Motor`. Nothing is imported
+# here, so a script that only needs link or websocket doesn't load the rest.
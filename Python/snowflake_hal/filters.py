@@ -0,0 +1,192 @@
+from array import array
+import time
+
+# Streaming filters for range readings. Every stage takes one sample per
+# update() call and returns its current output; buffers are allocated once in
+# __init__, so the filters can run inside the control loop without creating
+# garbage. By convention a negative value (-1) is an invalid reading.
+
+
+class MedianFilter:
+    """Median of the last `window` valid samples."""
+    def __init__(self, window=5):
+        self.window = window
+        self._ring = array('f', [0.0] * window)
+        self._sorted = array('f', [0.0] * window)
+        self._pos = 0
+        self._count = 0
+
+    def reset(self):
+        self._pos = 0
+        self._count = 0
+
+    def update(self, x):
+        if x < 0:
+            return -1 if not self._count else self.value()
+        self._ring[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        if self._count < self.window:
+            self._count += 1
+        return self.value()
+
+    def value(self):
+        n = self._count
+        if not n:
+            return -1
+        s = self._sorted
+        ring = self._ring
+        # Insertion sort into the scratch array; window is small
+        for i in range(n):
+            v = ring[i]
+            j = i - 1
+            while j >= 0 and s[j] > v:
+                s[j + 1] = s[j]
+                j -= 1
+            s[j + 1] = v
+        if n & 1:
+            return s[n >> 1]
+        return (s[(n >> 1) - 1] + s[n >> 1]) / 2
+
+
+class EMAFilter:
+    """Exponential moving average; alpha close to 1 follows the input faster."""
+    def __init__(self, alpha=0.4):
+        self.alpha = alpha
+        self._value = -1.0
+
+    def reset(self):
+        self._value = -1.0
+
+    def update(self, x):
+        if x < 0:
+            return self._value
+        if self._value < 0:
+            self._value = x
+        else:
+            self._value += self.alpha * (x - self._value)
+        return self._value
+
+    def value(self):
+        return self._value
+
+
+class OutlierFilter:
+    """
+    Drops samples that jump more than `max_jump` from the last accepted one.
+    After `max_rejects` rejections in a row the new level is accepted, so a
+    real change (an obstacle appearing) is followed after a few samples.
+    That delay is samples, not time: don't put it in front of an obstacle
+    threshold when readings come seconds apart (use BurstMedian there).
+    """
+    def __init__(self, max_jump=30.0, max_rejects=3, min_value=2.0, max_value=400.0):
+        self.max_jump = max_jump
+        self.max_rejects = max_rejects
+        self.min_value = min_value
+        self.max_value = max_value
+        self._last = -1.0
+        self._rejects = 0
+        self.rejected = 0
+
+    def reset(self):
+        self._last = -1.0
+        self._rejects = 0
+
+    def update(self, x):
+        if x < self.min_value or x > self.max_value:
+            self.rejected += 1
+            return -1
+        if self._last >= 0 and abs(x - self._last) > self.max_jump and self._rejects < self.max_rejects:
+            self._rejects += 1
+            self.rejected += 1
+            return -1
+        self._rejects = 0
+        self._last = x
+        return x
+
+
+class RangeFilter:
+    """
+    Chains filter stages and adds a timeout-to-last-good policy: an invalid
+    result is replaced by the last good output until `hold_ms` has passed
+    without a good sample, after which -1 is returned.
+    """
+    def __init__(self, stages=None, hold_ms=300):
+        if stages is None:
+            stages = (OutlierFilter(), MedianFilter(3))
+        self.stages = tuple(stages)
+        self.hold_ms = hold_ms
+        self._good = -1.0
+        self._good_ms = time.ticks_ms()
+
+    def reset(self):
+        for s in self.stages:
+            s.reset()
+        self._good = -1.0
+
+    def update(self, x):
+        for s in self.stages:
+            x = s.update(x)
+            if x < 0:
+                break
+        now = time.ticks_ms()
+        if x >= 0:
+            self._good = x
+            self._good_ms = now
+            return x
+        if self._good >= 0 and time.ticks_diff(now, self._good_ms) <= self.hold_ms:
+            return self._good
+        return -1
+
+    def value(self):
+        return self._good
+
+    def age_ms(self):
+        """Time since the last good sample."""
+        return time.ticks_diff(time.ticks_ms(), self._good_ms)
+
+
+class BurstMedian:
+    """
+    Median of `n` readings taken back to back by `read()`, with no history
+    kept between calls. One spike in a burst is outvoted, but an obstacle
+    that is really there shows up on the first call after it appears, so
+    this is the one to use for stop/avoid thresholds. Invalid readings are
+    skipped; -1 only if the whole burst was invalid.
+    """
+    def __init__(self, read, n=3, gap_ms=10):
+        self.read = read
+        self.gap_ms = gap_ms
+        self._median = MedianFilter(n)
+
+    def update(self):
+        m = self._median
+        m.reset()
+        x = -1
+        for i in range(m.window):
+            if i:
+                time.sleep_ms(self.gap_ms)   # let the last echo die out
+            x = m.update(self.read())
+        return x
+
+
+class FilteredRanger:
+    """Runs a Ranger's fresh readings through a RangeFilter; reads stay non-blocking."""
+    def __init__(self, ranger, range_filter=None):
+        self.ranger = ranger
+        self.filter = range_filter if range_filter is not None else RangeFilter()
+        self._seen = -1
+        self._value = -1
+
+    def update(self):
+        r = self.ranger
+        r.update()
+        seq = r.readings + r.timeouts
+        if seq != self._seen:
+            self._seen = seq
+            self._value = self.filter.update(r.distance_cm())
+        return self._value
+
+    def distance_cm(self):
+        return self._value
+
+    get_distance_cm = distance_cm
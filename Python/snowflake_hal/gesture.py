@@ -0,0 +1,101 @@
+import math
+
+# Tilt gestures from a stream of accelerometer samples.
+#
+# Every sample goes through a first-order low-pass filter (cutoff_hz), so a
+# single shaky sample cannot flip the gesture. A tilt is entered when the
+# filtered axis passes enter_g and only left again when it falls back below
+# exit_g (hysteresis), and a new gesture has to hold for dwell_ms before it
+# is reported. update() returns the gesture index only when it changes.
+#
+# Works on raw int16 readings: the thresholds are converted to sensor counts
+# once, so the per-sample path is a few multiplications and compares.
+#
+#     engine = GestureEngine(odr_hz=104, scale=ACCEL_SCALE)
+#     messages = gesture_messages(packer)
+#     for i in range(imu.read()):
+#         ax, ay = imu.raw(i)[:2]
+#         g = engine.update(ax, ay)
+#         if g is not None:
+#             ws.send(messages[g])
+
+STOP, FORWARD, BACKWARD, LEFT, RIGHT = 0, 1, 2, 3, 4
+GESTURES = ("stop", "forward", "backward", "left", "right")
+
+
+class GestureEngine:
+    def __init__(self, odr_hz=104, scale=1.0, cutoff_hz=3.0, enter_g=0.6, exit_g=0.4, dwell_ms=120):
+        """
+        :param scale: g per count of the values passed to update() (1.0 for g).
+        :param cutoff_hz: low-pass cutoff; lower is steadier but slower.
+        :param dwell_ms: how long a new gesture must hold before it is reported.
+        """
+        if not 0 < exit_g < enter_g:
+            raise ValueError("need 0 < exit_g < enter_g")
+        self.alpha = 1 - math.exp(-2 * math.pi * cutoff_hz / odr_hz)
+        self.enter = enter_g / scale
+        self.exit = exit_g / scale
+        self.dwell = max(1, dwell_ms * odr_hz // 1000)
+        self.changes = 0
+        self.reset()
+
+    def reset(self):
+        """Forgets the filter and the state; the next settled gesture is reported again."""
+        self.fx = None
+        self.fy = 0.0
+        self.state = -1
+        self._candidate = -1
+        self._count = 0
+
+    def classify(self, x, y):
+        """Gesture for filtered x, y (counts), with hysteresis around the current state."""
+        state = self.state
+        # Stay in a tilt while its axis is still past the exit threshold
+        if state == BACKWARD and y > self.exit:
+            return state
+        if state == FORWARD and y < -self.exit:
+            return state
+        if state == LEFT and x > self.exit:
+            return state
+        if state == RIGHT and x < -self.exit:
+            return state
+        enter = self.enter
+        if y > enter:
+            return BACKWARD
+        if y < -enter:
+            return FORWARD
+        if x > enter:
+            return LEFT
+        if x < -enter:
+            return RIGHT
+        return STOP
+
+    def update(self, ax, ay):
+        """Feeds one sample; returns the new gesture index when it changes, else None."""
+        if self.fx is None:
+            self.fx = float(ax)
+            self.fy = float(ay)
+        else:
+            a = self.alpha
+            self.fx += a * (ax - self.fx)
+            self.fy += a * (ay - self.fy)
+        g = self.classify(self.fx, self.fy)
+        if g == self.state:
+            self._candidate = -1
+            return None
+        if g != self._candidate:
+            self._candidate = g
+            self._count = 0
+        self._count += 1
+        if self._count < self.dwell:
+            return None
+        self.state = g
+        self._candidate = -1
+        self.changes += 1
+        return g
+
+
+def gesture_messages(packer):
+    """The Board message for every gesture, encoded once; a tuple of bytes by gesture index."""
+    return tuple(bytes(packer.pack({"mode": "Board", "program": {"loop": {"0": {"MExBo": {"gesture": name}}}}}))
+                 for name in GESTURES)
@@ -0,0 +1,103 @@
+# Icon registry for the 6x8 LED matrix.
+# Bitmaps are written as 6 rows of 8 bits (MSB = leftmost LED) and compiled
+# once, at import or load time, into `bytes` of the 1-based LED indices that
+# are lit. Drawing an icon is then a loop over its lit pixels only.
+#
+# A multi-colour icon is a tuple of (color, mask) layers.
+#
+# More icons can be loaded from a text file, one icon per line:
+#     name ROWS [COLOR [ROWS COLOR ...]]
+# ROWS is 12 hex digits (6 rows), COLOR is RRGGBB. With colours, each
+# ROWS/COLOR pair becomes one layer. Lines starting with '#' are ignored.
+
+from binascii import unhexlify
+
+COLS = 8
+ROWS = 6
+
+# Colours the motor commands use for their icons
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+
+
+def compile_icon(rows):
+    """Turns a list of row bitmaps into bytes of lit LED indices (1-based)."""
+    lit = bytearray()
+    idx = 1
+    for row in rows:
+        for bit in range(COLS):
+            if (row >> (COLS - 1 - bit)) & 1:
+                lit.append(idx)
+            idx += 1
+    return bytes(lit)
+
+
+ARROW_FORWARD = compile_icon((0b00011000, 0b00111100, 0b01111110, 0b00011000, 0b00011000, 0b00011000))
+ARROW_BACKWARD = compile_icon((0b00011000, 0b00011000, 0b00011000, 0b01111110, 0b00111100, 0b00011000))
+ARROW_LEFT = compile_icon((0b00011000, 0b00111000, 0b11111111, 0b11111111, 0b00111000, 0b00011000))
+ARROW_RIGHT = compile_icon((0b00011000, 0b00011100, 0b11111111, 0b11111111, 0b00011100, 0b00011000))
+ICON_STOP = compile_icon((0b00111100, 0b01100010, 0b10010001, 0b10001001, 0b01000110, 0b00111100))
+
+_registry = {
+    "forward": ARROW_FORWARD,
+    "backward": ARROW_BACKWARD,
+    "left": ARROW_LEFT,
+    "right": ARROW_RIGHT,
+    "stop": ICON_STOP,
+}
+
+
+def is_bitmap(icon):
+    """True for an uncompiled list/tuple of row bitmaps."""
+    return isinstance(icon, (list, tuple)) and len(icon) > 0 and isinstance(icon[0], int)
+
+
+def register(name, icon):
+    """Adds an icon: compiled mask, layer tuple, or a list of row bitmaps."""
+    if is_bitmap(icon):
+        icon = compile_icon(icon)
+    _registry[name] = icon
+    return icon
+
+
+def get(name):
+    return _registry[name]
+
+
+def names():
+    return list(_registry)
+
+
+def _parse_rows(text):
+    if len(text) != ROWS * 2:
+        raise ValueError("icon rows must be %d hex digits: %s" % (ROWS * 2, text))
+    return compile_icon(unhexlify(text))
+
+
+def _parse_color(text):
+    v = int(text, 16)
+    return ((v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF)
+
+
+def load(path):
+    """Loads icons from a text file into the registry. Returns how many were added."""
+    count = 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            parts = line.split()
+            name = parts[0]
+            if len(parts) == 2:
+                _registry[name] = _parse_rows(parts[1])
+            elif len(parts) >= 3 and len(parts) % 2 == 1:
+                layers = []
+                for i in range(1, len(parts), 2):
+                    layers.append((_parse_color(parts[i + 1]), _parse_rows(parts[i])))
+                _registry[name] = tuple(layers)
+            else:
+                raise ValueError("bad icon line: " + line)
+            count += 1
+    return count
@@ -0,0 +1,125 @@
+import struct
+
+# LSM6DSO accelerometer + gyroscope read through its hardware FIFO.
+#
+# Both sensors run at the same output data rate and are batched into the
+# FIFO (continuous mode). read() drains everything the FIFO holds with one
+# FIFO_STATUS read and one burst read of FIFO_DATA_OUT, instead of one I2C
+# transaction per sample. Each FIFO word is 7 bytes: a tag (which sensor)
+# plus X/Y/Z as int16 little endian.
+#
+# Samples are kept as 12 raw bytes each (ax ay az gx gy gz, int16 LE), the
+# same layout the sensor delivers, so a batch can be sent as it is:
+#
+#     imu = LSM6DSO(i2c, odr_hz=104)
+#     n = imu.read()                        # samples since the last read
+#     ax, ay, az, gx, gy, gz = imu.sample(n - 1)
+#     send(imu.batch(n))                    # n * 12 bytes
+
+# Output data rate in Hz (12 is 12.5 Hz) -> ODR / BDR register code
+ODR_CODES = {12: 0x1, 26: 0x2, 52: 0x3, 104: 0x4, 208: 0x5, 416: 0x6, 833: 0x7}
+
+# Registers
+FIFO_CTRL3 = 0x09
+FIFO_CTRL4 = 0x0A
+WHO_AM_I = 0x0F
+CTRL1_XL = 0x10
+CTRL2_G = 0x11
+CTRL3_C = 0x12
+FIFO_STATUS1 = 0x3A
+FIFO_DATA_OUT_TAG = 0x78   # burst reads roll over from 0x7E back to here
+
+WHO_AM_I_VALUE = 0x6C
+FIFO_MODE_CONTINUOUS = 0x06
+TAG_GYRO = 0x01
+TAG_ACCEL = 0x02
+WORD_SIZE = 7
+SAMPLE_SIZE = 12
+
+ACCEL_SCALE = 0.000061      # g per LSB at +-2 g
+GYRO_SCALE = 0.00875        # dps per LSB at 250 dps
+
+
+class LSM6DSO:
+    def __init__(self, i2c, addr=0x6A, odr_hz=104, max_samples=64):
+        """
+        :param odr_hz: output data rate for both sensors, one of ODR_CODES.
+        :param max_samples: samples one read() can return; more stay in the FIFO.
+        """
+        if odr_hz not in ODR_CODES:
+            raise ValueError("odr_hz must be one of %s" % sorted(ODR_CODES))
+        self.i2c = i2c
+        self.addr = addr
+        self.odr_hz = odr_hz
+        self.max_samples = max_samples
+        # A sample is one accel and one gyro word
+        self.buf = bytearray(2 * max_samples * WORD_SIZE)
+        self.samples = bytearray(max_samples * SAMPLE_SIZE)
+        self._buf_mv = memoryview(self.buf)
+        self._samples_mv = memoryview(self.samples)
+        self._gyro = bytearray(6)
+        self._status = bytearray(2)
+        self.overruns = 0
+        self.words = 0
+        self.configure()
+
+    def _write(self, reg, value):
+        self.i2c.writeto_mem(self.addr, reg, bytes((value,)))
+
+    def configure(self):
+        code = ODR_CODES[self.odr_hz]
+        if self.i2c.readfrom_mem(self.addr, WHO_AM_I, 1)[0] != WHO_AM_I_VALUE:
+            raise OSError("no LSM6DSO at 0x%02x" % self.addr)
+        self._write(CTRL3_C, 0x44)                  # BDU + register auto-increment
+        self._write(CTRL1_XL, code << 4)            # +-2 g
+        self._write(CTRL2_G, code << 4)             # 250 dps
+        self._write(FIFO_CTRL3, code << 4 | code)   # batch gyro and accel at the ODR
+        self.flush()
+
+    def flush(self):
+        """Throws away whatever the FIFO holds, e.g. after not reading it for a while."""
+        self._write(FIFO_CTRL4, 0)                  # bypass mode empties the FIFO
+        self._write(FIFO_CTRL4, FIFO_MODE_CONTINUOUS)
+
+    def read(self):
+        """Drains the FIFO into samples; returns how many complete samples there are."""
+        self.i2c.readfrom_mem_into(self.addr, FIFO_STATUS1, self._status)
+        status2 = self._status[1]
+        if status2 & 0x40:
+            self.overruns += 1    # the FIFO filled up and old samples were overwritten
+        words = self._status[0] | (status2 & 0x03) << 8
+        words = min(words, len(self.buf) // WORD_SIZE)
+        if not words:
+            return 0
+        self.i2c.readfrom_mem_into(self.addr, FIFO_DATA_OUT_TAG, self._buf_mv[:words * WORD_SIZE])
+        self.words += words
+
+        buf = self._buf_mv
+        out = self._samples_mv
+        gyro = self._gyro
+        n = 0
+        for off in range(0, words * WORD_SIZE, WORD_SIZE):
+            tag = buf[off] >> 3
+            if tag == TAG_GYRO:
+                gyro[:] = buf[off + 1:off + 7]
+            elif tag == TAG_ACCEL and n < self.max_samples:
+                # Paired with the latest gyro word; both arrive once per ODR tick
+                s = n * SAMPLE_SIZE
+                out[s:s + 6] = buf[off + 1:off + 7]
+                out[s + 6:s + 12] = gyro
+                n += 1
+        return n
+
+    def raw(self, i):
+        """Sample i as six int16: ax, ay, az, gx, gy, gz."""
+        return struct.unpack_from("<6h", self.samples, i * SAMPLE_SIZE)
+
+    def sample(self, i):
+        """Sample i in g (ax, ay, az) and dps (gx, gy, gz)."""
+        ax, ay, az, gx, gy, gz = struct.unpack_from("<6h", self.samples, i * SAMPLE_SIZE)
+        return (ax * ACCEL_SCALE, ay * ACCEL_SCALE, az * ACCEL_SCALE,
+                gx * GYRO_SCALE, gy * GYRO_SCALE, gz * GYRO_SCALE)
+
+    def batch(self, n):
+        """The first n samples as raw bytes (memoryview, valid until the next read())."""
+        return self._samples_mv[:n * SAMPLE_SIZE]
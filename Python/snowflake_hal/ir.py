@@ -0,0 +1,19 @@
+from machine import Pin # type: ignore
+
+
+class IRSensor:
+    """Left/right pair of digital IR sensors."""
+    def __init__(self, left_pin, right_pin):
+        self.left_ir_pin = Pin(left_pin, Pin.IN)
+        self.right_ir_pin = Pin(right_pin, Pin.IN)
+
+    def read(self):
+        """
+        Returns a tuple (left_value, right_value).
+        Typically, 0 means a black line / obstacle is detected, and 1 means a white surface.
+        """
+        return (self.left_ir_pin.value(), self.right_ir_pin.value())
+
+    # Names used by the older per-script copies of this class
+    read_line = read
+    read_values = read
@@ -0,0 +1,157 @@
+from snowflake_hal import icons
+
+# Framebuffer-backed LED matrix driver.
+# Drawing only touches an in-RAM bytearray; show() pushes the frame to the
+# strip. With a neopixel.NeoPixel object the frame *is* the strip buffer, so a
+# flush is a single np.write(). Without one, the board module's
+# setSingleLED / setAllLED functions (Subu or Snowflake) are used instead.
+# A copy of the last flushed frame is kept so show() skips unchanged frames
+# and, on the board API, only re-sends the pixels that changed.
+
+
+class LED:
+    def __init__(self, num_leds, board=None, np=None):
+        """
+        :param num_leds: number of LEDs on the strip (48 on the Subu matrix).
+        :param board: the Subu / Snowflake module providing setSingleLED().
+        :param np: optional neopixel.NeoPixel for the same strip; preferred when given.
+        """
+        self.NUM_LEDS = num_leds
+        self.board = board
+        self.np = np
+        if np is not None:
+            self.frame = np.buf
+            self._bpp = np.bpp
+            order = np.ORDER
+        else:
+            self.frame = bytearray(3 * num_leds)
+            self._bpp = 3
+            order = (0, 1, 2)
+        self._ri, self._gi, self._bi = order[0], order[1], order[2]
+        self._blank = bytes(len(self.frame))
+        # What the LEDs currently show; None forces the next show() to send everything
+        self._shown = None
+        # (icon, color) of the last display_icon() while nothing else was drawn
+        self._icon = None
+        # Colour of the whole frame when it was last filled with one colour,
+        # None once single pixels have been drawn over it
+        self._uniform = (0, 0, 0)
+        self.flushes = 0
+
+    # --- Drawing (RAM only) ---
+    def set_pixel(self, index, color):
+        """Sets LED `index` (1-based, like Subu.setSingleLED) in the frame."""
+        o = (index - 1) * self._bpp
+        f = self.frame
+        f[o + self._ri] = color[0]
+        f[o + self._gi] = color[1]
+        f[o + self._bi] = color[2]
+        self._uniform = None
+        self._icon = None
+
+    def get_pixel(self, index):
+        o = (index - 1) * self._bpp
+        f = self.frame
+        return (f[o + self._ri], f[o + self._gi], f[o + self._bi])
+
+    def fill(self, color):
+        """Fills the whole frame with one colour."""
+        if color[0] == 0 and color[1] == 0 and color[2] == 0:
+            self.frame[:] = self._blank
+        else:
+            px = bytearray(self._bpp)
+            px[self._ri] = color[0]
+            px[self._gi] = color[1]
+            px[self._bi] = color[2]
+            self.frame[:] = px * self.NUM_LEDS
+        self._uniform = (color[0], color[1], color[2])
+        self._icon = None
+
+    def clear(self):
+        self.fill((0, 0, 0))
+
+    def draw_mask(self, mask, color):
+        """Lights the LEDs listed in `mask` (bytes of 1-based indices) in one colour."""
+        f = self.frame
+        bpp = self._bpp
+        ri, gi, bi = self._ri, self._gi, self._bi
+        r, g, b = color[0], color[1], color[2]
+        n = self.NUM_LEDS
+        for idx in mask:
+            if idx > n:
+                break
+            o = (idx - 1) * bpp
+            f[o + ri] = r
+            f[o + gi] = g
+            f[o + bi] = b
+        self._uniform = None
+        self._icon = None
+
+    def draw_icon(self, icon, color=None):
+        """
+        Draws an icon over the frame: a compiled mask from snowflake_hal.icons,
+        a tuple of (color, mask) layers, or a legacy list of 6 row bitmaps.
+        """
+        if icons.is_bitmap(icon):
+            icon = icons.compile_icon(icon)
+        if isinstance(icon, tuple):
+            for layer_color, mask in icon:
+                self.draw_mask(mask, layer_color)
+        else:
+            self.draw_mask(icon, color)
+
+    # --- Output ---
+    def show(self):
+        """Pushes the frame to the LEDs. Does nothing if it has not changed."""
+        f = self.frame
+        shown = self._shown
+        if shown is not None and f == shown:
+            return
+        self.flushes += 1
+        if self.np is not None:
+            self.np.write()
+        else:
+            self._send(shown)
+        if shown is None:
+            self._shown = bytearray(f)
+        else:
+            shown[:] = f
+
+    def _send(self, shown):
+        board = self.board
+        f = self.frame
+        if self._uniform is not None and hasattr(board, "setAllLED"):
+            board.setAllLED(self._uniform)
+            return
+        set_led = board.setSingleLED
+        ri, gi, bi = self._ri, self._gi, self._bi
+        o = 0
+        for i in range(1, self.NUM_LEDS + 1):
+            if shown is None or f[o] != shown[o] or f[o + 1] != shown[o + 1] or f[o + 2] != shown[o + 2]:
+                set_led(i, (f[o + ri], f[o + gi], f[o + bi]))
+            o += 3
+
+    def invalidate(self):
+        """Forgets what the LEDs show, e.g. after something else wrote to them."""
+        self._shown = None
+        self._icon = None
+
+    # --- Helpers matching the old per-script LED class ---
+    def set_all(self, r, g, b):
+        """Sets all LEDs to the same color."""
+        self.fill((r, g, b))
+        self.show()
+
+    def off(self):
+        """Turns all LEDs off."""
+        self.fill((0, 0, 0))
+        self.show()
+
+    def display_icon(self, icon, color=None):
+        """Clears the matrix and shows one icon (see draw_icon)."""
+        if self._icon is not None and self._icon[0] is icon and self._icon[1] == color:
+            return
+        self.clear()
+        self.draw_icon(icon, color)
+        self.show()
+        self._icon = (icon, color)
@@ -0,0 +1,220 @@
+import struct
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio # type: ignore
+
+# Framed binary protocol for the UART between the Cayo/ESP32 bridge and the
+# Subu/Snowflake drive board. It replaces the 'F\n' / 'V50\n' / '23.4\n' text
+# lines. Every message is one fixed-size frame:
+#
+#     0xA5 | type u8 | seq u8 | value int16 (little endian) | CRC-8
+#
+# The CRC (poly 0x07) covers type, seq and value. A corrupted frame is
+# dropped instead of turning into a different command, and the decoder
+# re-synchronises on the next 0xA5.
+#
+#     tx = LinkEncoder(uart)
+#     tx.send(FORWARD)              # or tx.send_command('V50')
+#
+#     rx = LinkDecoder()
+#     rx.on(FORWARD, lambda value: motor.forward())
+#     while True:
+#         rx.read_from(uart)
+#         rx.dispatch()
+
+SYNC = 0xA5
+FRAME_SIZE = 6
+
+# Message types. Commands keep their old letters so logs stay readable.
+FORWARD = ord('F')    # value: cells to drive in a route (ignored for manual driving)
+BACKWARD = ord('B')
+LEFT = ord('L')
+RIGHT = ord('R')
+STOP = ord('S')
+SPEED = ord('V')      # value: speed in percent
+AUTO = ord('A')       # value: target distance in cm
+DISTANCE = ord('D')   # value: distance in mm, -1 when there is no echo
+TURN = ord('T')       # value: signed degrees in a route, + is clockwise (right)
+STATUS = ord('Z')     # value: status code chosen by the script
+PATH_BEGIN = ord('P') # value: number of steps in the route that follows, tagged with a route id (route.py)
+PROGRESS = ord('G')   # value: route steps completed (tagged, route.py)
+CREDIT = ord('C')     # value: free slots in the robot's command queue (tagged, route.py)
+
+
+def _crc8_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return table
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data, start=0, end=None):
+    """CRC-8 (poly 0x07, init 0) of data[start:end]."""
+    table = CRC8_TABLE
+    crc = 0
+    for i in range(start, len(data) if end is None else end):
+        crc = table[crc ^ data[i]]
+    return crc
+
+
+class LinkEncoder:
+    """Writes frames to a UART from one preallocated buffer."""
+
+    def __init__(self, uart):
+        self.uart = uart
+        self.buf = bytearray(FRAME_SIZE)
+        self.seq = 0
+        self.sent = 0
+
+    def _pack(self, buf, offset, msg_type, value):
+        buf[offset] = SYNC
+        buf[offset + 1] = msg_type
+        buf[offset + 2] = self.seq
+        struct.pack_into("<h", buf, offset + 3, value)
+        buf[offset + 5] = crc8(buf, offset + 1, offset + 5)
+        self.seq = (self.seq + 1) & 0xFF
+        self.sent += 1
+
+    def send(self, msg_type, value=0):
+        self._pack(self.buf, 0, msg_type, value)
+        self.uart.write(self.buf)
+
+    def send_many(self, messages):
+        """Sends a list of (msg_type, value) pairs as one UART write."""
+        buf = bytearray(FRAME_SIZE * len(messages))
+        for i in range(len(messages)):
+            msg_type, value = messages[i]
+            self._pack(buf, i * FRAME_SIZE, msg_type, value)
+        self.uart.write(buf)
+
+    def send_command(self, command):
+        """Sends an old-style text command such as 'F', 'V50' or 'A20'."""
+        value = int(command[1:]) if len(command) > 1 else 0
+        self.send(ord(command[0]), value)
+
+    def send_distance(self, distance_cm):
+        self.send(DISTANCE, -1 if distance_cm < 0 else int(distance_cm * 10 + 0.5))
+
+
+class LinkDecoder:
+    """Parses frames out of a ring buffer without allocating.
+
+    After poll() returns True the frame is in msg_type, seq and value.
+    dispatch() calls the handler registered for each type, looked up in a
+    256-entry table.
+    """
+
+    def __init__(self, size=64):
+        if size & (size - 1):
+            raise ValueError("size must be a power of two")
+        self.ring = bytearray(size)
+        self.mask = size - 1
+        self.tail = 0       # index of the oldest byte
+        self.count = 0      # bytes buffered
+        self._chunk = bytearray(16)
+        self._chunk_mv = memoryview(self._chunk)
+        self.handlers = [None] * 256
+        self.msg_type = 0
+        self.seq = 0
+        self.value = 0
+        self._last_seq = -1
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped = 0    # bytes thrown away while looking for SYNC
+        self.lost = 0       # frames missing according to seq
+        self.overflows = 0
+
+    def on(self, msg_type, handler):
+        """Registers handler(value) for msg_type."""
+        self.handlers[msg_type] = handler
+
+    def feed(self, data, n=None):
+        """Appends the first n bytes of data to the ring."""
+        ring = self.ring
+        mask = self.mask
+        for i in range(len(data) if n is None else n):
+            if self.count > mask:
+                self.tail = (self.tail + 1) & mask  # full: the oldest byte goes
+                self.count -= 1
+                self.overflows += 1
+            ring[(self.tail + self.count) & mask] = data[i]
+            self.count += 1
+
+    def read_from(self, uart):
+        """Moves bytes waiting on uart into the ring, as long as they fit.
+
+        Whatever does not fit stays in the UART's own buffer for the next call,
+        so nothing is overwritten before poll() had a chance to see it."""
+        chunk = len(self._chunk)
+        while self.count + chunk <= self.mask + 1 and uart.any():
+            n = uart.readinto(self._chunk_mv)
+            if not n:
+                break
+            self.feed(self._chunk, n)
+
+    def service(self, uart):
+        """read_from() and dispatch() until the UART has nothing more; returns frames handled."""
+        total = 0
+        while True:
+            self.read_from(uart)
+            n = self.dispatch()
+            if not n:
+                return total
+            total += n
+
+    def poll(self):
+        """Decodes the next valid frame. Returns False when no complete frame is buffered."""
+        ring = self.ring
+        mask = self.mask
+        while self.count >= FRAME_SIZE:
+            t = self.tail
+            if ring[t] != SYNC:
+                self.tail = (t + 1) & mask
+                self.count -= 1
+                self.skipped += 1
+                continue
+            crc = 0
+            for i in range(t + 1, t + 5):
+                crc = CRC8_TABLE[crc ^ ring[i & mask]]
+            if crc != ring[(t + 5) & mask]:
+                self.tail = (t + 1) & mask  # maybe the SYNC was payload; rescan from the next byte
+                self.count -= 1
+                self.crc_errors += 1
+                continue
+            self.msg_type = ring[(t + 1) & mask]
+            seq = ring[(t + 2) & mask]
+            value = ring[(t + 3) & mask] | (ring[(t + 4) & mask] << 8)
+            self.value = value - 0x10000 if value & 0x8000 else value
+            if self._last_seq >= 0:
+                self.lost += (seq - self._last_seq - 1) & 0xFF
+            self._last_seq = seq
+            self.seq = seq
+            self.tail = (t + FRAME_SIZE) & mask
+            self.count -= FRAME_SIZE
+            self.frames += 1
+            return True
+        return False
+
+    def dispatch(self):
+        """Runs the handlers for every buffered frame; returns how many frames were decoded."""
+        count = 0
+        while self.poll():
+            count += 1
+            handler = self.handlers[self.msg_type]
+            if handler is not None:
+                handler(self.value)
+        return count
+
+
+async def pump_link(uart, decoder, period_ms=10):
+    """Background task for WebServer scripts: decodes frames from uart as they arrive."""
+    while True:
+        decoder.service(uart)
+        await asyncio.sleep(period_ms / 1000)
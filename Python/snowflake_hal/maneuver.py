@@ -0,0 +1,107 @@
+import time
+
+# Non-blocking executor for timed motion sequences.
+# A maneuver is a queue of steps; each step runs an action once when it
+# starts (usually a motor command) and ends after `ms` milliseconds, when its
+# `until()` condition turns true, or whichever comes first. update() is
+# called from the control loop and never sleeps, so sensors keep being read
+# while the robot is e.g. backing up, and abort() can cut a maneuver short.
+#
+#     m = Maneuver(motor)
+#     m.add("backward", 800).add("turn_left", 800).add("stop", 100)
+#     while True:
+#         ...read sensors...
+#         if m.update():
+#             continue        # still maneuvering
+#         ...normal behaviour...
+
+
+class Maneuver:
+    def __init__(self, motor=None, abort_when=None):
+        """
+        :param motor: object whose methods are looked up for string actions ("forward", ...).
+        :param abort_when: optional function checked on every update(); True aborts the maneuver.
+        """
+        self.motor = motor
+        self.abort_when = abort_when
+        self._steps = []
+        self._index = 0
+        self._start = 0
+        self._started = False
+        self.step_name = None
+        self.aborted = False
+
+    def add(self, action, ms=None, until=None, name=None):
+        """
+        Appends a step and returns self so steps can be chained.
+        :param action: a motor method name, a function, or None for "keep doing what you do".
+        :param ms: step duration; None means wait for `until` only.
+        :param until: function returning True to end the step early.
+        """
+        if ms is None and until is None:
+            raise ValueError("step needs a duration or an until() condition")
+        if name is None:
+            name = action if isinstance(action, str) else "step%d" % len(self._steps)
+        if isinstance(action, str):
+            action = getattr(self.motor, action)
+        self._steps.append((action, ms, until, name))
+        return self
+
+    def wait(self, ms):
+        """Appends a step that only waits (the motors keep their last command)."""
+        return self.add(None, ms, name="wait")
+
+    @property
+    def busy(self):
+        return self._index < len(self._steps)
+
+    def _begin(self, now):
+        action, ms, until, name = self._steps[self._index]
+        self.step_name = name
+        self._start = now
+        self._started = True
+        if action is not None:
+            action()
+
+    def update(self):
+        """Advances the maneuver. Returns True while it is still running."""
+        if self._index >= len(self._steps):
+            return False
+        if self.abort_when is not None and self.abort_when():
+            self.abort()
+            return False
+        now = time.ticks_ms()
+        if not self._started:
+            self._begin(now)
+        # Several steps can finish in one call (e.g. zero-length actions)
+        while True:
+            action, ms, until, name = self._steps[self._index]
+            if not ((ms is not None and time.ticks_diff(now, self._start) >= ms)
+                    or (until is not None and until())):
+                return True
+            self._index += 1
+            self._started = False
+            if self._index >= len(self._steps):
+                self.clear()
+                return False
+            self._begin(now)
+
+    def abort(self, stop=True):
+        """Drops the remaining steps and, by default, stops the motors."""
+        if self.busy:
+            self.aborted = True
+        self.clear()
+        if stop and self.motor is not None:
+            self.motor.stop()
+
+    def clear(self):
+        self._steps = []
+        self._index = 0
+        self._started = False
+        self.step_name = None
+
+    def start(self):
+        """Clears a previous run's abort flag; call before adding a new sequence."""
+        self.clear()
+        self.aborted = False
+        return self
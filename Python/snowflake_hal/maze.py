@@ -0,0 +1,271 @@
+import binascii
+import os
+import struct
+from array import array
+
+# Flood-fill maze map for micromouse-style solving.
+#
+# Walls are kept as 4 bits per cell (bit d = wall towards direction d), two
+# cells per byte, plus a 1-bit-per-cell "visited" set. A wall between two
+# cells is known once either of them was visited; anything not known is
+# assumed open while exploring. dist holds every cell's step count to the
+# target and is repaired locally when a new wall is sensed, instead of
+# being recomputed for the whole maze.
+#
+#     maze = FloodMaze(6, 8)
+#     maze.flood((5, 7))
+#     while (r, c) != (5, 7):
+#         maze.sense(r, c, heading, front_wall, left_wall, right_wall)
+#         heading = maze.next_heading(r, c, heading)
+#         ...turn to heading and drive one cell...
+#     cells = maze.route((0, 0), (5, 7))   # shortest route over known cells only
+#
+# save_maze() / load_maze() keep the map in flash between runs:
+#     "MZ" | version u8 | rows u8 | cols u8 | exit row u8 | exit col u8
+#     | walls | visited | CRC-32 of everything before it (u32 little endian)
+# A 16x16 map is 171 bytes.
+
+NORTH, EAST, SOUTH, WEST = 0, 1, 2, 3
+DR = (-1, 0, 1, 0)
+DC = (0, 1, 0, -1)
+
+UNREACHED = 0xFFFF
+
+CACHE_MAGIC = b"MZ"
+CACHE_VERSION = 1
+CACHE_HEADER = "<2sBBBBB"
+CACHE_HEADER_SIZE = 7
+
+
+class FloodMaze:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        n = rows * cols
+        self.walls = bytearray((n + 1) // 2)
+        self.visited = bytearray((n + 7) // 8)
+        self.dist = array('H', (UNREACHED for _ in range(n)))
+        self._queue = array('H', (0 for _ in range(n)))
+        self.target = -1
+        self.updates = 0    # cells whose distance was repaired
+        for r in range(rows):
+            self._set_wall(r * cols, WEST)
+            self._set_wall(r * cols + cols - 1, EAST)
+        for c in range(cols):
+            self._set_wall(c, NORTH)
+            self._set_wall((rows - 1) * cols + c, SOUTH)
+
+    # --- wall map ---
+
+    def cell_walls(self, i):
+        return (self.walls[i >> 1] >> ((i & 1) << 2)) & 0x0F
+
+    def has_wall(self, i, d):
+        return bool(self.cell_walls(i) & (1 << d))
+
+    def _set_wall(self, i, d):
+        self.walls[i >> 1] |= (1 << d) << ((i & 1) << 2)
+
+    def neighbour(self, i, d):
+        """Index of the cell next to i in direction d, or -1 outside the maze."""
+        r = i // self.cols + DR[d]
+        c = i % self.cols + DC[d]
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r * self.cols + c
+        return -1
+
+    def add_wall(self, i, d):
+        """Records a wall on both sides; returns True if it was not known before."""
+        if self.has_wall(i, d):
+            return False
+        self._set_wall(i, d)
+        j = self.neighbour(i, d)
+        if j >= 0:
+            self._set_wall(j, (d + 2) & 3)
+        return True
+
+    def is_visited(self, i):
+        return bool(self.visited[i >> 3] & (1 << (i & 7)))
+
+    def is_known(self, i, d):
+        """True once the side of cell i towards d was seen from either cell."""
+        j = self.neighbour(i, d)
+        return self.is_visited(i) or (j >= 0 and self.is_visited(j))
+
+    def conflicts(self, r, c, heading, front, left, right):
+        """True if a sensor reading at (r, c) disagrees with a wall the map already knows."""
+        i = r * self.cols + c
+        for d, wall in ((heading, front), ((heading + 3) & 3, left), ((heading + 1) & 3, right)):
+            if self.is_known(i, d) and self.has_wall(i, d) != bool(wall):
+                return True
+        return False
+
+    def sense(self, r, c, heading, front, left, right):
+        """Records what the sensors see from cell (r, c) and repairs the distances.
+
+        Returns the list of directions where a new wall was found."""
+        i = r * self.cols + c
+        self.visited[i >> 3] |= 1 << (i & 7)
+        new = []
+        for d, wall in ((heading, front), ((heading + 3) & 3, left), ((heading + 1) & 3, right)):
+            if wall and self.add_wall(i, d):
+                new.append(d)
+        if new and self.target >= 0:
+            stack = [i]
+            for d in new:
+                j = self.neighbour(i, d)
+                if j >= 0:
+                    stack.append(j)
+            self._repair(stack)
+        return new
+
+    # --- distances ---
+
+    def flood(self, target, known_only=False):
+        """Breadth-first distances from every cell to target (r, c).
+
+        With known_only, walls that were never sensed count as walls too, so
+        the result only uses corridors the robot has actually seen."""
+        dist = self.dist
+        queue = self._queue
+        for i in range(len(dist)):
+            dist[i] = UNREACHED
+        t = target[0] * self.cols + target[1]
+        self.target = -1 if known_only else t
+        dist[t] = 0
+        queue[0] = t
+        head = 0
+        tail = 1
+        while head < tail:
+            i = queue[head]
+            head += 1
+            walls = self.cell_walls(i)
+            for d in range(4):
+                if walls & (1 << d) or (known_only and not self.is_known(i, d)):
+                    continue
+                j = self.neighbour(i, d)
+                if dist[j] == UNREACHED:
+                    dist[j] = dist[i] + 1
+                    queue[tail] = j
+                    tail += 1
+        return dist
+
+    def _min_open(self, i):
+        best = UNREACHED
+        walls = self.cell_walls(i)
+        for d in range(4):
+            if not walls & (1 << d):
+                v = self.dist[self.neighbour(i, d)]
+                if v < best:
+                    best = v
+        return best
+
+    def _repair(self, stack):
+        """Modified flood fill: only cells whose distance became wrong are updated.
+
+        A cell must be one more than its best open neighbour; when it changes,
+        its neighbours are checked in turn. Distances of cells cut off from
+        the target climb until they reach the cell count and become UNREACHED."""
+        dist = self.dist
+        limit = len(dist)
+        while stack:
+            i = stack.pop()
+            if i == self.target:
+                continue
+            best = self._min_open(i)
+            want = best + 1 if best + 1 < limit else UNREACHED
+            if dist[i] == want:
+                continue
+            dist[i] = want
+            self.updates += 1
+            walls = self.cell_walls(i)
+            for d in range(4):
+                if not walls & (1 << d):
+                    stack.append(self.neighbour(i, d))
+
+    def next_heading(self, r, c, heading):
+        """Direction to the open neighbour closest to the target, preferring straight ahead.
+
+        Returns None when the target cannot be reached from here."""
+        i = r * self.cols + c
+        walls = self.cell_walls(i)
+        best = None
+        best_dist = self.dist[i]
+        if best_dist == UNREACHED:
+            return None
+        for d in (heading, (heading + 1) & 3, (heading + 3) & 3, (heading + 2) & 3):
+            if walls & (1 << d):
+                continue
+            v = self.dist[self.neighbour(i, d)]
+            if v < best_dist:
+                best = d
+                best_dist = v
+        return best
+
+    def route(self, start, goal, heading=NORTH):
+        """Shortest route from start to goal over known corridors, as a list of (r, c).
+
+        Among equally short routes it keeps going straight where it can.
+        Returns None if the explored part of the maze does not connect them."""
+        self.flood(goal, known_only=True)
+        r, c = start
+        if self.dist[r * self.cols + c] == UNREACHED:
+            return None
+        cells = [(r, c)]
+        while (r, c) != goal:
+            i = r * self.cols + c
+            for d in (heading, (heading + 1) & 3, (heading + 3) & 3, (heading + 2) & 3):
+                if self.has_wall(i, d) or not self.is_known(i, d):
+                    continue
+                j = self.neighbour(i, d)
+                if self.dist[j] == self.dist[i] - 1:
+                    heading = d
+                    r, c = divmod(j, self.cols)
+                    break
+            cells.append((r, c))
+        return cells
+
+
+def save_maze(path, maze, exit_pos):
+    """Writes the wall map to flash. A temporary file is renamed over the old
+    one, so a reset halfway through never leaves a half-written map."""
+    data = bytearray(struct.pack(CACHE_HEADER, CACHE_MAGIC, CACHE_VERSION,
+                                 maze.rows, maze.cols, exit_pos[0], exit_pos[1]))
+    data += maze.walls
+    data += maze.visited
+    data += struct.pack("<I", binascii.crc32(data) & 0xFFFFFFFF)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.rename(tmp, path)
+
+
+def load_maze(path, rows=None, cols=None):
+    """Returns (maze, exit_pos) from a file written by save_maze().
+
+    Returns None when there is no file, it is damaged (bad checksum or
+    length), or its size does not match rows x cols."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER_SIZE + 4:
+        return None
+    magic, version, r, c, er, ec = struct.unpack_from(CACHE_HEADER, data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    if (rows is not None and r != rows) or (cols is not None and c != cols):
+        return None
+    n = r * c
+    n_walls = (n + 1) // 2
+    n_visited = (n + 7) // 8
+    end = CACHE_HEADER_SIZE + n_walls + n_visited
+    if len(data) != end + 4:
+        return None
+    if struct.unpack_from("<I", data, end)[0] != binascii.crc32(memoryview(data)[:end]) & 0xFFFFFFFF:
+        return None
+    maze = FloodMaze(r, c)
+    maze.walls[:] = data[CACHE_HEADER_SIZE:CACHE_HEADER_SIZE + n_walls]
+    maze.visited[:] = data[CACHE_HEADER_SIZE + n_walls:end]
+    return maze, (er, ec)
@@ -0,0 +1,444 @@
+import errno
+import socket
+import time
+try:
+    import select
+except ImportError:
+    import uselect as select # type: ignore
+
+# MJPEG streaming server for the ESP32-CAM, for Cam.py's camera thread.
+#
+# One non-blocking loop serves every viewer: a frame is captured once per
+# tick (at most max_fps) and handed to all /stream clients. Each frame is
+# assembled once as boundary + part headers + JPEG + CRLF in one buffer, so
+# a client needs a single send() per frame instead of three. A client that
+# is still sending the previous frame skips the new one (counted in
+# "dropped") instead of holding up the others.
+#
+# Captures go into a FrameSlot that /stream and /snapshot.jpg both read:
+# a snapshot is served from the latest frame when it is younger than one
+# frame interval and only captures otherwise, and a stream tick reuses a
+# snapshot taken within the last half interval, so pollers and viewers
+# together cost about max_fps captures a second.
+#
+#     server = MJPEGServer(camera, port=81, max_fps=15, page=INDEX_HTML)
+#     server.run(lambda: camera_running)
+#
+# Routes: /stream (multipart/x-mixed-replace), /snapshot.jpg (one JPEG),
+# /stats (per-client counters as JSON) and / (the page passed in).
+#
+# At most max_connections sockets are open at once (viewers plus requests
+# still being read or answered); past that a new connection is closed right
+# away. A client that has not sent its whole request within
+# REQUEST_TIMEOUT_MS is dropped, and so is one whose pending send has not
+# moved for SEND_TIMEOUT_MS (a phone put in the background keeps its TCP
+# connection but stops reading), so neither can pin a slot for good.
+# Runs on CPython with host/camera.py.
+
+BOUNDARY = "frame"
+MAX_REQUEST = 1024
+MAX_CLIENTS = 4
+SPARE_CONNECTIONS = 4       # on top of max_clients, for snapshots, /stats and the page
+REQUEST_TIMEOUT_MS = 3000
+SEND_TIMEOUT_MS = 5000
+
+_READING, _STREAM, _CLOSING = 0, 1, 2
+
+STREAM_HEADER = ("HTTP/1.1 200 OK\r\n"
+                 "Content-Type: multipart/x-mixed-replace; boundary=" + BOUNDARY + "\r\n"
+                 "Cache-Control: no-cache\r\n"
+                 "Connection: close\r\n\r\n").encode()
+PART_HEADER = "--" + BOUNDARY + "\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+
+
+def _head(status, content_type, length, extra=""):
+    return ("HTTP/1.1 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n%sConnection: close\r\n\r\n" % (
+        status, content_type, length, extra)).encode()
+
+
+def _response(status, content_type, body):
+    if isinstance(body, str):
+        body = body.encode()
+    return _head(status, content_type, len(body)) + body
+
+
+class FrameSlot:
+    """
+    The latest frame, double-buffered. Each buffer holds the frame laid out
+    for /stream (part header | JPEG | CRLF); jpeg() is the JPEG in the
+    middle of it. A capture is written into the back buffer and then becomes
+    the front one, so the buffers are reused instead of allocated per frame.
+    If a slow client is still sending from the back buffer, it keeps that
+    buffer to itself and the slot allocates a new one.
+    """
+    def __init__(self, size=16384):
+        self.bufs = [bytearray(size), bytearray(size)]
+        self.front = -1          # buffer index holding the latest frame, -1 before the first
+        self.number = 0          # frames stored so far
+        self.ms = 0              # ticks_ms() of the latest frame
+        self._jpeg = [(0, 0), (0, 0)]
+        self._end = [0, 0]
+        self.reallocs = 0
+
+    def back(self):
+        return self.bufs[1 - self.front if self.front >= 0 else 0]
+
+    def store(self, jpeg, now, back_busy=False):
+        i = 1 - self.front if self.front >= 0 else 0
+        n = len(jpeg)
+        head = (PART_HEADER % n).encode()
+        h = len(head)
+        need = h + n + 2
+        if back_busy or len(self.bufs[i]) < need:
+            self.bufs[i] = bytearray(max(need, len(self.bufs[i])))
+            self.reallocs += 1
+        buf = self.bufs[i]
+        buf[:h] = head
+        buf[h:h + n] = jpeg
+        buf[h + n:need] = b"\r\n"
+        self._jpeg[i] = (h, h + n)
+        self._end[i] = need
+        self.front = i
+        self.number += 1
+        self.ms = now
+
+    def age(self, now):
+        """ms since the latest frame, or None before the first one."""
+        return None if self.front < 0 else time.ticks_diff(now, self.ms)
+
+    def part(self):
+        """The latest frame as a multipart part (memoryview into the front buffer)."""
+        return memoryview(self.bufs[self.front])[:self._end[self.front]]
+
+    def jpeg(self):
+        """The latest JPEG (memoryview into the front buffer)."""
+        a, b = self._jpeg[self.front]
+        return memoryview(self.bufs[self.front])[a:b]
+
+
+class StreamClient:
+    def __init__(self, sock, addr, now):
+        self.sock = sock
+        self.addr = addr
+        self.state = _READING
+        self.request = bytearray()
+        self.out = None          # memoryview still to be sent, or None
+        self.tail = None         # sent after out (the JPEG of a snapshot)
+        self.pos = 0
+        self.sent_ms = now       # ticks_ms of the last progress on out
+        self.frame_buf = None    # FrameSlot buffer that out/tail point into
+        self.is_frame = False
+        self.frames = 0
+        self.last = 0            # FrameSlot number of the last frame handed to this client
+        self.dropped = 0
+        self.bytes = 0
+        self.since = now
+        self.fps = 0.0
+        self._win_start = now
+        self._win_frames = 0
+
+    def stats(self, now):
+        return {"addr": "%s:%d" % self.addr[:2] if isinstance(self.addr, tuple) else str(self.addr),
+                "frames": self.frames, "dropped": self.dropped, "bytes": self.bytes,
+                "fps": round(self.fps, 1), "seconds": time.ticks_diff(now, self.since) // 1000}
+
+
+class MJPEGServer:
+    def __init__(self, camera, port=81, max_fps=15, max_clients=MAX_CLIENTS, page=None, frame_size=16384,
+                 max_connections=None):
+        """
+        :param camera: module or object with capture() -> JPEG bytes (the esp32 camera module).
+        :param max_fps: capture rate cap; nothing is captured while nobody watches.
+        :param max_clients: most /stream viewers at once.
+        :param max_connections: most open client sockets; default max_clients + SPARE_CONNECTIONS.
+        :param page: HTML for "/"; None answers 404 there.
+        :param frame_size: starting size of each FrameSlot buffer; they grow to fit.
+        """
+        self.camera = camera
+        self.slot = FrameSlot(frame_size)
+        self.port = port
+        self.frame_ms = 1000 // max_fps
+        self.max_clients = max_clients
+        self.max_connections = max_connections or max_clients + SPARE_CONNECTIONS
+        self.page = page
+        self.clients = []
+        self.captured = 0
+        self.failed = 0
+        self.snapshots = 0
+        self.refused = 0
+        self.timeouts = 0
+        self.stalled = 0
+        self._lookup = {}
+        self._listener = None
+        self._poll = None
+        self._next_frame = time.ticks_ms()
+
+    # --- setup ---
+
+    def start(self, host="0.0.0.0"):
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(socket.getaddrinfo(host, self.port)[0][-1])
+        s.listen(self.max_clients + 1)
+        s.setblocking(False)
+        self._listener = s
+        self._poll = select.poll()
+        self._poll.register(s, select.POLLIN)
+        self._register(s, self)
+
+    def close(self):
+        for c in list(self.clients):
+            self._drop(c)
+        if self._listener is not None:
+            self._poll.unregister(self._listener)
+            self._drop_key(self._listener)
+            self._listener.close()
+            self._listener = None
+
+    def run(self, running=lambda: True, host="0.0.0.0"):
+        """Serves until running() returns False, then closes every socket."""
+        self.start(host)
+        try:
+            while running():
+                self.step()
+        finally:
+            self.close()
+
+    def _register(self, sock, client):
+        # MicroPython's poll() returns the socket, CPython's the file descriptor
+        self._lookup[id(sock)] = client
+        if hasattr(sock, "fileno"):
+            self._lookup[sock.fileno()] = client
+
+    def _drop_key(self, sock):
+        self._lookup.pop(id(sock), None)
+        if hasattr(sock, "fileno"):
+            self._lookup.pop(sock.fileno(), None)
+
+    def _client_for(self, obj):
+        return self._lookup.get(obj if isinstance(obj, int) else id(obj))
+
+    def _add_client(self, sock, addr):
+        sock.setblocking(False)
+        c = StreamClient(sock, addr, time.ticks_ms())
+        self.clients.append(c)
+        self._register(sock, c)
+        self._poll.register(sock, select.POLLIN)
+        return c
+
+    def _drop(self, c):
+        if c in self.clients:
+            self.clients.remove(c)
+        self._drop_key(c.sock)
+        try:
+            self._poll.unregister(c.sock)
+        except (OSError, ValueError, KeyError):
+            pass
+        c.sock.close()
+
+    # --- main loop ---
+
+    def streaming(self):
+        return sum(1 for c in self.clients if c.state == _STREAM)
+
+    def step(self):
+        """Captures a frame if one is due, then waits for socket events until the next one."""
+        now = time.ticks_ms()
+        watching = self.streaming()
+        if watching and time.ticks_diff(now, self._next_frame) >= 0:
+            self._next_frame = time.ticks_add(self._next_frame, self.frame_ms)
+            if time.ticks_diff(now, self._next_frame) > 0:
+                self._next_frame = time.ticks_add(now, self.frame_ms)   # fell behind; don't burst
+            # A snapshot taken within the last half interval is fresh enough
+            if self._latest(now, self.frame_ms // 2):
+                self._fan_out()
+            now = time.ticks_ms()
+        self._expire(now)
+        # Poll at least every 100 ms so requests that never finish are expired
+        if watching:
+            timeout = min(100, max(0, time.ticks_diff(self._next_frame, now)))
+        else:
+            timeout = 100
+        for ev in self._poll.poll(timeout):
+            c = self._client_for(ev[0])
+            flags = ev[1]
+            if c is self:
+                self._accept()
+                continue
+            if c is None:
+                continue
+            if flags & (select.POLLHUP | select.POLLERR):
+                self._drop(c)
+                continue
+            if flags & select.POLLIN:
+                self._read(c)
+            if flags & select.POLLOUT and c in self.clients:
+                self._flush(c)
+
+    def _accept(self):
+        try:
+            sock, addr = self._listener.accept()
+        except OSError:
+            return
+        if len(self.clients) >= self.max_connections:
+            self.refused += 1
+            sock.close()
+            return
+        self._add_client(sock, addr)
+
+    def _expire(self, now):
+        """Drops clients whose request or whose pending send has stalled."""
+        clients = self.clients
+        i = len(clients)
+        while i:
+            i -= 1
+            c = clients[i]
+            if c.state == _READING:
+                if time.ticks_diff(now, c.since) >= REQUEST_TIMEOUT_MS:
+                    self.timeouts += 1
+                    self._drop(c)
+            elif c.out is not None and time.ticks_diff(now, c.sent_ms) >= SEND_TIMEOUT_MS:
+                self.stalled += 1
+                self._drop(c)
+
+    def _read(self, c):
+        try:
+            data = c.sock.recv(256)
+        except OSError as e:
+            if e.args[0] != errno.EAGAIN:
+                self._drop(c)
+            return
+        if not data:
+            self._drop(c)
+            return
+        if c.state != _READING:
+            return      # a viewer has nothing more to say; ignore it
+        c.request += data
+        req = bytes(c.request)
+        if b"\r\n\r\n" not in req:
+            if len(req) > MAX_REQUEST:
+                self._reply(c, _response("400 Bad Request", "text/plain", "bad request"))
+            return
+        parts = req[:req.find(b"\r\n")].split()
+        c.request = None
+        path = parts[1].decode().split("?")[0] if len(parts) > 1 else ""
+        self._route(c, path)
+
+    def _route(self, c, path):
+        if path == "/stream":
+            if self.streaming() >= self.max_clients:
+                self._reply(c, _response("503 Service Unavailable", "text/plain", "too many viewers"))
+                return
+            c.state = _STREAM
+            c.since = c._win_start = time.ticks_ms()
+            self._send(c, STREAM_HEADER, False)
+        elif path == "/snapshot.jpg":
+            if not self._latest(time.ticks_ms(), self.frame_ms):
+                self._reply(c, _response("503 Service Unavailable", "text/plain", "no frame"))
+                return
+            self.snapshots += 1
+            jpeg = self.slot.jpeg()
+            c.state = _CLOSING
+            c.frame_buf = self.slot.bufs[self.slot.front]
+            self._send(c, _head("200 OK", "image/jpeg", len(jpeg), "Cache-Control: no-store\r\n"), False, jpeg)
+        elif path == "/stats":
+            import json
+            self._reply(c, _response("200 OK", "application/json", json.dumps(self.stats())))
+        elif path == "/" and self.page is not None:
+            self._reply(c, _response("200 OK", "text/html", self.page))
+        else:
+            self._reply(c, _response("404 Not Found", "text/plain", "not found"))
+
+    def _reply(self, c, data):
+        c.state = _CLOSING
+        self._send(c, data, False)
+
+    # --- sending ---
+
+    def _latest(self, now, max_age):
+        """Makes sure the slot holds a frame younger than max_age ms; False if there is none."""
+        slot = self.slot
+        age = slot.age(now)
+        if age is not None and age < max_age:
+            return True
+        jpeg = self.camera.capture()
+        if not jpeg or isinstance(jpeg, int):
+            self.failed += 1
+            return age is not None
+        back = slot.back()
+        slot.store(jpeg, now, any(c.frame_buf is back for c in self.clients))
+        self.captured += 1
+        return True
+
+    def _fan_out(self):
+        frame = None
+        for c in self.clients:
+            if c.state != _STREAM or c.last == self.slot.number:
+                continue
+            if c.out is not None:
+                c.dropped += 1
+                continue
+            if frame is None:
+                frame = self.slot.part()
+            c.last = self.slot.number
+            c.frame_buf = self.slot.bufs[self.slot.front]
+            self._send(c, frame, True)
+
+    def _send(self, c, data, is_frame, tail=None):
+        c.out = memoryview(data)
+        c.tail = tail
+        c.pos = 0
+        c.is_frame = is_frame
+        c.sent_ms = time.ticks_ms()
+        self._flush(c)
+        if c.out is not None and c in self.clients:
+            self._poll.modify(c.sock, select.POLLIN | select.POLLOUT)
+
+    def _flush(self, c):
+        out = c.out
+        if out is None:
+            return
+        while True:
+            while c.pos < len(out):
+                try:
+                    n = c.sock.send(out[c.pos:])
+                except OSError as e:
+                    if e.args[0] == errno.EAGAIN:
+                        return
+                    self._drop(c)
+                    return
+                if not n:
+                    return
+                c.pos += n
+                c.bytes += n
+                c.sent_ms = time.ticks_ms()
+            if c.tail is None:
+                break
+            out = c.out = c.tail
+            c.tail = None
+            c.pos = 0
+        c.out = None
+        c.frame_buf = None
+        if c.is_frame:
+            self._frame_done(c)
+        if c.state == _CLOSING:
+            self._drop(c)
+        else:
+            self._poll.modify(c.sock, select.POLLIN)
+
+    def _frame_done(self, c):
+        c.frames += 1
+        c._win_frames += 1
+        now = time.ticks_ms()
+        dt = time.ticks_diff(now, c._win_start)
+        if dt >= 1000:
+            c.fps = c._win_frames * 1000 / dt
+            c._win_start = now
+            c._win_frames = 0
+
+    def stats(self):
+        now = time.ticks_ms()
+        return {"captured": self.captured, "failed": self.failed, "snapshots": self.snapshots,
+                "reallocs": self.slot.reallocs, "refused": self.refused, "timeouts": self.timeouts,
+                "stalled": self.stalled,
+                "clients": [c.stats(now) for c in self.clients if c.state == _STREAM]}
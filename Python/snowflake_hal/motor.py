@@ -0,0 +1,94 @@
+from machine import Pin, PWM # type: ignore
+from snowflake_hal import icons
+
+FULL_DUTY = 65535
+
+
+def to_duty(fraction):
+    """Converts a 0.0 - 1.0 speed fraction into a clamped duty_u16 value."""
+    return int(max(0.0, min(1.0, fraction)) * FULL_DUTY)
+
+
+class Motor:
+    """Two-channel H-bridge driver (A = left wheel, B = right wheel)."""
+    def __init__(self, a1_pin, a2_pin, b1_pin, b2_pin, speed=0.4, turn_speed=None,
+                 led_ctrl=None, swap_turns=False, freq=1000):
+        """
+        :param speed: forward/backward speed, 0.0 - 1.0.
+        :param turn_speed: pivot speed, 0.0 - 1.0. Defaults to speed.
+        :param led_ctrl: optional LED object; when given, every motion shows its icon.
+        :param swap_turns: set to True on robots whose motors are wired so that
+                           turn_left/turn_right come out mirrored.
+        """
+        self.motor_a1 = PWM(Pin(a1_pin))
+        self.motor_a2 = PWM(Pin(a2_pin))
+        self.motor_b1 = PWM(Pin(b1_pin))
+        self.motor_b2 = PWM(Pin(b2_pin))
+        self.led_ctrl = led_ctrl
+        self.swap_turns = swap_turns
+
+        for m in (self.motor_a1, self.motor_a2, self.motor_b1, self.motor_b2):
+            m.freq(freq)
+
+        # Last duty written to each channel; writes of the same value are skipped
+        self._duty = [-1, -1, -1, -1]
+
+        self.set_speed(speed, turn_speed)
+        self.stop()
+
+    def set_speed(self, speed, turn_speed=None):
+        """Sets motor speeds. Both values are between 0.0 and 1.0."""
+        self.duty_cycle = to_duty(speed)
+        self.turn_duty_cycle = self.duty_cycle if turn_speed is None else to_duty(turn_speed)
+
+    def drive(self, a1, a2, b1, b2):
+        """Writes raw duty_u16 values to the four channels, skipping unchanged ones."""
+        last = self._duty
+        if last[0] != a1:
+            self.motor_a1.duty_u16(a1); last[0] = a1
+        if last[1] != a2:
+            self.motor_a2.duty_u16(a2); last[1] = a2
+        if last[2] != b1:
+            self.motor_b1.duty_u16(b1); last[2] = b1
+        if last[3] != b2:
+            self.motor_b2.duty_u16(b2); last[3] = b2
+
+    def _show(self, icon, color):
+        if self.led_ctrl:
+            self.led_ctrl.display_icon(icon, color)
+
+    def forward(self):
+        self._show(icons.ARROW_FORWARD, icons.GREEN)
+        d = self.duty_cycle
+        self.drive(d, 0, d, 0)
+
+    def backward(self):
+        self._show(icons.ARROW_BACKWARD, icons.RED)
+        d = self.duty_cycle
+        self.drive(0, d, 0, d)
+
+    def _pivot_left(self):
+        t = self.turn_duty_cycle
+        self.drive(0, t, t, 0)
+
+    def _pivot_right(self):
+        t = self.turn_duty_cycle
+        self.drive(t, 0, 0, t)
+
+    def turn_left(self):
+        self._show(icons.ARROW_LEFT, icons.YELLOW)
+        if self.swap_turns:
+            self._pivot_right()
+        else:
+            self._pivot_left()
+
+    def turn_right(self):
+        self._show(icons.ARROW_RIGHT, icons.YELLOW)
+        if self.swap_turns:
+            self._pivot_left()
+        else:
+            self._pivot_right()
+
+    def stop(self):
+        self._show(icons.ICON_STOP, icons.RED)
+        self.drive(0, 0, 0, 0)
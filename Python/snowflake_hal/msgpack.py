@@ -0,0 +1,249 @@
+import struct
+
+# MessagePack encoder/decoder for the camera board's WebSocket messages.
+#
+# Packer writes straight into one reusable bytearray with struct.pack_into
+# (array and map headers are known up front, so nothing is concatenated or
+# patched afterwards) and only grows the buffer when a message does not fit.
+# Unpacker reads through a memoryview of the message and never copies it:
+# numbers come out with struct.unpack_from, strings are decoded straight
+# from a view, and each object is one call of a closure that keeps the read
+# position, so decoding stays linear with less per-object overhead than the
+# old recursive decoder. Only bin values are copied, into the bytes that
+# are returned.
+#
+# Types: nil, bool, int (fixint .. int64/uint64), float32/float64,
+# str (fixstr/str8/str16/str32), bin (bin8/16/32), array and map (fix/16/32).
+#
+#     packer = Packer(use_single_float=True)
+#     ws.send(packer.pack({"ax": 0.12, "ay": -0.98}))   # memoryview into packer.buf
+#     msg = unpackb(data)
+
+
+class Packer:
+    def __init__(self, size=256, use_single_float=False):
+        self.buf = bytearray(size)
+        self.use_single_float = use_single_float
+
+    def pack(self, obj):
+        """Encodes obj; returns a memoryview of the bytes, valid until the next pack()."""
+        n = self._pack(obj, 0)
+        return memoryview(self.buf)[:n]
+
+    def _reserve(self, pos, n):
+        """Makes room for n more bytes at pos, doubling the buffer if needed."""
+        if pos + n > len(self.buf):
+            size = len(self.buf) * 2
+            while size < pos + n:
+                size *= 2
+            buf = bytearray(size)
+            buf[:pos] = memoryview(self.buf)[:pos]
+            self.buf = buf
+
+    def _head(self, pos, n, fix_base, fix_max, code8, code16, code32):
+        """Writes a type byte plus length; code8 may be None for types without an 8-bit form."""
+        self._reserve(pos, 5)
+        buf = self.buf
+        if n <= fix_max:
+            buf[pos] = fix_base | n
+            return pos + 1
+        if code8 is not None and n <= 0xFF:
+            buf[pos] = code8
+            buf[pos + 1] = n
+            return pos + 2
+        if n <= 0xFFFF:
+            struct.pack_into(">BH", buf, pos, code16, n)
+            return pos + 3
+        struct.pack_into(">BI", buf, pos, code32, n)
+        return pos + 5
+
+    def _pack(self, obj, pos):
+        if obj is None:
+            self._reserve(pos, 1)
+            self.buf[pos] = 0xC0
+            return pos + 1
+        if obj is True or obj is False:
+            self._reserve(pos, 1)
+            self.buf[pos] = 0xC3 if obj else 0xC2
+            return pos + 1
+        t = type(obj)
+        if t is int:
+            self._reserve(pos, 9)
+            buf = self.buf
+            if -32 <= obj <= 0x7F:
+                buf[pos] = obj & 0xFF
+                return pos + 1
+            if obj >= 0:
+                if obj <= 0xFF:
+                    struct.pack_into(">BB", buf, pos, 0xCC, obj)
+                    return pos + 2
+                if obj <= 0xFFFF:
+                    struct.pack_into(">BH", buf, pos, 0xCD, obj)
+                    return pos + 3
+                if obj <= 0xFFFFFFFF:
+                    struct.pack_into(">BI", buf, pos, 0xCE, obj)
+                    return pos + 5
+                if obj <= 0xFFFFFFFFFFFFFFFF:
+                    struct.pack_into(">BQ", buf, pos, 0xCF, obj)
+                    return pos + 9
+            else:
+                if obj >= -0x80:
+                    struct.pack_into(">Bb", buf, pos, 0xD0, obj)
+                    return pos + 2
+                if obj >= -0x8000:
+                    struct.pack_into(">Bh", buf, pos, 0xD1, obj)
+                    return pos + 3
+                if obj >= -0x80000000:
+                    struct.pack_into(">Bi", buf, pos, 0xD2, obj)
+                    return pos + 5
+                if obj >= -0x8000000000000000:
+                    struct.pack_into(">Bq", buf, pos, 0xD3, obj)
+                    return pos + 9
+            raise OverflowError("int too large for msgpack")
+        if t is float:
+            self._reserve(pos, 9)
+            if self.use_single_float:
+                struct.pack_into(">Bf", self.buf, pos, 0xCA, obj)
+                return pos + 5
+            struct.pack_into(">Bd", self.buf, pos, 0xCB, obj)
+            return pos + 9
+        if t is str:
+            data = obj.encode()
+            n = len(data)
+            if n <= 31:
+                self._reserve(pos, n + 1)
+                buf = self.buf
+                buf[pos] = 0xA0 | n
+                buf[pos + 1:pos + 1 + n] = data
+                return pos + 1 + n
+            pos = self._head(pos, n, 0xA0, 31, 0xD9, 0xDA, 0xDB)
+            self._reserve(pos, n)
+            self.buf[pos:pos + n] = data
+            return pos + n
+        if t is bytes or t is bytearray or t is memoryview:
+            n = len(obj)
+            pos = self._head(pos, n, 0, -1, 0xC4, 0xC5, 0xC6)
+            self._reserve(pos, n)
+            self.buf[pos:pos + n] = obj
+            return pos + n
+        if t is list or t is tuple:
+            pos = self._head(pos, len(obj), 0x90, 15, None, 0xDC, 0xDD)
+            for x in obj:
+                pos = self._pack(x, pos)
+            return pos
+        if t is dict:
+            pos = self._head(pos, len(obj), 0x80, 15, None, 0xDE, 0xDF)
+            for k in obj:
+                pos = self._pack(k, pos)
+                pos = self._pack(obj[k], pos)
+            return pos
+        raise TypeError("cannot pack %s" % t.__name__)
+
+
+class Unpacker:
+    """Decodes messages one after another from a buffer; pos is where the next one starts."""
+
+    def __init__(self, data):
+        self.mv = memoryview(data)
+        self.pos = 0
+
+    def unpack(self):
+        obj, self.pos = _unpack(self.mv, self.pos)
+        return obj
+
+
+def _unpack(buf, pos):
+    """Decodes one object from the memoryview buf at pos; returns (object, position after it).
+
+    A closure over the read position: every object costs one call and no
+    per-object method lookups. Reads past the end surface as IndexError
+    from buf[i] and are reported as truncated data."""
+    size = len(buf)
+    i = pos
+
+    def take(n):
+        nonlocal i
+        start = i
+        i += n
+        if i > size:
+            raise ValueError("truncated msgpack data")
+        return start
+
+    def obj():
+        nonlocal i
+        c = buf[i]
+        i += 1
+        # Most frequent first: small ints, short strings, small maps and arrays
+        if c <= 0x7F:
+            return c
+        if c >= 0xE0:
+            return c - 0x100
+        if c >= 0xA0:
+            if c <= 0xBF:
+                start = i
+                i += c & 0x1F
+                if i > size:
+                    raise ValueError("truncated msgpack data")
+                return str(buf[start:i], "utf-8")
+        elif c >= 0x90:
+            return [obj() for _ in range(c & 0x0F)]
+        else:
+            d = {}
+            for _ in range(c & 0x0F):
+                k = obj()
+                d[k] = obj()
+            return d
+        if c == 0xC0:
+            return None
+        if c == 0xC2:
+            return False
+        if c == 0xC3:
+            return True
+        fmt = _FORMATS.get(c)
+        if fmt is None:
+            raise ValueError("unsupported msgpack type 0x%02x" % c)
+        n, fmt, kind = fmt
+        value = struct.unpack_from(fmt, buf, take(n))[0]
+        if kind == _NUMBER:
+            return value
+        if kind == _ARRAY:
+            return [obj() for _ in range(value)]
+        if kind == _MAP:
+            d = {}
+            for _ in range(value):
+                k = obj()
+                d[k] = obj()
+            return d
+        start = take(value)
+        if kind == _STR:
+            return str(buf[start:i], "utf-8")
+        return bytes(buf[start:i])
+
+    try:
+        return obj(), i
+    except IndexError:
+        raise ValueError("truncated msgpack data")
+
+
+# Type byte -> (size, struct format, what the value is) for everything
+# past the fix* forms
+_NUMBER, _STR, _BIN, _ARRAY, _MAP = 0, 1, 2, 3, 4
+_FORMATS = {
+    0xCA: (4, ">f", _NUMBER), 0xCB: (8, ">d", _NUMBER),
+    0xCC: (1, ">B", _NUMBER), 0xCD: (2, ">H", _NUMBER), 0xCE: (4, ">I", _NUMBER), 0xCF: (8, ">Q", _NUMBER),
+    0xD0: (1, ">b", _NUMBER), 0xD1: (2, ">h", _NUMBER), 0xD2: (4, ">i", _NUMBER), 0xD3: (8, ">q", _NUMBER),
+    0xD9: (1, ">B", _STR), 0xDA: (2, ">H", _STR), 0xDB: (4, ">I", _STR),
+    0xC4: (1, ">B", _BIN), 0xC5: (2, ">H", _BIN), 0xC6: (4, ">I", _BIN),
+    0xDC: (2, ">H", _ARRAY), 0xDD: (4, ">I", _ARRAY),
+    0xDE: (2, ">H", _MAP), 0xDF: (4, ">I", _MAP),
+}
+
+
+def packb(obj, use_single_float=False):
+    """One-off encode to bytes. Senders should keep a Packer and reuse its buffer."""
+    packer = Packer(use_single_float=use_single_float)
+    return bytes(packer.pack(obj))
+
+
+def unpackb(data):
+    return Unpacker(data).unpack()
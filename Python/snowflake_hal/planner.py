@@ -0,0 +1,198 @@
+from array import array
+try:
+    import heapq
+except ImportError:
+    import uheapq as heapq # type: ignore
+
+# Turn-aware shortest routes on a grid, small enough for the Cayo board.
+#
+# A search state is (cell, heading). Driving one cell costs FORWARD_COST,
+# turning in place costs TURN_COST (U_TURN_COST for 180 degrees). Turns are
+# priced at what they really cost the robot: the turn itself plus the settle
+# pause it adds between two straight segments. So among equally short routes
+# the one with the fewest turns wins. Costs are in units of 500 ms.
+#
+# Memory for a 32x32 grid: 128-byte wall bitset, 4096-entry cost and parent
+# arrays (16 KB), preallocated once. The open list holds plain ints
+# (cost << bits | state), so pushes do not allocate tuples.
+#
+#     planner = GridPlanner(8, 8)
+#     planner.block(3, 4)
+#     cells, commands = planner.plan((7, 0), (0, 7))   # commands: 'F', 'L', 'R'
+
+NORTH, EAST, SOUTH, WEST = 0, 1, 2, 3
+DR = (-1, 0, 1, 0)
+DC = (0, 1, 0, -1)
+
+FORWARD_COST = 2    # CELL_MS = 1000
+TURN_COST = 3       # TURN_90_MS + settle after the turn + settle before it
+U_TURN_COST = 4
+
+MAX_CELLS = 32 * 32
+UNSEEN = 0xFFFF
+
+
+class GridPlanner:
+    def __init__(self, rows, cols, forward_cost=FORWARD_COST, turn_cost=TURN_COST, u_turn_cost=U_TURN_COST):
+        if rows * cols > MAX_CELLS:
+            raise ValueError("grid too large")
+        self.rows = rows
+        self.cols = cols
+        self.forward_cost = forward_cost
+        self.turn_cost = turn_cost
+        self.u_turn_cost = u_turn_cost
+        n = rows * cols
+        self.walls = bytearray((n + 7) // 8)
+        self.cost = array('H', (UNSEEN for _ in range(n * 4)))
+        self.parent = array('H', (0 for _ in range(n * 4)))
+        self._bits = (n * 4).bit_length()
+        self.expanded = 0
+
+    def _index(self, r, c):
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise ValueError("cell outside the grid")
+        return r * self.cols + c
+
+    def block(self, r, c):
+        i = self._index(r, c)
+        self.walls[i >> 3] |= 1 << (i & 7)
+
+    def unblock(self, r, c):
+        i = self._index(r, c)
+        self.walls[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def is_blocked(self, r, c):
+        i = self._index(r, c)
+        return bool(self.walls[i >> 3] & (1 << (i & 7)))
+
+    def clear(self):
+        for i in range(len(self.walls)):
+            self.walls[i] = 0
+
+    def _h(self, cell, heading, gr, gc):
+        """Admissible estimate: Manhattan cells, plus one turn for every direction
+        the robot still has to drive in but is not facing."""
+        r, c = divmod(cell, self.cols)
+        dr = gr - r
+        dc = gc - c
+        turns = 0
+        if dr and heading != (SOUTH if dr > 0 else NORTH):
+            turns += 1
+        if dc and heading != (EAST if dc > 0 else WEST):
+            turns += 1
+        return (abs(dr) + abs(dc)) * self.forward_cost + turns * self.turn_cost
+
+    def plan(self, start, goal, heading=NORTH):
+        """Returns (cells, commands) for the cheapest route, or None if the goal is unreachable.
+
+        cells is a list of (r, c) from start to goal; commands are per-cell
+        'F' / 'L' / 'R' (a U-turn is 'R', 'R'), ready for route.motion_program().
+        """
+        sr, sc = start
+        gr, gc = goal
+        s_cell = self._index(sr, sc)
+        g_cell = self._index(gr, gc)
+        if self.is_blocked(sr, sc) or self.is_blocked(gr, gc):
+            return None
+
+        cost = self.cost
+        parent = self.parent
+        walls = self.walls
+        cols = self.cols
+        rows = self.rows
+        bits = self._bits
+        mask = (1 << bits) - 1
+        for i in range(len(cost)):
+            cost[i] = UNSEEN
+
+        s = s_cell * 4 + heading
+        cost[s] = 0
+        parent[s] = s
+        open_list = [self._h(s_cell, heading, gr, gc) << bits | s]
+        self.expanded = 0
+        found = -1
+        while open_list:
+            item = heapq.heappop(open_list)
+            state = item & mask
+            cell = state >> 2
+            h = state & 3
+            g = cost[state]
+            if (item >> bits) - self._h(cell, h, gr, gc) > g:
+                continue  # stale entry, a cheaper one was already expanded
+            self.expanded += 1
+            if cell == g_cell:
+                found = state
+                break
+            r, c = divmod(cell, cols)
+            # Forward
+            nr = r + DR[h]
+            nc = c + DC[h]
+            if 0 <= nr < rows and 0 <= nc < cols:
+                ncell = nr * cols + nc
+                if not walls[ncell >> 3] & (1 << (ncell & 7)):
+                    self._relax(open_list, state, ncell * 4 + h, g + self.forward_cost, ncell, h, gr, gc)
+            # Turns in place
+            base = cell * 4
+            self._relax(open_list, state, base + ((h + 1) & 3), g + self.turn_cost, cell, (h + 1) & 3, gr, gc)
+            self._relax(open_list, state, base + ((h + 3) & 3), g + self.turn_cost, cell, (h + 3) & 3, gr, gc)
+            self._relax(open_list, state, base + ((h + 2) & 3), g + self.u_turn_cost, cell, (h + 2) & 3, gr, gc)
+        if found < 0:
+            return None
+        return self._unwind(found)
+
+    def _relax(self, open_list, state, nstate, g, ncell, nh, gr, gc):
+        if g < self.cost[nstate]:
+            self.cost[nstate] = g
+            self.parent[nstate] = state
+            heapq.heappush(open_list, (g + self._h(ncell, nh, gr, gc)) << self._bits | nstate)
+
+    def _unwind(self, state):
+        states = [state]
+        while self.parent[state] != state:
+            state = self.parent[state]
+            states.append(state)
+        states.reverse()
+        cols = self.cols
+        cells = [divmod(states[0] >> 2, cols)]
+        commands = []
+        for i in range(1, len(states)):
+            a = states[i - 1]
+            b = states[i]
+            if a >> 2 != b >> 2:
+                commands.append('F')
+                cells.append(divmod(b >> 2, cols))
+            else:
+                turn = ((b & 3) - (a & 3)) & 3
+                if turn == 1:
+                    commands.append('R')
+                elif turn == 3:
+                    commands.append('L')
+                else:
+                    commands.extend(('R', 'R'))
+        return cells, commands
+
+
+def bfs(rows, cols, blocked, start, goal):
+    """Plain breadth-first shortest path in cells (no turn costs), for comparison.
+
+    blocked is a set of (r, c). Returns the list of cells or None."""
+    prev = {start: None}
+    frontier = [start]
+    while frontier:
+        nxt = []
+        for cell in frontier:
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = prev[cell]
+                path.reverse()
+                return path
+            r, c = cell
+            for d in range(4):
+                n = (r + DR[d], c + DC[d])
+                if 0 <= n[0] < rows and 0 <= n[1] < cols and n not in blocked and n not in prev:
+                    prev[n] = cell
+                    nxt.append(n)
+        frontier = nxt
+    return None
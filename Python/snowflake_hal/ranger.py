@@ -0,0 +1,163 @@
+from machine import Pin # type: ignore
+import time
+from snowflake_hal.ultrasonic import CM_PER_US
+
+# Non-blocking HC-SR04 driver.
+# ping() only sends the 10 us trigger pulse; the echo edges are timestamped in
+# a pin interrupt and the result is published as the latest distance plus the
+# ticks_ms() time it was taken. The control loop calls update() every pass and
+# reads the cached value, so it never waits for the echo.
+
+
+class Ranger:
+    def __init__(self, trigger_pin, echo_pin, timeout_us=30000, interval_ms=60):
+        """
+        :param timeout_us: give up on an echo after this long (30000 us is about 5 m).
+        :param interval_ms: minimum time between pings started by update().
+        """
+        self.trigger = Pin(trigger_pin, Pin.OUT)
+        self.echo = Pin(echo_pin, Pin.IN)
+        self.trigger.value(0)
+        self.timeout_us = timeout_us
+        self.interval_ms = interval_ms
+
+        self.busy = False
+        self._t_ping = 0   # ticks_us when the trigger was sent
+        self._t_rise = -1  # ticks_us of this ping's echo rising edge, -1 until it is seen
+        self._last_ping_ms = time.ticks_ms() - interval_ms
+
+        # Published result: echo width in us (-1 = timeout) and when it was taken
+        self.pulse_us = -1
+        self.stamp_ms = time.ticks_ms()
+        self.readings = 0
+        self.timeouts = 0
+
+        # Hard IRQ: the edge is timestamped as it happens, not after the
+        # scheduler gets round to it. The handler only stores small ints.
+        self.echo.irq(handler=self._echo_irq, trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+
+    def _echo_irq(self, pin):
+        now = time.ticks_us()
+        if pin.value():
+            self._t_rise = now
+        # A fall with no rise since ping() is the tail of an older echo; ignore it
+        elif self.busy and self._t_rise >= 0:
+            self.pulse_us = time.ticks_diff(now, self._t_rise)
+            self.stamp_ms = time.ticks_ms()
+            self.readings += 1
+            self.busy = False
+
+    def ping(self):
+        """Starts a measurement. Returns False if one is still in flight."""
+        if self.busy:
+            return False
+        self.busy = True
+        self._t_rise = -1
+        self._t_ping = time.ticks_us()
+        self._last_ping_ms = time.ticks_ms()
+        self.trigger.value(1)
+        time.sleep_us(10)
+        self.trigger.value(0)
+        return True
+
+    def expire(self):
+        """Publishes a timeout if the echo is overdue. Returns True while a ping is in flight."""
+        if self.busy and time.ticks_diff(time.ticks_us(), self._t_ping) > self.timeout_us:
+            self.busy = False
+            self.pulse_us = -1
+            self.stamp_ms = time.ticks_ms()
+            self.timeouts += 1
+        return self.busy
+
+    def update(self):
+        """Call from the control loop: expires lost echoes and starts the next ping when due."""
+        if self.expire():
+            return
+        if time.ticks_diff(time.ticks_ms(), self._last_ping_ms) >= self.interval_ms:
+            self.ping()
+
+    def distance_cm(self):
+        """Latest distance in cm, or -1 if the last ping timed out."""
+        p = self.pulse_us
+        if p < 0:
+            return -1
+        return p * CM_PER_US
+
+    get_distance_cm = distance_cm
+
+    def age_ms(self):
+        """How old the published distance is."""
+        return time.ticks_diff(time.ticks_ms(), self.stamp_ms)
+
+
+class RangerScheduler:
+    """
+    Owns several Rangers and fires them one at a time so their echoes cannot
+    cross-talk. Sensors are pinged in `order` (names may repeat to sample one
+    sensor more often) and each ping waits `gap_ms` after the previous one
+    finished, to let stray reflections die out.
+    """
+    def __init__(self, gap_ms=10, window_ms=1000):
+        self.gap_ms = gap_ms
+        self.window_ms = window_ms
+        self.sensors = {}
+        self.order = []
+        self._next = 0
+        self._active = None
+        self._done_ms = time.ticks_ms() - gap_ms
+
+        # Aggregate refresh rate, recomputed once per window
+        self.refresh_hz = 0.0
+        self._win_start = time.ticks_ms()
+        self._win_count = 0
+
+    def add(self, name, trigger_pin, echo_pin, timeout_us=30000):
+        """Adds a sensor and appends it to the firing order."""
+        r = Ranger(trigger_pin, echo_pin, timeout_us)
+        self.sensors[name] = r
+        self.order.append(name)
+        return r
+
+    def set_order(self, order):
+        """Sets the firing order, e.g. ("front", "left", "front", "right")."""
+        for name in order:
+            if name not in self.sensors:
+                raise ValueError("unknown sensor: %s" % name)
+        self.order = list(order)
+        self._next = 0
+
+    def update(self):
+        """Call from the control loop. Never blocks."""
+        now = time.ticks_ms()
+        active = self._active
+        if active is not None:
+            if active.expire():
+                return
+            self._active = None
+            self._done_ms = now
+            self._win_count += 1
+
+        elapsed = time.ticks_diff(now, self._win_start)
+        if elapsed >= self.window_ms:
+            self.refresh_hz = self._win_count * 1000 / elapsed
+            self._win_start = now
+            self._win_count = 0
+
+        if not self.order or time.ticks_diff(now, self._done_ms) < self.gap_ms:
+            return
+        r = self.sensors[self.order[self._next]]
+        self._next = (self._next + 1) % len(self.order)
+        if r.ping():
+            self._active = r
+
+    def distance_cm(self, name):
+        return self.sensors[name].distance_cm()
+
+    def age_ms(self, name):
+        return self.sensors[name].age_ms()
+
+    def sensor_hz(self, name):
+        """Approximate refresh rate of one sensor, from its share of the firing order."""
+        if not self.order:
+            return 0.0
+        return self.refresh_hz * self.order.count(name) / len(self.order)
@@ -0,0 +1,379 @@
+from array import array
+import time
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio # type: ignore
+from snowflake_hal import link
+
+# Route upload over the link protocol, with flow control.
+#
+# The sender announces a route with PATH_BEGIN(total). The receiver answers
+# with CREDIT(free queue slots). The sender then writes at most that many
+# step frames in one batch. Each time the receiver finishes a step it
+# reports PROGRESS(done) and CREDIT(1), so the sender tops the queue up
+# again. The receiver never has more queued than it can hold, and a full
+# credit's worth of frames (QUEUE_SIZE * 6 bytes) fits in the UART's
+# 256-byte RX FIFO even if the receiver is slow to read it.
+#
+# PATH_BEGIN, CREDIT, PROGRESS and STATUS values carry a 3-bit route id in
+# bits 12-14 (value = id << 12 | n). When a route replaces a running one,
+# CREDIT(1) / PROGRESS frames the robot sent for the old route can still be
+# on the wire; the sender drops anything not tagged with the current id, so
+# they cannot be counted as credit for the new route.
+#
+# Frames can still be lost, so both ends watch the clock. While a route is
+# active the robot repeats PROGRESS(done) every HEARTBEAT_MS, even in the
+# middle of a long step. The sender polls check() (watch_sender() does it
+# in a WebServer script):
+#   - no CREDIT within SENDER_TIMEOUT_MS of PATH_BEGIN: the begin or its
+#     answer was lost, so PATH_BEGIN is sent again, up to BEGIN_RESENDS times;
+#   - nothing at all for SENDER_TIMEOUT_MS once steps are out: the robot or
+#     the link is gone, so it sends STOP and reports ROUTE_ERROR (or
+#     ROUTE_DONE if every step was already reported done).
+# The robot polls check() too. Once it has sat idle for RUNNER_TIMEOUT_MS,
+# waiting for steps it was promised, the end of a batch was lost. It then
+# gives up with STATUS(ROUTE_ERROR) and the script stops the motors.
+# RUNNER_TIMEOUT_MS is the longer of the two, so a resent PATH_BEGIN gets
+# there first.
+#
+#   Cayo bridge (sender)                   Subu / Snowflake (receiver)
+#     tx = RouteSender(link_tx)              runner = RouteRunner(link_tx)
+#     link_rx.on(CREDIT, tx.on_credit)       link_rx.on(PATH_BEGIN, runner.on_begin)
+#     link_rx.on(PROGRESS, tx.on_progress)   link_rx.on(FORWARD, runner.on_step) ...
+#     tx.start(['F3', 'T90', 'F1'])          step = runner.next() ... runner.step_done()
+#     tx.check() every ~200 ms               if runner.check(): stop the motors
+
+QUEUE_SIZE = 32
+
+ROUTE_ID_SHIFT = 12
+ROUTE_IDS = 8
+MAX_STEPS = (1 << ROUTE_ID_SHIFT) - 1
+
+# Status codes sent as STATUS frames
+ROUTE_DONE = 1
+ROUTE_ABORTED = 2
+ROUTE_ERROR = 3     # frames were lost or the link went quiet; the route is abandoned
+
+HEARTBEAT_MS = 1000     # the robot repeats PROGRESS this often while a route is active
+SENDER_TIMEOUT_MS = 3000
+RUNNER_TIMEOUT_MS = 5000
+BEGIN_RESENDS = 3
+
+
+def path_commands(path, orientation=0):
+    """Converts a list of {'r', 'c'} cells into per-cell robot commands (F, L, R).
+
+    orientation is the robot's heading at the first cell: 0=North, 1=East, 2=South, 3=West."""
+    if not path or len(path) < 2:
+        return []
+
+    commands = []
+
+    for i in range(len(path) - 1):
+        current_pos = path[i]
+        next_pos = path[i+1]
+
+        dr = next_pos['r'] - current_pos['r']
+        dc = next_pos['c'] - current_pos['c']
+
+        target_orientation = -1
+        if dr == -1 and dc == 0: target_orientation = 0 # North
+        elif dr == 0 and dc == 1: target_orientation = 1 # East
+        elif dr == 1 and dc == 0: target_orientation = 2 # South
+        elif dr == 0 and dc == -1: target_orientation = 3 # West
+
+        if target_orientation == -1: continue # Skip diagonal/invalid moves
+
+        # Calculate turns needed
+        turn = (target_orientation - orientation + 4) % 4
+        if turn == 1: # Turn right
+            commands.append('R')
+        elif turn == 2: # Turn 180 (Right, Right)
+            commands.append('R')
+            commands.append('R')
+        elif turn == 3: # Turn left
+            commands.append('L')
+
+        orientation = target_orientation
+        commands.append('F') # Move forward
+
+    return commands
+
+
+def motion_program(commands):
+    """Compresses per-cell commands into run-length motion steps.
+
+    Consecutive 'F' merge into one 'F<n>' and consecutive turns into one
+    signed 'T<degrees>' (+ right, - left, 180 for a U-turn), so the robot
+    drives a straight corridor in one go instead of stopping at every cell:
+        ['F', 'F', 'R', 'R', 'F'] -> ['F2', 'T180', 'F1']
+    """
+    program = []
+    cells = 0
+    angle = 0
+    for c in commands:
+        if c == 'F':
+            if angle:
+                program.append('T%d' % angle)
+                angle = 0
+            cells += 1
+        elif c in ('L', 'R'):
+            if cells:
+                program.append('F%d' % cells)
+                cells = 0
+            angle += 90 if c == 'R' else -90
+            angle = (angle + 180) % 360 - 180  # keep it in -180..179
+            if angle == -180:
+                angle = 180
+    if cells:
+        program.append('F%d' % cells)
+    if angle:
+        program.append('T%d' % angle)
+    return program
+
+
+def tag(route_id, n):
+    """Frame value carrying n (0..MAX_STEPS) for route route_id."""
+    return route_id << ROUTE_ID_SHIFT | n
+
+
+def untag(value):
+    """(route_id, n) from a tagged frame value."""
+    return (value >> ROUTE_ID_SHIFT) & (ROUTE_IDS - 1), value & MAX_STEPS
+
+
+class CommandQueue:
+    """Bounded FIFO of (op, arg) pairs in preallocated arrays."""
+
+    def __init__(self, capacity=QUEUE_SIZE):
+        self.ops = bytearray(capacity)
+        self.args = array('h', [0] * capacity)
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+
+    def put(self, op, arg=0):
+        """Appends a command; returns False when the queue is full."""
+        if self.count == self.capacity:
+            return False
+        i = (self.head + self.count) % self.capacity
+        self.ops[i] = op
+        self.args[i] = arg
+        self.count += 1
+        return True
+
+    def get(self):
+        """Removes and returns the oldest (op, arg), or None when empty."""
+        if not self.count:
+            return None
+        i = self.head
+        self.head = (i + 1) % self.capacity
+        self.count -= 1
+        return self.ops[i], self.args[i]
+
+    def free(self):
+        return self.capacity - self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+class RouteSender:
+    """Bridge side: streams a route to the robot as credits allow."""
+
+    def __init__(self, encoder, on_progress=None, timeout_ms=SENDER_TIMEOUT_MS):
+        self.encoder = encoder
+        self.on_update = on_progress    # called as on_progress(done, total, status)
+        self.timeout_ms = timeout_ms
+        self.steps = []
+        self.sent = 0
+        self.done = 0
+        self.credit = 0
+        self.status = None
+        self.route_id = 0
+        self.stale = 0      # frames dropped because they belong to an earlier route
+        self.resends = 0
+        self._heard_ms = 0  # ticks_ms of the last frame for the current route
+        self._begin_ms = 0
+
+    @property
+    def total(self):
+        return len(self.steps)
+
+    @property
+    def running(self):
+        return self.total > 0 and self.status is None
+
+    def start(self, commands):
+        """Begins a new route (replacing any running one) from steps like 'F3', 'T-90'."""
+        if len(commands) > MAX_STEPS:
+            raise ValueError("route longer than %d steps" % MAX_STEPS)
+        self.steps = [(ord(c[0]), int(c[1:]) if len(c) > 1 else 0) for c in commands]
+        self.sent = 0
+        self.done = 0
+        self.credit = 0
+        self.status = None
+        self.resends = 0
+        self.route_id = (self.route_id + 1) % ROUTE_IDS
+        self._begin()
+        self._notify()
+
+    def _begin(self):
+        self.encoder.send(link.PATH_BEGIN, tag(self.route_id, self.total))
+        self._heard_ms = self._begin_ms = time.ticks_ms()
+
+    def _current(self, value):
+        """n from a tagged value, or None if it was sent for an earlier route."""
+        route_id, n = untag(value)
+        if route_id != self.route_id:
+            self.stale += 1
+            return None
+        self._heard_ms = time.ticks_ms()
+        return n
+
+    def check(self):
+        """Call periodically: resends a lost PATH_BEGIN/CREDIT or gives up on a silent robot."""
+        if not self.running:
+            return
+        now = time.ticks_ms()
+        if self.sent == 0:
+            # Heartbeats don't count here: they say the robot is there, not that credit came
+            if time.ticks_diff(now, self._begin_ms) < self.timeout_ms:
+                return
+            if self.resends < BEGIN_RESENDS:
+                # Nothing has run yet, so starting over on the robot is harmless
+                self.resends += 1
+                self._begin()
+                return
+        elif time.ticks_diff(now, self._heard_ms) < self.timeout_ms:
+            return
+        elif self.done >= self.total:
+            self.status = ROUTE_DONE    # only the final STATUS frame was lost
+            self._notify()
+            return
+        self.encoder.send(link.STOP)
+        self.status = ROUTE_ERROR
+        self._notify()
+
+    def stop(self):
+        self.encoder.send(link.STOP)
+
+    def on_credit(self, value):
+        value = self._current(value)
+        if value is None:
+            return
+        self.credit += value
+        n = min(self.credit, self.total - self.sent)
+        if n > 0:
+            # One write for the whole batch
+            self.encoder.send_many(self.steps[self.sent:self.sent + n])
+            self.sent += n
+            self.credit -= n
+
+    def on_progress(self, value):
+        value = self._current(value)
+        if value is None:
+            return
+        self.done = value
+        self._notify()
+
+    def on_status(self, value):
+        value = self._current(value)
+        if value is None:
+            return
+        self.status = value
+        self._notify()
+
+    def _notify(self):
+        if self.on_update is not None:
+            self.on_update(self.done, self.total, self.status)
+
+
+class RouteRunner:
+    """Robot side: queues incoming steps and reports progress and credit."""
+
+    def __init__(self, encoder, capacity=QUEUE_SIZE, timeout_ms=RUNNER_TIMEOUT_MS):
+        self.encoder = encoder
+        self.timeout_ms = timeout_ms
+        self.queue = CommandQueue(capacity)
+        self.total = 0
+        self.received = 0
+        self.done = 0
+        self.active = False
+        self.route_id = 0
+        self._waiting_ms = 0    # ticks_ms since which steps are owed to us
+        self._beat_ms = 0
+
+    def on_begin(self, value):
+        """A new route: drop whatever is left of the old one and hand out credit."""
+        self.route_id, total = untag(value)
+        self.queue.clear()
+        self.total = total
+        self.received = 0
+        self.done = 0
+        self.active = total > 0
+        self._send(link.CREDIT, self.queue.free())
+        self._waiting_ms = self._beat_ms = time.ticks_ms()
+
+    def _send(self, msg_type, n):
+        self.encoder.send(msg_type, tag(self.route_id, n))
+
+    def on_step(self, op, arg=0):
+        if not self.active or self.received >= self.total:
+            return
+        if not self.queue.put(op, arg):
+            self.fail()  # the sender overran its credit
+            return
+        self.received += 1
+        self._waiting_ms = time.ticks_ms()
+
+    def next(self):
+        """Returns the next (op, arg) to execute, or None."""
+        return self.queue.get()
+
+    def step_done(self):
+        self.done += 1
+        self._send(link.PROGRESS, self.done)
+        if self.done >= self.total:
+            self.active = False
+            self._send(link.STATUS, ROUTE_DONE)
+        else:
+            self._send(link.CREDIT, 1)
+            self._waiting_ms = time.ticks_ms()
+
+    def check(self):
+        """Call every loop pass. Sends the PROGRESS heartbeat and returns True
+        when the route was just abandoned because promised steps never came
+        (the caller should stop the motors)."""
+        if not self.active:
+            return False
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._beat_ms) >= HEARTBEAT_MS:
+            self._beat_ms = now
+            self._send(link.PROGRESS, self.done)
+        # Idle (nothing queued, nothing running) while the route is unfinished
+        idle = not self.queue.count and self.received == self.done
+        if idle and time.ticks_diff(now, self._waiting_ms) >= self.timeout_ms:
+            self.fail()
+            return True
+        return False
+
+    def abort(self):
+        if self.active:
+            self._send(link.STATUS, ROUTE_ABORTED)
+        self.queue.clear()
+        self.active = False
+
+    def fail(self):
+        self.queue.clear()
+        self.active = False
+        self._send(link.STATUS, ROUTE_ERROR)
+
+
+async def watch_sender(sender, period_ms=200):
+    """Background task for WebServer scripts: runs sender.check() every period_ms."""
+    while True:
+        sender.check()
+        await asyncio.sleep(period_ms / 1000)
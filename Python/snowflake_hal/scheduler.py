@@ -0,0 +1,117 @@
+import time
+
+# Fixed-rate cooperative scheduler.
+# Tasks register with a period and a priority; run() calls each one when its
+# deadline comes up (highest priority first when several are due), sleeps
+# until the next deadline otherwise, and keeps per-task jitter / overrun
+# counters so a loop that cannot hold its rate shows up in the numbers.
+# Tasks must not block: a task that takes longer than its period delays
+# every other task.
+
+
+class Task:
+    def __init__(self, name, fn, period_us, priority):
+        self.name = name
+        self.fn = fn
+        self.period_us = period_us
+        self.priority = priority
+        self.due = 0
+        self.enabled = True
+        # Statistics
+        self.runs = 0
+        self.overruns = 0      # deadlines missed by a whole period (skipped runs)
+        self.max_jitter_us = 0
+        self.total_jitter_us = 0
+        self.max_exec_us = 0
+
+    def reset_stats(self):
+        self.runs = self.overruns = 0
+        self.max_jitter_us = self.total_jitter_us = self.max_exec_us = 0
+
+
+class Scheduler:
+    def __init__(self):
+        self.tasks = []
+        self._running = False
+
+    def add(self, name, fn, period_ms, priority=0, delay_ms=0):
+        """
+        Registers fn() to run every period_ms (floats allowed, e.g. 5 for 200 Hz).
+        Higher priority runs first when several tasks are due together.
+        The first run happens after delay_ms.
+        """
+        t = Task(name, fn, int(period_ms * 1000), priority)
+        t.due = time.ticks_add(time.ticks_us(), int(delay_ms * 1000))
+        self.tasks.append(t)
+        # Keep the list in priority order so run_once() can take the first due task
+        self.tasks.sort(key=lambda task: -task.priority)
+        return t
+
+    def get(self, name):
+        for t in self.tasks:
+            if t.name == name:
+                return t
+        raise KeyError(name)
+
+    def run_once(self):
+        """
+        Runs every task that is due. Returns the time in us until the next
+        deadline (0 or less if something is already due again).
+        """
+        for t in self.tasks:
+            if not t.enabled:
+                continue
+            now = time.ticks_us()
+            late = time.ticks_diff(now, t.due)
+            if late < 0:
+                continue
+            t.fn()
+            end = time.ticks_us()
+            t.runs += 1
+            t.total_jitter_us += late
+            if late > t.max_jitter_us:
+                t.max_jitter_us = late
+            exec_us = time.ticks_diff(end, now)
+            if exec_us > t.max_exec_us:
+                t.max_exec_us = exec_us
+            t.due = time.ticks_add(t.due, t.period_us)
+            if time.ticks_diff(end, t.due) >= 0:
+                # A whole period was lost: skip ahead instead of bursting to catch up
+                t.overruns += 1
+                t.due = time.ticks_add(end, t.period_us)
+        return self.time_to_next()
+
+    def time_to_next(self):
+        now = time.ticks_us()
+        wait = None
+        for t in self.tasks:
+            if t.enabled:
+                d = time.ticks_diff(t.due, now)
+                if wait is None or d < wait:
+                    wait = d
+        return 0 if wait is None else wait
+
+    def run(self, duration_ms=None):
+        """Runs the tasks until stop() is called or duration_ms has passed."""
+        self._running = True
+        start = time.ticks_ms()
+        while self._running:
+            wait = self.run_once()
+            if duration_ms is not None and time.ticks_diff(time.ticks_ms(), start) >= duration_ms:
+                break
+            if wait > 0:
+                time.sleep_us(wait)
+
+    def stop(self):
+        self._running = False
+
+    def reset_stats(self):
+        for t in self.tasks:
+            t.reset_stats()
+
+    def report(self):
+        """Prints one line of timing statistics per task."""
+        for t in self.tasks:
+            avg = t.total_jitter_us // t.runs if t.runs else 0
+            print("%-10s %6.1f Hz  runs %6d  jitter avg %5d us max %6d us  exec max %6d us  overruns %d"
+                  % (t.name, 1000000 / t.period_us, t.runs, avg, t.max_jitter_us, t.max_exec_us, t.overruns))
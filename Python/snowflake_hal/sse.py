@@ -0,0 +1,100 @@
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio # type: ignore
+from snowflake_hal.web import StreamResponse
+
+# Server-Sent Events telemetry for the sender pages.
+#
+#     events = EventStream().attach(app, "/events")
+#     events.publish("distance", "42.5")      # from the UART pump
+#
+# Every client gets at most one message per event name every min_interval_ms;
+# values published in between are coalesced, so only the newest one goes out
+# and a slow phone never builds a backlog. In the page:
+#
+#     new EventSource('/events').addEventListener('distance', e => ...)
+
+MIN_INTERVAL_MS = 100
+HEARTBEAT_MS = 15000
+RETRY_MS = 2000
+
+# UART line prefixes understood by publish_line(); a bare value is a distance
+LINE_EVENTS = {"D": "distance", "S": "status", "P": "position"}
+
+
+class EventStream:
+    def __init__(self, min_interval_ms=MIN_INTERVAL_MS, heartbeat_ms=HEARTBEAT_MS, retry_ms=RETRY_MS):
+        self.min_interval_ms = min_interval_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.retry_ms = retry_ms
+        self.latest = {}    # event name -> (version, data)
+        self.version = 0
+        self.clients = 0
+        self.published = 0
+        self.sent = 0
+
+    def attach(self, app, path="/events"):
+        """Registers the SSE endpoint on a WebServer."""
+        app.route(path)(self.handler)
+        return self
+
+    def publish(self, event, data):
+        """Sets the newest value of event; it is sent on each client's next tick."""
+        self.version += 1
+        self.latest[event] = (self.version, data)
+        self.published += 1
+
+    def publish_line(self, line):
+        """Publishes one UART line such as b'42.5', b'S:ARRIVED' or b'P:10,20'.
+
+        Returns (event, data), or None for a blank line."""
+        if isinstance(line, bytes):
+            line = line.decode()
+        line = line.strip()
+        if not line:
+            return None
+        if len(line) > 1 and line[1] == ":" and line[0] in LINE_EVENTS:
+            event, data = LINE_EVENTS[line[0]], line[2:]
+        else:
+            event, data = "distance", line
+        self.publish(event, data)
+        return event, data
+
+    def _pending(self, seen):
+        """Encodes every event newer than seen (and advances seen), or returns None."""
+        out = None
+        for event in self.latest:
+            version, data = self.latest[event]
+            if version > seen.get(event, 0):
+                seen[event] = version
+                msg = "event: %s\ndata: %s\n\n" % (event, data)
+                out = msg if out is None else out + msg
+                self.sent += 1
+        return out
+
+    async def _stream(self, writer):
+        self.clients += 1
+        seen = {}
+        idle_ms = 0
+        try:
+            writer.write(("retry: %d\n\n" % self.retry_ms).encode())
+            await writer.drain()
+            while True:
+                msg = self._pending(seen)
+                if msg is None:
+                    idle_ms += self.min_interval_ms
+                    if idle_ms >= self.heartbeat_ms:
+                        msg = ":\n\n"  # comment line keeps proxies quiet and finds dead clients
+                if msg is not None:
+                    idle_ms = 0
+                    writer.write(msg.encode())
+                    await writer.drain()
+                await asyncio.sleep(self.min_interval_ms / 1000)
+        except OSError:
+            pass
+        finally:
+            self.clients -= 1
+
+    def handler(self, req):
+        return StreamResponse(self._stream, "text/event-stream", {"Cache-Control": "no-cache"})
@@ -0,0 +1,94 @@
+import binascii
+import struct
+from snowflake_hal.web import Response
+
+# Pre-rendered pages for the WebServer. Each page is kept as one bytes object
+# (gzip-compressed when build_static.py has been run), with an ETag computed
+# once at boot, so a page hit is a single write and a phone that already has
+# the page gets a bodyless 304.
+#
+#     PAGE = load_page("rc.html", get_web_page_html)
+#
+#     @app.route("/")
+#     def index(req):
+#         return PAGE(req)
+#
+# load_page looks for the compressed page in this order:
+#   1. the frozen/uploaded module www_pages.py (PAGES dict, see build_static.py)
+#   2. the file www/<name>.gz in flash
+#   3. render() - the page is encoded once and served uncompressed
+# When render is given, a stored copy is only used if it still matches it:
+# the gzip trailer holds the CRC32 and length of the HTML it was built from,
+# so an edited page whose build_static.py run was forgotten is served fresh
+# (uncompressed, with a warning) instead of the stale copy.
+
+WWW_DIR = "www"
+MAX_AGE = 600   # seconds a phone may reuse the page without asking
+
+
+class StaticAsset:
+    def __init__(self, body, content_type="text/html; charset=utf-8", gzipped=False, max_age=MAX_AGE):
+        if isinstance(body, str):
+            body = body.encode()
+        self.body = body
+        self.content_type = content_type
+        self.gzipped = gzipped
+        self.etag = '"%08x"' % (binascii.crc32(body) & 0xFFFFFFFF)
+        self.headers = {"ETag": self.etag, "Cache-Control": "max-age=%d" % max_age}
+        if gzipped:
+            self.headers["Content-Encoding"] = "gzip"
+            self.headers["Vary"] = "Accept-Encoding"
+        self._not_modified = Response(b"", 304, content_type, {"ETag": self.etag})
+        self._full = Response(body, 200, content_type, self.headers)
+        self.hits = 0
+        self.revalidated = 0
+
+    def __call__(self, req):
+        """Returns the cached Response for req (304 when the client's copy is current)."""
+        self.hits += 1
+        if req.headers.get("if-none-match") == self.etag:
+            self.revalidated += 1
+            return self._not_modified
+        return self._full
+
+
+def _read_gz(name):
+    try:
+        import www_pages # type: ignore
+        body = www_pages.PAGES.get(name)
+        if body is not None:
+            return body
+    except ImportError:
+        pass
+    try:
+        with open(WWW_DIR + "/" + name + ".gz", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _gz_matches(body, page):
+    """True if the gzip member body was compressed from page."""
+    if len(body) < 18:
+        return False
+    crc, size = struct.unpack("<II", body[-8:])
+    return size == len(page) & 0xFFFFFFFF and crc == binascii.crc32(page) & 0xFFFFFFFF
+
+
+def load_page(name, render=None, content_type="text/html; charset=utf-8", max_age=MAX_AGE):
+    """Returns a StaticAsset for name, preferring the pre-gzipped copy while it is current."""
+    body = _read_gz(name)
+    if body is not None and render is None:
+        return StaticAsset(body, content_type, True, max_age)
+    if render is None:
+        raise OSError("page not found: " + name)
+    page = render()
+    if isinstance(page, str):
+        page = page.encode()
+    if body is None:
+        print("Serving", name, "uncompressed (run build_static.py to gzip it)")
+    elif _gz_matches(body, page):
+        return StaticAsset(body, content_type, True, max_age)
+    else:
+        print("Serving", name, "uncompressed: the gzipped copy is stale (rerun build_static.py)")
+    return StaticAsset(page, content_type, False, max_age)
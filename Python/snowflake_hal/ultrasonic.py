@@ -0,0 +1,30 @@
+from machine import Pin, time_pulse_us # type: ignore
+import time
+
+# Speed of sound in cm/us, halved for the round trip
+CM_PER_US = 0.0343 / 2
+
+
+class Ultrasonic:
+    """Measures distance using an HC-SR04 ultrasonic sensor."""
+    def __init__(self, trigger_pin, echo_pin, timeout_us=30000):
+        self.trigger = Pin(trigger_pin, Pin.OUT)
+        self.echo = Pin(echo_pin, Pin.IN)
+        self.timeout_us = timeout_us
+        self.trigger.value(0)
+
+    def get_distance_cm(self):
+        """Returns the distance in cm, or -1 when no echo came back in time."""
+        self.trigger.value(0); time.sleep_us(2)
+        self.trigger.value(1); time.sleep_us(10)
+        self.trigger.value(0)
+        try:
+            pulse_duration = time_pulse_us(self.echo, 1, self.timeout_us)
+        except OSError:
+            return -1
+        # time_pulse_us reports a timeout with -1 / -2 instead of raising
+        if pulse_duration < 0:
+            return -1
+        return pulse_duration * CM_PER_US
+
+    distance_cm = get_distance_cm
@@ -0,0 +1,366 @@
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio # type: ignore
+from snowflake_hal.websocket import WebSocket, accept_key
+
+# Small asyncio HTTP/1.1 server shared by the Cayo/ESP32 sender scripts.
+# Scripts register routes and background tasks (e.g. the UART pump) and call
+# run(). Every connection is served by its own task, so a slow phone only
+# stalls itself, and connections are kept alive between requests so a button
+# press does not pay for a new TCP handshake. Runs unchanged under CPython
+# asyncio for host-side testing.
+#
+#     app = WebServer()
+#
+#     @app.route("/")
+#     def index(req):
+#         return PAGE_HTML
+#
+#     app.add_task(pump_uart(uart, on_line))
+#     app.run()
+
+MAX_LINE = 512       # longest request / header line accepted
+MAX_HEADERS = 32
+MAX_BODY = 4096
+
+STATUS_TEXT = {
+    101: "Switching Protocols", 200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error", 501: "Not Implemented",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=""):
+        super().__init__(message)
+        self.status = status
+
+
+def unquote(s):
+    """Decodes %xx escapes and '+' in a query string component."""
+    if "%" not in s and "+" not in s:
+        return s
+    s = s.replace("+", " ")
+    parts = s.split("%")
+    out = bytearray(parts[0].encode())
+    for p in parts[1:]:
+        try:
+            out.append(int(p[:2], 16))
+            out.extend(p[2:].encode())
+        except ValueError:
+            out.extend(b"%" + p.encode())
+    return out.decode()
+
+
+def parse_qs(qs):
+    params = {}
+    for part in qs.split("&"):
+        if part:
+            k, _, v = part.partition("=")
+            params[unquote(k)] = unquote(v)
+    return params
+
+
+class Request:
+    def __init__(self, method, path, query, version, headers, body=b""):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        import json
+        # body may be a view into the connection's buffer; json wants bytes
+        return json.loads(bytes(self.body))
+
+
+class Response:
+    def __init__(self, body=b"", status=200, content_type="text/plain", headers=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.headers = headers
+
+
+class StreamResponse(Response):
+    """Response whose body is written by an async stream(writer) callback.
+
+    Sent without Content-Length; the connection closes when stream() returns."""
+
+    def __init__(self, stream, content_type="text/plain", headers=None):
+        super().__init__(b"", 200, content_type, headers)
+        self.stream = stream
+
+
+def _to_response(result):
+    if isinstance(result, Response):
+        return result
+    if result is None:
+        return Response(b"", 204)
+    if isinstance(result, tuple):
+        status, content_type, body = result
+        return Response(body, status, content_type)
+    return Response(result, 200, "text/html")
+
+
+class _Connection:
+    """Per-connection state kept between keep-alive requests."""
+    def __init__(self):
+        self.body_buf = None
+        self.rx = b""            # read from the socket but not consumed yet
+
+
+class _PrefixedReader:
+    """Hands out bytes the server already read before reading the stream itself."""
+    def __init__(self, prefix, reader):
+        self.prefix = prefix
+        self.reader = reader
+
+    async def readexactly(self, n):
+        head = self.prefix[:n]
+        self.prefix = self.prefix[n:]
+        if len(head) < n:
+            head += await self.reader.readexactly(n - len(head))
+        return head
+
+
+class WebServer:
+    def __init__(self, keepalive_s=5, max_body=MAX_BODY):
+        self.routes = {}
+        self.ws_routes = {}
+        self.body_limits = {}
+        self.tasks = []
+        self.keepalive_s = keepalive_s
+        self.max_body = max_body
+        # Each connection gets a body buffer the size of its first upload and
+        # reuses it (growing it for a bigger one) for later requests on the
+        # same keep-alive connection. Bodies are handed to handlers as
+        # memoryviews into it, so no upload waits for another one to finish.
+        self.server = None
+        self.connections = 0
+        self.requests = 0
+        self.bodies = 0
+
+    def route(self, path, methods=("GET",), max_body=None):
+        """Decorator registering a handler(req) for path. Handlers may be async.
+
+        max_body overrides the server's body limit for this path."""
+        def register(handler):
+            for m in methods:
+                self.routes[(m, path)] = handler
+            if max_body is not None:
+                self.body_limits[path] = max_body
+            return handler
+        return register
+
+    def websocket(self, path):
+        """Decorator registering an async handler(ws) for WebSocket upgrades on path."""
+        def register(handler):
+            self.ws_routes[path] = handler
+            return handler
+        return register
+
+    def add_task(self, coro):
+        """Runs coro alongside the server (started by run())."""
+        self.tasks.append(coro)
+
+    async def _readline(self, reader, conn, error):
+        """Next line from the connection. Reads in chunks and gives up with
+        HTTPError(400, error) once MAX_LINE bytes pass without a newline, so
+        an oversized line never sits in RAM whole."""
+        buf = conn.rx
+        while True:
+            i = buf.find(b"\n")
+            if i >= 0:
+                if i >= MAX_LINE:
+                    raise HTTPError(400, error)
+                conn.rx = buf[i + 1:]
+                return buf[:i + 1]
+            if len(buf) >= MAX_LINE:
+                raise HTTPError(400, error)
+            data = await reader.read(MAX_LINE)
+            if not data:
+                conn.rx = b""
+                return buf
+            buf += data
+
+    async def _read_request(self, reader, conn):
+        line = await asyncio.wait_for(self._readline(reader, conn, "request line too long"), self.keepalive_s)
+        if not line:
+            return None
+        # Headers and body have to arrive within keepalive_s as well, so a
+        # client that stalls halfway only ties up its own connection
+        return await asyncio.wait_for(self._read_rest(reader, conn, line), self.keepalive_s)
+
+    async def _read_rest(self, reader, conn, line):
+        try:
+            method, target, version = line.decode().split()
+        except ValueError:
+            raise HTTPError(400, "bad request line")
+        path, _, qs = target.partition("?")
+
+        headers = {}
+        while True:
+            line = await self._readline(reader, conn, "headers too large")
+            if not line:
+                return None
+            if line in (b"\r\n", b"\n"):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, "headers too large")
+            k, _, v = line.decode().partition(":")
+            headers[k.strip().lower()] = v.strip()
+
+        req = Request(method, path, parse_qs(qs), version, headers)
+        if "transfer-encoding" in headers:
+            raise HTTPError(501, "chunked bodies are not supported")
+        try:
+            n = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if n:
+            # Refused before a single body byte is read
+            if n > self.body_limits.get(path, self.max_body):
+                raise HTTPError(413, "body too large")
+            req.body = await self._read_body(reader, conn, n)
+        return req
+
+    async def _read_body(self, reader, conn, n):
+        """Reads exactly n bytes, however many segments they arrive in, into the connection's buffer."""
+        if conn.body_buf is None or len(conn.body_buf) < n:
+            conn.body_buf = None
+            conn.body_buf = bytearray(n)
+        mv = memoryview(conn.body_buf)
+        # The start of the body may have come in with the last header line
+        got = min(n, len(conn.rx))
+        if got:
+            mv[:got] = conn.rx[:got]
+            conn.rx = conn.rx[got:]
+        while got < n:
+            k = await _readinto(reader, mv[got:n])
+            if not k:
+                raise EOFError("body truncated")
+            got += k
+        self.bodies += 1
+        return mv[:n]
+
+    async def _send(self, writer, resp, keep_alive):
+        if isinstance(resp, StreamResponse):
+            head = "HTTP/1.1 200 OK\r\nContent-Type: %s\r\nConnection: close\r\n" % resp.content_type
+            body = b""
+        else:
+            body = resp.body
+            if isinstance(body, str):
+                body = body.encode()
+            head = "HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: %s\r\n" % (
+                resp.status, STATUS_TEXT.get(resp.status, ""), resp.content_type, len(body),
+                "keep-alive" if keep_alive else "close")
+        if resp.headers:
+            for k in resp.headers:
+                head += "%s: %s\r\n" % (k, resp.headers[k])
+        writer.write(head.encode() + b"\r\n")
+        if body:
+            writer.write(body)
+        await writer.drain()
+
+    async def _dispatch(self, req):
+        handler = self.routes.get((req.method, req.path))
+        if handler is None:
+            if any(p == req.path for _, p in self.routes):
+                raise HTTPError(405)
+            raise HTTPError(404)
+        result = handler(req)
+        if hasattr(result, "send"):  # coroutine / generator from an async handler
+            result = await result
+        return _to_response(result)
+
+    async def _upgrade(self, req, reader, writer, conn):
+        key = req.headers.get("sec-websocket-key")
+        if req.headers.get("upgrade", "").lower() != "websocket" or not key:
+            raise HTTPError(400, "expected a WebSocket upgrade")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                      "Connection: Upgrade\r\nSec-WebSocket-Accept: %s\r\n\r\n" % accept_key(key)).encode())
+        await writer.drain()
+        if conn.rx:
+            reader = _PrefixedReader(conn.rx, reader)
+            conn.rx = b""
+        await self.ws_routes[req.path](WebSocket(reader, writer))
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        conn = _Connection()
+        try:
+            while True:
+                try:
+                    req = await self._read_request(reader, conn)
+                except HTTPError as e:
+                    await self._send(writer, Response(str(e), e.status), False)
+                    break
+                if req is None:
+                    break
+                self.requests += 1
+                if req.path in self.ws_routes:
+                    try:
+                        await self._upgrade(req, reader, writer, conn)
+                    except HTTPError as e:
+                        await self._send(writer, Response(str(e), e.status), False)
+                    break
+                keep_alive = req.version == "HTTP/1.1" and req.headers.get("connection", "").lower() != "close"
+                try:
+                    resp = await self._dispatch(req)
+                except HTTPError as e:
+                    resp = Response(str(e), e.status)
+                except Exception as e:
+                    print("Handler error:", e)
+                    resp = Response("error", 500)
+                    keep_alive = False
+                req.body = b""  # the buffer belongs to the next upload now
+                await self._send(writer, resp, keep_alive)
+                if isinstance(resp, StreamResponse):
+                    await resp.stream(writer)
+                    break
+                if not keep_alive:
+                    break
+        except (OSError, asyncio.TimeoutError, EOFError):
+            pass
+        finally:
+            self.connections -= 1
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def serve(self, host="0.0.0.0", port=80, backlog=5):
+        for coro in self.tasks:
+            asyncio.create_task(coro)
+        self.server = await asyncio.start_server(self._handle, host, port, backlog=backlog)
+        print("Web server is listening on port", port)
+        while True:
+            await asyncio.sleep(3600)
+
+    def run(self, host="0.0.0.0", port=80, backlog=5):
+        asyncio.run(self.serve(host, port, backlog))
+
+
+async def _readinto(reader, mv):
+    if hasattr(reader, "readinto"):
+        # MicroPython streams fill the buffer in place
+        return await reader.readinto(mv)
+    data = await reader.read(len(mv))
+    mv[:len(data)] = data
+    return len(data)
+
+
+async def pump_uart(uart, on_line, period_ms=10):
+    """Background task: hands every complete line received on uart to on_line(bytes)."""
+    while True:
+        while uart.any():
+            line = uart.readline()
+            if line:
+                on_line(line)
+        await asyncio.sleep(period_ms / 1000)
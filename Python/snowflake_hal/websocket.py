@@ -0,0 +1,505 @@
+import binascii
+import hashlib
+import os
+import socket
+import struct
+import sys
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio # type: ignore
+
+# Minimal RFC 6455 WebSocket on top of asyncio streams, plus the binary
+# command channel used by the sender pages. WebServer.websocket(path) does
+# the upgrade and hands a WebSocket to the handler.
+#
+# Command frames (binary, 5 bytes, big endian):
+#     seq u16 | op u8 (ASCII, e.g. 'F') | arg u16 (NO_ARG when unused)
+# The server answers each accepted command with ACK seq (binary, 3 bytes)
+# and pushes telemetry as text frames.
+#
+# WebSocketClient is a blocking client for threaded scripts such as
+# thonny/Cam.py:
+#     ws = connect("ws://192.168.4.1:81/")
+#     ws.send(packer.pack(msg))
+#     opcode, payload = ws.recv()   # payload is a memoryview, valid until the next recv()
+
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_MESSAGE = 4096
+
+CMD_FORMAT = ">HBH"
+CMD_SIZE = 5
+NO_ARG = 0xFFFF
+ACK = 0x06
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept value for the client's Sec-WebSocket-Key."""
+    digest = hashlib.sha1(key.encode() + GUID).digest()
+    return binascii.b2a_base64(digest).strip().decode()
+
+
+MASK_CHUNK = 64      # bytes per XOR step on CPython; a multiple of 4
+
+if sys.implementation.name == "micropython":
+    import micropython # type: ignore
+
+    @micropython.viper
+    def _mask_into(mv, key):
+        """XORs mv in place with the 4-byte key repeated over its length.
+
+        A viper loop straight over the buffer: nothing is allocated."""
+        p = ptr8(mv) # type: ignore
+        k = ptr8(key) # type: ignore
+        n = int(len(mv))
+        i = 0
+        while i < n:
+            p[i] = p[i] ^ k[i & 3]
+            i += 1
+else:
+    def _mask_into(mv, key):
+        """XORs mv in place with the 4-byte key repeated over its length.
+
+        Works in MASK_CHUNK-byte steps against one repeated-key int, so the
+        temporaries stay MASK_CHUNK bytes however long the frame is."""
+        n = len(mv)
+        pattern = int.from_bytes(key * (MASK_CHUNK // 4), "big")
+        end = n - n % MASK_CHUNK
+        for start in range(0, end, MASK_CHUNK):
+            chunk = mv[start:start + MASK_CHUNK]
+            chunk[:] = (int.from_bytes(chunk, "big") ^ pattern).to_bytes(MASK_CHUNK, "big")
+        r = n - end
+        if r:
+            # Chunks start on a multiple of 4, so the tail uses the pattern's first r bytes
+            chunk = mv[end:]
+            chunk[:] = (int.from_bytes(chunk, "big") ^ (pattern >> (8 * (MASK_CHUNK - r)))).to_bytes(r, "big")
+
+
+def _mask(payload, key):
+    """Masked copy of payload (a received frame arrives as immutable bytes)."""
+    data = bytearray(payload)
+    _mask_into(memoryview(data), key)
+    return data
+
+
+def _frame_head(buf, opcode, n, key=None, fin=True):
+    """Writes a frame header (plus the mask key, if any) into buf; returns its length."""
+    buf[0] = (0x80 if fin else 0) | opcode
+    bit = 0x80 if key else 0
+    if n < 126:
+        buf[1] = bit | n
+        i = 2
+    elif n < 65536:
+        buf[1] = bit | 126
+        struct.pack_into(">H", buf, 2, n)
+        i = 4
+    else:
+        buf[1] = bit | 127
+        struct.pack_into(">Q", buf, 2, n)
+        i = 10
+    if key:
+        buf[i:i + 4] = key
+        i += 4
+    return i
+
+
+class WebSocketClosed(Exception):
+    pass
+
+
+class WebSocket:
+    def __init__(self, reader, writer, is_client=False, max_message=MAX_MESSAGE):
+        self.reader = reader
+        self.writer = writer
+        self.is_client = is_client  # clients mask what they send, servers must not
+        self.max_message = max_message
+        self.closed = False
+
+    async def _read_frame(self):
+        head = await self.reader.readexactly(2)
+        fin = head[0] & 0x80
+        opcode = head[0] & 0x0F
+        masked = head[1] & 0x80
+        n = head[1] & 0x7F
+        if n == 126:
+            n = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif n == 127:
+            n = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        # RFC 6455 5.1: clients must mask every frame, servers must not
+        if bool(masked) == self.is_client:
+            await self.close(1002)
+            raise WebSocketClosed("masked frame from server" if masked else "unmasked frame from client")
+        if n > self.max_message:
+            await self.close(1009)
+            raise WebSocketClosed("frame too large")
+        key = await self.reader.readexactly(4) if masked else None
+        payload = await self.reader.readexactly(n) if n else b""
+        if key:
+            payload = _mask(payload, key)
+        return fin, opcode, payload
+
+    async def recv(self):
+        """Returns the next (opcode, payload) data message; raises WebSocketClosed at the end.
+
+        Pings are answered and fragmented messages are reassembled here."""
+        message = None
+        msg_op = None
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == OP_PING:
+                await self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    await self.close(1000)
+                raise WebSocketClosed("closed by peer")
+            if opcode == OP_CONT:
+                if message is None:
+                    raise WebSocketClosed("unexpected continuation")
+                message += payload
+                if len(message) > self.max_message:
+                    await self.close(1009)
+                    raise WebSocketClosed("message too large")
+            else:
+                message = bytearray(payload)
+                msg_op = opcode
+            if fin:
+                return msg_op, bytes(message)
+
+    def frame(self, data, opcode):
+        """Encodes one complete frame."""
+        if isinstance(data, str):
+            data = data.encode()
+        n = len(data)
+        bit = 0x80 if self.is_client else 0
+        if n < 126:
+            head = struct.pack(">BB", 0x80 | opcode, bit | n)
+        elif n < 65536:
+            head = struct.pack(">BBH", 0x80 | opcode, bit | 126, n)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, bit | 127, n)
+        if self.is_client:
+            key = os.urandom(4)
+            return head + key + _mask(data, key)
+        return head + data
+
+    async def send(self, data, opcode=None):
+        if self.closed and opcode != OP_CLOSE:
+            raise WebSocketClosed("socket closed")
+        if opcode is None:
+            opcode = OP_TEXT if isinstance(data, str) else OP_BINARY
+        # One write per frame, so frames from different tasks never interleave
+        self.writer.write(self.frame(data, opcode))
+        await self.writer.drain()
+
+    async def close(self, code=1000):
+        if self.closed:
+            return
+        try:
+            await self.send(struct.pack(">H", code), OP_CLOSE)
+        except OSError:
+            pass
+        self.closed = True
+
+
+def _newer(seq, last):
+    """True if seq comes after last in 16-bit serial-number order."""
+    return last is None or 0 < ((seq - last) & 0xFFFF) < 0x8000
+
+
+class CommandChannel:
+    """Binary teleoperation commands in, telemetry out, over WebSockets.
+
+    on_command(cmd) gets the command as the old text form ('F', 'V50').
+    Commands are applied strictly in sequence order; a late or repeated one
+    is dropped instead of undoing a newer command. When the driving client
+    disconnects, stop_command is sent so the robot never keeps running.
+    Telemetry goes to each client from its own task, so a slow phone only
+    falls behind itself (it skips to the newest message) and never holds
+    up the others.
+    """
+
+    def __init__(self, on_command, stop_command="S"):
+        self.on_command = on_command
+        self.stop_command = stop_command
+        self.clients = []
+        self.last_command = None
+        self.latest = None
+        self._event = asyncio.Event()
+        self._pushing = []      # clients with a telemetry send in flight
+        self.received = 0
+        self.dropped = 0
+
+    def attach(self, app, path="/ws"):
+        """Registers the WebSocket route and the telemetry task on a WebServer."""
+        app.websocket(path)(self.handler)
+        app.add_task(self.telemetry_task())
+        return self
+
+    def decode(self, payload):
+        seq, op, arg = struct.unpack(CMD_FORMAT, payload)
+        cmd = chr(op)
+        if arg != NO_ARG:
+            cmd += str(arg)
+        return seq, cmd
+
+    async def handler(self, ws):
+        self.clients.append(ws)
+        last_seq = None  # every page counts from 1 on its own connection
+        try:
+            if self.latest is not None:
+                await ws.send(self.latest)
+            while True:
+                opcode, payload = await ws.recv()
+                if opcode != OP_BINARY or len(payload) != CMD_SIZE:
+                    continue
+                seq, cmd = self.decode(payload)
+                self.received += 1
+                if not _newer(seq, last_seq):
+                    self.dropped += 1
+                    continue
+                last_seq = seq
+                self.last_command = cmd
+                self.on_command(cmd)
+                await ws.send(struct.pack(">BH", ACK, seq))
+        except (WebSocketClosed, OSError, EOFError):
+            pass
+        finally:
+            self.clients.remove(ws)
+            if not self.clients and self.last_command not in (None, self.stop_command):
+                self.on_command(self.stop_command)
+                self.last_command = self.stop_command
+
+    def publish(self, message):
+        """Queues telemetry for every client. Only the newest message is kept."""
+        self.latest = message
+        self._event.set()
+
+    async def telemetry_task(self):
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            for ws in self.clients:
+                if ws not in self._pushing:
+                    self._pushing.append(ws)
+                    asyncio.create_task(self._push(ws))
+
+    async def _push(self, ws):
+        """Sends the newest telemetry to one client until it has caught up."""
+        try:
+            while not ws.closed:
+                message = self.latest
+                await ws.send(message)
+                if self.latest is message:
+                    break
+        except (WebSocketClosed, OSError):
+            pass
+        finally:
+            self._pushing.remove(ws)
+
+
+def _parse_url(url):
+    """Splits ws://host[:port]/path into (host, port, path)."""
+    if not url.startswith("ws://"):
+        raise ValueError("only ws:// URLs are supported")
+    host, _, path = url[5:].partition("/")
+    host, _, port = host.partition(":")
+    return host, int(port) if port else 80, "/" + path
+
+
+class WebSocketClient:
+    """Blocking WebSocket client on a connected socket (use connect()).
+
+    Frames use 16/64-bit lengths as needed and every frame sent is masked
+    with a fresh key. Reads fill one preallocated buffer with readinto, so
+    short reads from the socket never cut a frame. Pings are answered,
+    fragmented messages reassembled, and sends from several threads are
+    serialised.
+    """
+
+    def __init__(self, sock, max_message=MAX_MESSAGE, max_frame=None):
+        """
+        :param max_message: largest message recv() accepts; also the receive buffer size.
+        :param max_frame: if set, send() splits longer messages into fragments of this size.
+        """
+        self.sock = sock
+        self.max_message = max_message
+        self.max_frame = max_frame
+        self._rx = bytearray(max_message)
+        self._rx_mv = memoryview(self._rx)
+        self._control = memoryview(bytearray(125))
+        self._tx = bytearray(256)
+        self._head = bytearray(14)
+        self._head_mv = memoryview(self._head)
+        self._readinto = getattr(sock, "readinto", None) or sock.recv_into
+        try:
+            import _thread
+            self._lock = _thread.allocate_lock()
+        except ImportError:
+            self._lock = None
+        self.closed = False         # no more frames go out: close sent or connection lost
+        self._sock_open = True
+
+    def _read_exact(self, mv):
+        """Fills mv completely from the socket."""
+        got = 0
+        n = len(mv)
+        while got < n:
+            r = self._readinto(mv[got:])
+            if not r:
+                self.closed = True
+                raise WebSocketClosed("connection lost")
+            got += r
+
+    def _send_frame(self, data, opcode, fin=True):
+        n = len(data)
+        size = 14 + n
+        if len(self._tx) < size:
+            self._tx = bytearray(max(size, 2 * len(self._tx)))
+        tx = memoryview(self._tx)
+        key = os.urandom(4)
+        i = _frame_head(tx, opcode, n, key, fin)
+        tx[i:i + n] = data
+        _mask_into(tx[i:i + n], key)
+        # One write per frame, so a pong never lands inside another frame
+        self.sock.sendall(tx[:i + n])
+
+    def send(self, data, opcode=None):
+        if self.closed and opcode != OP_CLOSE:
+            raise WebSocketClosed("socket closed")
+        if isinstance(data, str):
+            data = data.encode()
+            if opcode is None:
+                opcode = OP_TEXT
+        if opcode is None:
+            opcode = OP_BINARY
+        data = memoryview(data)
+        step = self.max_frame
+        if self._lock:
+            self._lock.acquire()
+        try:
+            if step is None or len(data) <= step or opcode >= OP_CLOSE:
+                self._send_frame(data, opcode)
+            else:
+                for start in range(0, len(data), step):
+                    end = start + step
+                    self._send_frame(data[start:end], OP_CONT if start else opcode, end >= len(data))
+        finally:
+            if self._lock:
+                self._lock.release()
+
+    def _read_head(self):
+        """Returns (fin, opcode, length) of the next frame."""
+        head = self._head_mv
+        self._read_exact(head[:2])
+        fin = self._head[0] & 0x80
+        opcode = self._head[0] & 0x0F
+        masked = self._head[1] & 0x80
+        n = self._head[1] & 0x7F
+        if n == 126:
+            self._read_exact(head[2:4])
+            n = struct.unpack_from(">H", self._head, 2)[0]
+        elif n == 127:
+            self._read_exact(head[2:10])
+            n = struct.unpack_from(">Q", self._head, 2)[0]
+        if masked:
+            raise WebSocketClosed("masked frame from server")
+        return fin, opcode, n
+
+    def recv(self):
+        """Returns the next data message as (opcode, memoryview).
+
+        The memoryview points into the receive buffer and is only valid
+        until the next recv(). Raises WebSocketClosed when the connection ends."""
+        size = 0
+        msg_op = None
+        while True:
+            fin, opcode, n = self._read_head()
+            if opcode >= OP_CLOSE:
+                if n > 125:
+                    raise WebSocketClosed("control frame too long")
+                # Control frames may arrive between fragments, so they get their own buffer
+                payload = self._control[:n]
+                self._read_exact(payload)
+                if opcode == OP_PING:
+                    self.send(payload, OP_PONG)
+                elif opcode == OP_CLOSE:
+                    self.close(1000)
+                    raise WebSocketClosed("closed by peer")
+                continue
+            if opcode == OP_CONT:
+                if msg_op is None:
+                    raise WebSocketClosed("unexpected continuation")
+            elif msg_op is not None:
+                raise WebSocketClosed("new message inside a fragmented one")
+            else:
+                msg_op = opcode
+            if size + n > self.max_message:
+                self.close(1009)
+                raise WebSocketClosed("message too large")
+            self._read_exact(self._rx_mv[size:size + n])
+            size += n
+            if fin:
+                return msg_op, self._rx_mv[:size]
+
+    def close(self, code=1000):
+        """Sends a close frame unless one went out or the link is gone, then closes the socket."""
+        if not self.closed:
+            try:
+                self.send(struct.pack(">H", code), OP_CLOSE)
+            except OSError:
+                pass
+            self.closed = True
+        if self._sock_open:
+            self._sock_open = False
+            self.sock.close()
+
+
+def _read_line(sock):
+    """Reads one header line a byte at a time, so nothing after the handshake is consumed."""
+    readinto = getattr(sock, "readinto", None) or sock.recv_into
+    line = bytearray()
+    b = bytearray(1)
+    while not line.endswith(b"\n"):
+        if not readinto(b):
+            raise OSError("connection closed during handshake")
+        line += b
+    return bytes(line)
+
+
+def connect(url, max_message=MAX_MESSAGE, max_frame=None):
+    """Opens a WebSocket to ws://host[:port]/path and checks the server's handshake."""
+    host, port, path = _parse_url(url)
+    sock = socket.socket()
+    try:
+        sock.connect(socket.getaddrinfo(host, port)[0][-1])
+        key = binascii.b2a_base64(os.urandom(16)).strip().decode()
+        sock.sendall(("GET %s HTTP/1.1\r\nHost: %s:%d\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      "Sec-WebSocket-Key: %s\r\nSec-WebSocket-Version: 13\r\n\r\n" % (path, host, port, key)).encode())
+        status = _read_line(sock)
+        if b" 101 " not in status:
+            raise OSError("WebSocket upgrade refused: %s" % status.decode().strip())
+        accept = None
+        while True:
+            line = _read_line(sock)
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.strip().lower() == "sec-websocket-accept":
+                accept = value.strip()
+        if accept != accept_key(key):
+            raise OSError("bad Sec-WebSocket-Accept")
+    except:
+        sock.close()
+        raise
+    return WebSocketClient(sock, max_message, max_frame)
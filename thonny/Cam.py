@@ -1,81 +1,24 @@
 # ==========================================================
 # ESP32-CAM  —  SoftAP + WebSocket + IMU + Camera Stream
-# Single Code  (MessagePack included)
+# Single Code  (MessagePack from snowflake_hal)
 # ==========================================================
 
 import network, socket, camera, utime, _thread, machine, ujson
 from machine import Pin, I2C
-import usocket as us
-import ubinascii as binascii
-import urandom as random
 import ussl
 
-# ================== INTERNAL MSGPACK MODULE ==================
-# (embedded lightweight version — no external file needed)
+# ======================= MSGPACK =========================
+# snowflake_hal/msgpack.py (copy the snowflake_hal folder to the board).
+# Messages are packed into one reusable buffer; IMU floats go as float32.
 # =============================================================
-class _Ext: pass
-def _pack(obj):
-    if obj is None: return b"\xc0"
-    if obj is True: return b"\xc3"
-    if obj is False: return b"\xc2"
-    if isinstance(obj, int):
-        if obj >= 0:
-            if obj <= 0x7f: return bytes([obj])
-            if obj <= 0xff: return b"\xcc"+bytes([obj])
-            if obj <= 0xffff: return b"\xcd"+obj.to_bytes(2,"big")
-            return b"\xce"+obj.to_bytes(4,"big")
-        else:
-            if obj >= -32: return bytes([0xe0+(obj+32)])
-            if obj >= -128: return b"\xd0"+(obj & 0xff).to_bytes(1,"big")
-            return b"\xd1"+(obj & 0xffff).to_bytes(2,"big")
-    if isinstance(obj, str):
-        b = obj.encode(); l=len(b)
-        if l<32: return bytes([0xa0|l])+b
-        return b"\xd9"+bytes([l])+b
-    if isinstance(obj, bytes):
-        l=len(obj)
-        return b"\xc4"+bytes([l])+obj
-    if isinstance(obj, list):
-        l=len(obj); out=b""
-        for x in obj: out+=_pack(x)
-        if l<16: return bytes([0x90|l])+out
-        return b"\xdc"+l.to_bytes(2,"big")+out
-    if isinstance(obj, dict):
-        l=len(obj); out=b""
-        for k,v in obj.items(): out+=_pack(k)+_pack(v)
-        if l<16: return bytes([0x80|l])+out
-        return b"\xde"+l.to_bytes(2,"big")+out
-    return b""
-def _unpack(buf):
-    i=0
-    def R(n):
-        nonlocal i; d=buf[i:i+n]; i+=n; return d
-    def O():
-        nonlocal i
-        c=buf[i]; i+=1
-        if c<=0x7f: return c
-        if 0xe0<=c<=0xff: return c-0x100
-        if 0xa0<=c<=0xbf: l=c&0x1f; return R(l).decode()
-        if 0x80<=c<=0x8f: l=c&0xf; return {O():O() for _ in range(l)}
-        if 0x90<=c<=0x9f: l=c&0xf; return [O() for _ in range(l)]
-        if c==0xc0: return None
-        if c==0xc3: return True
-        if c==0xc2: return False
-        if c==0xcc: return R(1)[0]
-        if c==0xcd: return int.from_bytes(R(2),"big")
-        if c==0xd0: return int.from_bytes(R(1),"big",True)
-        if c==0xd1: return int.from_bytes(R(2),"big",True)
-        if c==0xd9: l=R(1)[0]; return R(l).decode()
-        if c==0xc4: l=R(1)[0]; return R(l)
-        if c==0xdc: l=int.from_bytes(R(2),"big"); return [O() for _ in range(l)]
-        if c==0xde: l=int.from_bytes(R(2),"big"); return {O():O() for _ in range(l)}
-        return None
-    return O()
-class msgpack:
-    @staticmethod
-    def packb(x): return _pack(x)
-    @staticmethod
-    def unpackb(x): return _unpack(x)
+from snowflake_hal.msgpack import Packer, unpackb
+from snowflake_hal.websocket import connect
+from snowflake_hal.imu import LSM6DSO, ACCEL_SCALE, GYRO_SCALE
+from snowflake_hal.gesture import GestureEngine, gesture_messages
+from snowflake_hal.mjpeg import MJPEGServer
+
+packer = Packer(use_single_float=True)
+send_lock = _thread.allocate_lock()  # the IMU thread and the main thread both send
 
 # ================= WIFI & SERVER SETTINGS =================
 WIFI_SSID = "Subu-d5b538"
@@ -94,134 +37,148 @@ LSM6_ADDR = 0x6A
 
 imu_enabled = False
 imu_mode = 0      # 1 gesture, 2 raw
+imu = None
+
+# The FIFO samples at IMU_ODR_HZ; every IMU_BATCH_MS the thread drains it
+# and sends one message, so 104 Hz data costs 10 sends a second
+IMU_ODR_HZ = 104
+IMU_BATCH_MS = 100
+
+# Gesture mode filters every sample, needs a tilt past 0.6 g (and back under
+# 0.4 g to let go) held for 120 ms, and sends only when the gesture changes.
+# Nothing is sent while a pose is held, so the FIFO is drained more often
+# (IMU_GESTURE_MS) to react sooner. The five messages are packed once here.
+IMU_GESTURE_MS = 40
+gesture = GestureEngine(IMU_ODR_HZ, ACCEL_SCALE, cutoff_hz=3.0, enter_g=0.6, exit_g=0.4, dwell_ms=120)
+GESTURE_MESSAGES = gesture_messages(packer)
 
 i2c = I2C(0, scl=Pin(I2C_SCL), sda=Pin(I2C_SDA), freq=400000)
 
 # ================= CAMERA CONTROL =================
 camera_running = False
 camera_thread_started = False
+cam_lock = _thread.allocate_lock()  # guards camera_thread_started against cam_start()
+
+# snowflake_hal/mjpeg.py: every viewer of /stream gets the same capture,
+# at most CAM_MAX_FPS a second; a slow viewer skips frames instead of
+# stalling the others. Per-viewer counters are at /stats. /snapshot.jpg
+# returns one JPEG from the same latest-frame buffer, so polling stills
+# does not add captures on top of the stream.
+CAM_MAX_FPS = 15
+CAM_MAX_CLIENTS = 3
+CAM_PAGE = """<html><body style='text-align:center;background:black;color:white'>
+<h2>ESP32-CAM MicroPython</h2><img src='/stream'></body></html>"""
 
 # ==========================================================
 # ------------------- WEBSOCKET CLIENT ---------------------
 # ==========================================================
 
-def urlparse(uri):
-    uri = uri[5:]
-    host, path = uri.split("/",1)
-    if ":" in host:
-        h,p = host.split(":")
-        return h,int(p),"/"+path
-    return host,80,"/"+path
-
-class WebSocketClient:
-    def __init__(self, sock): self.sock=sock
-    def send(self, data):
-        header=b"\x82"+bytes([len(data)])
-        self.sock.send(header+data)
-    def recv(self):
-        hdr=self.sock.recv(2)
-        if not hdr: return b""
-        l=hdr[1]&127
-        return self.sock.recv(l)
+# snowflake_hal/websocket.py: extended lengths, masked frames, exact reads,
+# ping/pong and fragmented messages. Messages up to WS_MAX_MESSAGE bytes.
+WS_MAX_MESSAGE = 4096
 
 def ws_connect(uri):
-    host,port,path = urlparse(uri)
-    s = us.socket()
-    s.connect(us.getaddrinfo(host,port)[0][-1])
-    key = binascii.b2a_base64(bytes(random.getrandbits(8) for _ in range(16)))[:-1]
-    hdr = ("GET {} HTTP/1.1\r\nHost: {}:{}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {}\r\nSec-WebSocket-Version: 13\r\n\r\n"
-          ).format(path,host,port,key.decode())
-    s.send(hdr.encode())
-    while s.readline() not in (b"\r\n",b""): pass
-    return WebSocketClient(s)
+    return connect(uri, max_message=WS_MAX_MESSAGE)
 
 # ==========================================================
 # ------------------------  IMU  ---------------------------
 # ==========================================================
 
 def imu_init():
+    global imu
     try:
-        i2c.writeto_mem(LSM6_ADDR,0x10,b'\x60')
-        i2c.writeto_mem(LSM6_ADDR,0x11,b'\x50')
+        imu = LSM6DSO(i2c, LSM6_ADDR, odr_hz=IMU_ODR_HZ, max_samples=32)
         print("IMU READY")
     except:
         print("IMU ERROR")
 
-def imu_read():
-    d=i2c.readfrom_mem(LSM6_ADDR,0x28,4)
-    ax=int.from_bytes(d[0:2],"little",True)*0.000061
-    ay=int.from_bytes(d[2:4],"little",True)*0.000061
-    return ax,ay
-
-def detect_gesture(ax,ay):
-    if ay>0.6: return "backward"
-    if ay<-0.6: return "forward"
-    if ax>0.6: return "left"
-    if ax<-0.6: return "right"
-    return "stop"
+def detect_gesture(n):
+    """Feeds the n samples of the last batch to the engine; returns the last change or None."""
+    changed = None
+    for i in range(n):
+        ax, ay = imu.raw(i)[:2]
+        g = gesture.update(ax, ay)
+        if g is not None: changed = g
+    return changed
 
 def imu_thread():
     global imu_enabled, imu_mode
+    was_enabled = False
     while True:
-        if imu_enabled:
-            ax,ay = imu_read()
-            if imu_mode==1: send_gesture(detect_gesture(ax,ay))
-            else: send_raw(ax,ay)
-        utime.sleep_ms(500)
+        if imu_enabled and imu is not None:
+            if not was_enabled:
+                imu.flush()   # drop what piled up while disabled
+                gesture.reset()   # and report the pose again once it settles
+            n = imu.read()
+            if n:
+                if imu_mode==1:
+                    g = detect_gesture(n)
+                    if g is not None: send_gesture(g)
+                else: send_raw(n)
+        was_enabled = imu_enabled
+        utime.sleep_ms(IMU_GESTURE_MS if imu_mode==1 else IMU_BATCH_MS)
 
 # ==========================================================
 # -------------------  SEND MESSAGE  -----------------------
 # ==========================================================
 
 def send_msgpack(o):
-    try: ws.send(msgpack.packb(o))
+    try:
+        with send_lock:   # packer.buf is shared too
+            ws.send(packer.pack(o))
+    except: pass
+
+def send_bytes(b):
+    try:
+        with send_lock:
+            ws.send(b)
     except: pass
 
 def send_ip():
     send_msgpack({"msg":"ipaddr","ip":local_ip})
 
 def send_gesture(g):
-    send_msgpack({"mode":"Board","program":{"loop":{"0":{"MExBo":{"gesture":g}}}}})
+    send_bytes(GESTURE_MESSAGES[g])
 
-def send_raw(ax,ay):
-    send_msgpack({"mode":"IMU_RAW","data":{"ax":ax,"ay":ay}})
+def send_raw(n):
+    # "data" keeps the latest ax/ay as before; "samples" is the whole batch,
+    # n x (ax ay az gx gy gz) as int16 little endian, times the scales
+    ax, ay = imu.sample(n - 1)[:2]
+    send_msgpack({"mode":"IMU_RAW","data":{"ax":ax,"ay":ay},"odr":IMU_ODR_HZ,"n":n,
+                  "accel_scale":ACCEL_SCALE,"gyro_scale":GYRO_SCALE,"samples":imu.batch(n)})
 
 # ==========================================================
 # --------------------- CAMERA STREAM ----------------------
 # ==========================================================
 
 def camera_server():
-    global camera_running
-    camera.init(0)
-    camera.framesize(camera.FRAME_QVGA)
-    s=socket.socket()
-    s.setsockopt(socket.SOL_SOCKET,socket.SO_REUSEADDR,1)
-    # MODIFIED: Use the defined CAM_STREAM_PORT (81)
-    s.bind(("0.0.0.0",CAM_STREAM_PORT)); s.listen(1) 
-    while camera_running:
-        c,a=s.accept()
-        req=c.recv(1024)
-        if b"/stream" in req:
-            c.send(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=frame\r\n\r\n")
-            while camera_running:
-                f=camera.capture()
-                if not f or isinstance(f,int): continue
-                try:
-                    c.send(b"--frame\r\nContent-Type: image/jpeg\r\n\r\n")
-                    c.send(f); c.send(b"\r\n")
-                except: break
-        else:
-            c.send(b"""HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n
-                <html><body style='text-align:center;background:black;color:white'>
-                <h2>ESP32-CAM MicroPython</h2><img src='/stream'></body></html>""")
-        c.close()
+    global camera_thread_started
+    while True:
+        camera.init(0)
+        camera.framesize(camera.FRAME_QVGA)
+        server = MJPEGServer(camera, port=CAM_STREAM_PORT, max_fps=CAM_MAX_FPS,
+                             max_clients=CAM_MAX_CLIENTS, page=CAM_PAGE)
+        try:
+            server.run(lambda: camera_running)
+        except Exception as e:
+            print("Camera server error:", e)
+            utime.sleep_ms(500)
+        finally:
+            camera.deinit()
+        # A cam_start() that came in while we were stopping saw the flag still
+        # set and started nothing, so serve again instead of exiting
+        with cam_lock:
+            if not camera_running:
+                camera_thread_started = False
+                return
 
 def cam_start():
     global camera_running,camera_thread_started
-    camera_running=True
-    if not camera_thread_started:
-        camera_thread_started=True
-        _thread.start_new_thread(camera_server,())
+    with cam_lock:
+        camera_running=True
+        if not camera_thread_started:
+            camera_thread_started=True
+            _thread.start_new_thread(camera_server,())
 
 def cam_stop():
     global camera_running
@@ -234,10 +191,12 @@ def cam_stop():
 def ws_loop():
     global imu_enabled, imu_mode
     while True:
-        try: data = ws.recv()
+        try: opcode, data = ws.recv()
         except: reconnect_ws(); continue
         if not data: continue
-        msg = msgpack.unpackb(data)
+        try: msg = unpackb(data)
+        except ValueError: continue   # truncated or unsupported; drop the frame
+        if not isinstance(msg, dict): continue
         tgt = msg.get("target")
         if tgt=="imu":
             if msg.get("state")=="start":
@@ -250,10 +209,14 @@ def ws_loop():
 
 def reconnect_ws():
     global ws
+    if ws is not None:
+        ws.close()
     while True:
         try:
             ws = ws_connect(WS_URL)
             send_ip()
+            if imu_enabled and imu_mode==1 and gesture.state >= 0:
+                send_gesture(gesture.state)   # the server missed it while we were away
             print("WebSocket Connected")
             break
         except:
@@ -278,6 +241,7 @@ def wifi_connect():
     # ADDED: Clear output for the camera stream URL
     print("==================================================")
     print("📢 Camera Stream URL: http://{}:{}/stream".format(local_ip, CAM_STREAM_PORT))
+    print("📷 Snapshot URL: http://{}:{}/snapshot.jpg".format(local_ip, CAM_STREAM_PORT))
     print("==================================================")
 
 
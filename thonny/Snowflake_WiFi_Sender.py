@@ -1,9 +1,10 @@
 # c:\venkat\thonny\wifi_controller_esp32.py
 import network
-import socket
 import time
 from machine import UART
 import Trix
+from snowflake_hal.web import WebServer
+from snowflake_hal.static import load_page
 
 # --- Configuration ---
 WIFI_SSID = "Snowflake-Car-Control"
@@ -95,37 +96,21 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("-----------------------------")
 
-# --- Web Server Setup ---
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
+# --- Web Server ---
+app = WebServer()
+# Rendered/loaded once; served gzipped with an ETag when build_static.py was run
+PAGE = load_page("wifi.html", get_web_page_html)
 
-print("Web server is listening...")
+@app.route("/")
+def index(req):
+    # Find the command in the HTTP GET request
+    command = req.query.get("cmd")
+    if command:
+        print(f'Received command: {command}')
+        # Send the command over UART to the Snowflake board
+        uart.write(command + '\n')
+        return (200, "text/plain", "OK")
+    # Serve the web page
+    return PAGE(req)
 
-# --- Main Server Loop ---
-while True:
-    try:
-        conn, addr = s.accept()
-        request = conn.recv(1024)
-        
-        # Find the command in the HTTP GET request
-        request_str = request.decode('utf-8')
-        cmd_start = request_str.find('/?cmd=')
-        if cmd_start != -1:
-            cmd_end = request_str.find(' ', cmd_start)
-            command = request_str[cmd_start + 6:cmd_end]
-            print(f'Received command: {command}')
-            # Send the command over UART to the Snowflake board
-            uart.write(command + '\n')
-
-        # Serve the web page
-        conn.send('HTTP/1.1 200 OK\nContent-Type: text/html\nConnection: close\n\n')
-        conn.sendall(get_web_page_html())
-        conn.close()
-        
-    except OSError as e:
-        if 'conn' in locals():
-            conn.close()
-        print(f'Connection error: {e}')
+app.run()
@@ -1,8 +1,8 @@
 import network
-import socket
 import time
 from machine import Pin, UART
 import Cayo
+from snowflake_hal.web import WebServer, asyncio
 
 # --- Configuration ---
 WIFI_SSID = "Measuring-Bot-Control"
@@ -184,95 +184,68 @@ print(f"WiFi Network: {WIFI_SSID}")
 print(f"IP Address: http://{ap.ifconfig()[0]}")
 print("----------------------------")
 
-addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-s = socket.socket()
-s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-s.bind(addr)
-s.listen(1)
-
-print("Web server is listening...")
-
-# --- Main Server Loop ---
-def parse_query(request_str):
-    """Extracts query parameters from a GET request string."""
-    params = {}
-    query_start = request_str.find('?')
-    if query_start != -1:
-        query_string = request_str.split(' ')[1][query_start+1:]
-        for part in query_string.split('&'):
-            if '=' in part:
-                key, value = part.split('=', 1)
-                params[key] = value
-    return params
-
-def send_response(conn, body, content_type='text/html'):
-    """Sends a standard HTTP response."""
-    conn.send(f'HTTP/1.1 200 OK\nContent-Type: {content_type}\nConnection: close\n\n')
-    conn.sendall(body)
-
-while True:
+# --- Web Server ---
+# Requests are parsed by WebServer (headers line by line, bodies read in full
+# into a fixed buffer), so a request split over several TCP segments works.
+app = WebServer()
+
+@app.route("/control")
+def control(req):
+    cmd = req.query.get('cmd')
+    if cmd:
+        print(f"Sending command: {cmd}")
+        uart.write(cmd + '\n')
+    return (200, 'text/plain', 'OK')
+
+@app.route("/distance")
+def distance(req):
+    dist = ultrasonic.distance_cm()
+    return (200, 'text/plain', f"{dist:.1f}" if dist != -1 else "Error")
+
+@app.route("/manual_finish")
+def manual_finish(req):
+    # This is a simplified calculation.
+    # You need to calibrate CAR_SPEED_CM_PER_SEC for your robot.
+    CAR_SPEED_CM_PER_SEC = 15.0
     try:
-        conn, addr = s.accept()
-        request = conn.recv(1024).decode('utf-8')
-        
-        params = parse_query(request)
-        
-        if '/control' in request:
-            cmd = params.get('cmd')
-            if cmd:
-                print(f"Sending command: {cmd}")
-                uart.write(cmd + '\n')
-            send_response(conn, 'OK', 'text/plain')
-
-        elif '/distance' in request:
-            dist = ultrasonic.distance_cm()
-            send_response(conn, f"{dist:.1f}" if dist != -1 else "Error", 'text/plain')
-
-        elif '/manual_finish' in request:
-            # This is a simplified calculation.
-            # You need to calibrate CAR_SPEED_CM_PER_SEC for your robot.
-            CAR_SPEED_CM_PER_SEC = 15.0 
-            try:
-                duration = float(params.get('time', 0))
-                calculated_dist = duration * CAR_SPEED_CM_PER_SEC
-                send_response(conn, f"{calculated_dist:.1f}", 'text/plain')
-            except (ValueError, TypeError):
-                send_response(conn, "Invalid time", 'text/plain')
-
-        elif '/auto_start' in request:
-            try:
-                target_dist = float(params.get('target'))
-                threshold = 2.0 # Allowable error in cm
-                print(f"Auto mode started. Target: {target_dist} cm")
-
-                for _ in range(10): # Try for max 10 seconds
-                    current_dist = ultrasonic.distance_cm()
-                    if current_dist == -1: continue
-
-                    error = target_dist - current_dist
-                    print(f"Current: {current_dist:.1f}, Target: {target_dist}, Error: {error:.1f}")
-
-                    if abs(error) <= threshold:
-                        uart.write('S\n') # Stop
-                        print("Position reached.")
-                        break
-                    elif error > 0: # Too close, need to move back
-                        uart.write('B\n')
-                    else: # Too far, need to move forward
-                        uart.write('F\n')
-                    
-                    time.sleep(0.5) # Move for a short duration then re-check
-                
-                uart.write('S\n') # Final stop
-                send_response(conn, 'Positioned', 'text/plain')
-
-            except (ValueError, TypeError):
-                send_response(conn, 'Invalid target', 'text/plain')
-
-        else: # Serve the main page
-            send_response(conn, get_web_page_html())
-        
-        conn.close()
-    except Exception as e:
-        if 'conn' in locals(): conn.close()
-        print(f'Error: {e}')
\ No newline at end of file
+        duration = float(req.query.get('time', 0))
+        calculated_dist = duration * CAR_SPEED_CM_PER_SEC
+        return (200, 'text/plain', f"{calculated_dist:.1f}")
+    except (ValueError, TypeError):
+        return (200, 'text/plain', "Invalid time")
+
+@app.route("/auto_start")
+async def auto_start(req):
+    try:
+        target_dist = float(req.query.get('target'))
+    except (ValueError, TypeError):
+        return (200, 'text/plain', 'Invalid target')
+    threshold = 2.0 # Allowable error in cm
+    print(f"Auto mode started. Target: {target_dist} cm")
+
+    for _ in range(10): # Try for max 10 seconds
+        current_dist = ultrasonic.distance_cm()
+        if current_dist == -1: continue
+
+        error = target_dist - current_dist
+        print(f"Current: {current_dist:.1f}, Target: {target_dist}, Error: {error:.1f}")
+
+        if abs(error) <= threshold:
+            uart.write('S\n') # Stop
+            print("Position reached.")
+            break
+        elif error > 0: # Too close, need to move back
+            uart.write('B\n')
+        else: # Too far, need to move forward
+            uart.write('F\n')
+
+        await asyncio.sleep(0.5) # Move for a short duration then re-check (other requests keep being served)
+
+    uart.write('S\n') # Final stop
+    return (200, 'text/plain', 'Positioned')
+
+@app.route("/")
+def index(req):
+    return get_web_page_html()
+
+app.run()